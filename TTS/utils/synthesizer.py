@@ -1,3 +1,4 @@
+import logging
 import os
 import time
 from typing import List
@@ -16,6 +17,8 @@ from TTS.utils.audio import AudioProcessor
 from TTS.vocoder.models import setup_model as setup_vocoder_model
 from TTS.vocoder.utils.generic_utils import interpolate_vocoder_input
 
+_LOGGER = logging.getLogger(__name__)
+
 
 class Synthesizer(object):
     def __init__(
@@ -94,7 +97,7 @@ class Synthesizer(object):
         Args:
             speaker_file (str): path to the speakers meta-data file.
         """
-        print("Loading speakers ...")
+        _LOGGER.debug("Loading speakers ...")
         self.speaker_manager = SpeakerManager(
             encoder_model_path=self.encoder_checkpoint,
             encoder_config_path=self.encoder_config,
@@ -249,8 +252,7 @@ class Synthesizer(object):
         start_time = time.time()
         wavs = []
         sens = self.split_into_sentences(text)
-        print(" > Text splitted to sentences.")
-        print(sens)
+        _LOGGER.debug("Text split into sentences: %s", sens)
 
         # handle multi-speaker
         speaker_embedding = None
@@ -328,7 +330,7 @@ class Synthesizer(object):
                     self.vocoder_config["audio"]["sample_rate"] / self.ap.sample_rate,
                 ]
                 if scale_factor[1] != 1:
-                    print(" > interpolating tts model output.")
+                    _LOGGER.debug("Interpolating TTS model output")
                     vocoder_input = interpolate_vocoder_input(
                         scale_factor, vocoder_input
                     )
@@ -354,6 +356,10 @@ class Synthesizer(object):
         # compute stats
         process_time = time.time() - start_time
         audio_time = len(wavs) / self.tts_config.audio["sample_rate"]
-        print(f" > Processing time: {process_time}")
-        print(f" > Real-time factor: {process_time / audio_time}")
+        _LOGGER.debug(
+            "Real-time factor: %0.2f (infer=%0.2f sec, audio=%0.2f sec)",
+            process_time / audio_time,
+            process_time,
+            audio_time,
+        )
         return wavs
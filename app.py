@@ -3,38 +3,68 @@
 import argparse
 import asyncio
 import dataclasses
+import functools
 import hashlib
-import io
-import itertools
+import importlib
+import json
 import logging
-import math
+import os
 import re
 import shutil
 import signal
+import struct
 import sys
 import tempfile
 import time
 import typing
-import wave
+import zipfile
 from collections import defaultdict
 from pathlib import Path
 from urllib.parse import parse_qs
 from uuid import uuid4
+from xml.etree import ElementTree
 
 import hypercorn
 import quart_cors
 from quart import (
     Quart,
     Response,
+    g,
     jsonify,
     render_template,
     request,
     send_from_directory,
+    websocket,
 )
 from swagger_ui import api_doc
+from werkzeug.datastructures import ContentRange
 
 import gruut
+import metrics
+from audio import (
+    OUTPUT_FORMATS,
+    AudioChunk,
+    AudioEncoder,
+    OutputFormat,
+    encode_audio,
+    get_output_format,
+)
+from cache_warmer import CacheWarmer, load_requests
+from concurrency import (
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    PRIORITY_NORMAL,
+    Deadline,
+    DeadlineExceededError,
+    EngineBusyError,
+    EngineLimiter,
+    SingleFlight,
+    run_ordered,
+)
+from jobs import Job, JobManager, JobNotFoundError
+from model_cache import ModelCache
 from tts import (
+    SYNTHESIS_SETTINGS,
     CoquiTTS,
     EspeakTTS,
     FestivalTTS,
@@ -45,6 +75,10 @@ from tts import (
     NanoTTS,
     TTSBase,
 )
+from voice_catalog import VoiceCatalog
+from voice_resolver import VoiceResolver
+from wav_cache import MemoryCache, WavCache
+from workers import WorkerPool, WorkerTTS
 
 _DIR = Path(__file__).parent
 _VOICES_DIR = _DIR / "voices"
@@ -53,9 +87,6 @@ _VERSION = (_DIR / "VERSION").read_text().strip()
 _LOGGER = logging.getLogger("opentts")
 _LOOP = asyncio.get_event_loop()
 
-WAV_AND_SAMPLE_RATE = typing.Tuple[bytes, int]
-
-
 # Language to default to in dropdown list
 _DEFAULT_LANGUAGE = "en"
 lang_path = _DIR / "LANGUAGE"
@@ -100,6 +131,20 @@ _VOICE_ALIASES["zh"] = ["coqui-tts:zh_baker"]
 
 # -----------------------------------------------------------------------------
 
+
+def parse_size(size_str: str) -> int:
+    """Parse size in bytes with optional K/M/G suffix"""
+    size_str = size_str.strip().upper()
+    multiplier = 1
+    for suffix, suffix_multiplier in (("K", 1024), ("M", 1024 ** 2), ("G", 1024 ** 3)):
+        if size_str.endswith(suffix):
+            size_str = size_str[: -len(suffix)]
+            multiplier = suffix_multiplier
+            break
+
+    return int(float(size_str) * multiplier)
+
+
 parser = argparse.ArgumentParser(prog="opentts")
 parser.add_argument(
     "--host", default="0.0.0.0", help="Host of HTTP server (default: 0.0.0.0)"
@@ -127,6 +172,116 @@ parser.add_argument(
     const="",
     help="Cache WAV files in a provided or temporary directory",
 )
+parser.add_argument(
+    "--cache-max-size",
+    type=parse_size,
+    help="Maximum size of WAV cache in bytes (suffixes K, M, G allowed)",
+)
+parser.add_argument(
+    "--cache-max-entries", type=int, help="Maximum number of WAV files in cache"
+)
+parser.add_argument(
+    "--cache-eviction",
+    choices=sorted(WavCache.EVICTION_POLICIES.keys()),
+    default="lru",
+    help="Policy used to evict WAV files when cache is full (default: lru)",
+)
+parser.add_argument(
+    "--cache-memory-size",
+    type=parse_size,
+    help="Keep recently used WAV files in memory up to size in bytes (suffixes K, M, G allowed)",
+)
+parser.add_argument(
+    "--sentence-cache-size",
+    type=parse_size,
+    help="Cache audio of individual sentences in memory up to size in bytes (suffixes K, M, G allowed)",
+)
+parser.add_argument(
+    "--batch-concurrency",
+    type=int,
+    default=4,
+    help="Number of voices synthesized at the same time for /api/tts/batch (default: 4)",
+)
+parser.add_argument(
+    "--jobs-dir", help="Directory to store audio from /api/jobs (default: temporary)"
+)
+parser.add_argument(
+    "--job-ttl",
+    type=float,
+    default=3600,
+    help="Seconds to keep finished jobs and their audio (default: 3600)",
+)
+parser.add_argument(
+    "--max-running-jobs",
+    type=int,
+    default=2,
+    help="Maximum number of jobs synthesized at the same time (default: 2)",
+)
+parser.add_argument(
+    "--voices-refresh-interval",
+    type=float,
+    help="Seconds between reloading the list of available voices (default: only at startup)",
+)
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=0,
+    help="Run Larynx, Glow-Speak, and Coqui-TTS in this many worker processes (default: 0, in server process)",
+)
+parser.add_argument(
+    "--cpu-budget",
+    type=int,
+    help="Number of CPU cores that Larynx, Glow-Speak, and Coqui-TTS may use in total (default: all)",
+)
+parser.add_argument(
+    "--inference-mode",
+    choices=["latency", "throughput"],
+    help="Use all cores for one synthesis at a time (latency) or one core for each of many syntheses (throughput)",
+)
+parser.add_argument(
+    "--inference-threads",
+    type=int,
+    help="Threads used by each Larynx, Glow-Speak, or Coqui-TTS synthesis (overrides --inference-mode)",
+)
+parser.add_argument(
+    "--model-cache-size",
+    type=parse_size,
+    help="Unload least recently used voice/vocoder models when their total size goes over this many bytes (suffixes K, M, G allowed)",
+)
+parser.add_argument(
+    "--pin-voice",
+    action="append",
+    metavar="VOICE",
+    help="Never unload models for a voice or language alias (e.g., en or glow-speak:en-us_mary_ann)",
+)
+parser.add_argument(
+    "--preload",
+    nargs="+",
+    metavar="VOICE",
+    action="extend",
+    help="Load and warm up voices at startup (tts:voice, tts:voice;vocoder, language, or 'aliases' for all language aliases)",
+)
+parser.add_argument(
+    "--warmup-text",
+    default="Test.",
+    help="Text synthesized with each preloaded voice at startup (default: Test.)",
+)
+parser.add_argument(
+    "--prewarm-file",
+    action="append",
+    help="File with one JSON object per line (text, voice, and other /api/tts parameters) to synthesize into the cache at startup",
+)
+parser.add_argument(
+    "--prewarm-top",
+    type=int,
+    help="Synthesize the N most used requests recorded in the cache index at startup, if their audio is missing",
+)
+parser.add_argument(
+    "--prewarm-delay",
+    type=float,
+    default=0.5,
+    help="Seconds to wait between pre-warmed requests (default: 0.5)",
+)
 parser.add_argument(
     "--preferred-voice",
     nargs=2,
@@ -134,6 +289,29 @@ parser.add_argument(
     action="append",
     help="Preferred voice for a language with SSML",
 )
+parser.add_argument(
+    "--parallel-sentences",
+    type=int,
+    default=1,
+    help="Number of lines/sentences synthesized at the same time per request (default: 1)",
+)
+parser.add_argument(
+    "--engine-concurrency",
+    nargs=2,
+    metavar=("tts", "max"),
+    action="append",
+    help="Maximum number of concurrent syntheses for a TTS system (e.g., larynx 4)",
+)
+parser.add_argument(
+    "--engine-max-queue",
+    type=int,
+    help="Maximum number of syntheses waiting for a limited TTS system before 503 is returned",
+)
+parser.add_argument(
+    "--engine-max-wait",
+    type=float,
+    help="Maximum seconds a synthesis waits for a limited TTS system before 503 is returned",
+)
 parser.add_argument(
     "--debug", action="store_true", help="Print DEBUG messages to console"
 )
@@ -190,20 +368,58 @@ if args.preferred_voice:
 # -----------------------------------------------------------------------------
 
 # Set up WAV cache
-_CACHE_DIR: typing.Optional[Path] = None
+_WAV_CACHE: typing.Optional[WavCache] = None
 _CACHE_TEMP_DIR: typing.Optional[tempfile.TemporaryDirectory] = None
 
 if args.cache is not None:
     if args.cache:
         # User-specified cache directory
-        _CACHE_DIR = Path(args.cache)
+        cache_dir = Path(args.cache)
     else:
         # Temporary directory
         # pylint: disable=consider-using-with
         _CACHE_TEMP_DIR = tempfile.TemporaryDirectory(prefix="opentts_")
-        _CACHE_DIR = Path(_CACHE_TEMP_DIR.name)
+        cache_dir = Path(_CACHE_TEMP_DIR.name)
+
+    _WAV_CACHE = WavCache(
+        cache_dir,
+        max_bytes=args.cache_max_size,
+        max_entries=args.cache_max_entries,
+        eviction=args.cache_eviction,
+    )
+
+    _LOGGER.debug("Caching WAV files in %s", cache_dir)
+
+# In-memory tier in front of WAV cache
+_MEMORY_CACHE: typing.Optional[MemoryCache] = None
+
+if args.cache_memory_size:
+    _MEMORY_CACHE = MemoryCache(max_bytes=args.cache_memory_size)
+    _LOGGER.debug("Caching up to %s byte(s) in memory", args.cache_memory_size)
+
+# Cache of individual sentences, shared across requests
+_SENTENCE_CACHE: typing.Optional[MemoryCache] = None
+
+if args.sentence_cache_size:
+    _SENTENCE_CACHE = MemoryCache(
+        max_bytes=args.sentence_cache_size, get_size=lambda audio: audio.nbytes
+    )
+    _LOGGER.debug(
+        "Caching up to %s byte(s) of sentences in memory", args.sentence_cache_size
+    )
+
+
+# Runs of whitespace in SSML text
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# SSML elements whose start and end are word boundaries
+_SSML_BLOCK_TAGS = {"speak", "p", "paragraph", "s", "sentence", "voice"}
+
+# Characters searched for the first clause with low latency
+_MAX_CLAUSE_SEARCH_CHARS = 500
 
-    _LOGGER.debug("Caching WAV files in %s", _CACHE_DIR)
+# Cached files larger than this are sent from disk in chunks
+_MAX_CACHE_READ_SIZE = 1024 * 1024
 
 
 def get_cache_key(text: str, voice: str, settings: str = "") -> str:
@@ -212,96 +428,171 @@ def get_cache_key(text: str, voice: str, settings: str = "") -> str:
     return hashlib.sha256(cache_key_str.encode("utf-8")).hexdigest()
 
 
-# -----------------------------------------------------------------------------
+def get_wav_cache_key(
+    text: str,
+    voice: str,
+    lang: str = "en",
+    vocoder: typing.Optional[str] = None,
+    denoiser_strength: typing.Optional[float] = None,
+    noise_scale: typing.Optional[float] = None,
+    length_scale: typing.Optional[float] = None,
+    ssml: bool = False,
+    ssml_args: typing.Optional[typing.Dict[str, typing.Any]] = None,
+    output_format: str = "wav",
+    low_latency: bool = False,
+) -> str:
+    """Get cache key for synthesized WAV (or encoded audio).
+
+    Requests that produce the same audio get the same key: whitespace and
+    SSML markup are normalized, the voice is resolved, and settings that
+    don't change the audio are left out.
+    """
+    synthesis_settings = {
+        "vocoder": vocoder,
+        "denoiser_strength": denoiser_strength,
+        "noise_scale": noise_scale,
+        "length_scale": length_scale,
+    }
 
-# Load text to speech systems
-_TTS: typing.Dict[str, TTSBase] = {}
+    settings: typing.Dict[str, typing.Any] = {}
+    canonical_voice = get_canonical_voice(voice)
 
-# espeak
-if (not args.no_espeak) and shutil.which("espeak-ng"):
-    _TTS["espeak"] = EspeakTTS()
+    if ssml:
+        canonical_text = get_canonical_ssml(text)
 
-# flite
-if (not args.no_flite) and shutil.which("flite"):
-    flite_voices_dir = _VOICES_DIR / "flite"
-    if args.flite_voices_dir:
-        flite_voices_dir = Path(args.flite_voices_dir)
+        # Document may switch voices, so every setting may be used
+        settings.update(synthesis_settings)
+        settings.update(ssml_args or {})
+        settings["lang"] = lang
+        settings["ssml"] = True
+    else:
+        canonical_text = get_canonical_text(text)
+        settings.update(
+            get_audio_settings(canonical_voice.split(":")[0], synthesis_settings)
+        )
 
-    _TTS["flite"] = FliteTTS(voice_dir=flite_voices_dir)
+        if low_latency:
+            # Clause break is found using the language
+            settings["lang"] = lang
 
-# festival
-if (not args.no_festival) and shutil.which("festival"):
-    _TTS["festival"] = FestivalTTS()
+    if output_format != "wav":
+        settings["format"] = output_format
 
-# nanotts
-if (not args.no_nanotts) and shutil.which("nanotts"):
-    _TTS["nanotts"] = NanoTTS()
+    if low_latency:
+        # First sentence is split, so audio is slightly different
+        settings["low_latency"] = True
 
-# MaryTTS
-if (not args.no_marytts) and shutil.which("java"):
-    _TTS["marytts"] = MaryTTS(base_dir=(_VOICES_DIR / "marytts"))
+    settings_str = ";".join(
+        f"{key}={get_canonical_value(value)}"
+        for key, value in sorted(settings.items())
+        if value is not None
+    )
 
-# Larynx
-if not args.no_larynx:
-    try:
-        import larynx  # noqa: F401
+    return get_cache_key(
+        text=canonical_text, voice=canonical_voice, settings=settings_str
+    )
 
-        larynx_available = True
-    except Exception:
-        larynx_available = False
 
-        if args.debug:
-            _LOGGER.exception("larynx")
+def get_sentence_cache_key(
+    tts_name: str, voice_id: str, text: str, say_args: typing.Dict[str, typing.Any]
+) -> str:
+    """Get cache key for a single synthesized sentence"""
+    # Whitespace doesn't change the audio of a sentence
+    norm_text = " ".join(text.split())
+    settings_str = ";".join(
+        f"{key}={get_canonical_value(value)}"
+        for key, value in sorted(get_audio_settings(tts_name, say_args).items())
+    )
 
-    if larynx_available:
-        _TTS["larynx"] = LarynxTTS(models_dir=(_VOICES_DIR / "larynx"))
+    return get_cache_key(
+        text=norm_text, voice=f"{tts_name}:{voice_id}", settings=settings_str
+    )
 
-# Glow-Speak
-if not args.no_glow_speak:
-    try:
-        import glow_speak  # noqa: F401
 
-        glow_speak_available = True
-    except Exception:
-        glow_speak_available = False
+def get_canonical_text(text: str) -> str:
+    """Normalize whitespace and line endings of plain text.
 
-        if args.debug:
-            _LOGGER.exception("glow-speak")
+    Each line is synthesized separately, so lines are kept (except blank ones).
+    """
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
 
-    if glow_speak_available:
-        _TTS["glow-speak"] = GlowSpeakTTS(models_dir=(_VOICES_DIR / "glow-speak"))
 
-# Coqui-TTS
-if not args.no_coqui:
+def get_canonical_ssml(ssml_text: str) -> str:
+    """Normalize SSML with Canonical XML (attribute order, quotes, empty
+    elements, etc.) after collapsing runs of whitespace"""
     try:
-        import TTS  # noqa: F401
+        root = ElementTree.fromstring(ssml_text)
+    except ElementTree.ParseError:
+        # Not a single XML document, synthesis will deal with it
+        return ssml_text.strip()
 
-        coqui_available = True
-    except Exception:
-        coqui_available = False
+    for element in root.iter():
+        if element.text:
+            element.text = _WHITESPACE_PATTERN.sub(" ", element.text)
 
-        if args.debug:
-            _LOGGER.exception("coqui-tts")
+        if element.tail:
+            element.tail = _WHITESPACE_PATTERN.sub(" ", element.tail)
 
-    if coqui_available:
-        _TTS["coqui-tts"] = CoquiTTS(models_dir=(_VOICES_DIR / "coqui-tts"))
+        if element.tag.rsplit("}", maxsplit=1)[-1] not in _SSML_BLOCK_TAGS:
+            continue
 
-_LOGGER.debug("Loaded TTS systems: %s", ", ".join(_TTS.keys()))
+        # Whitespace at the edges of sentences, paragraphs, etc. doesn't matter
+        if element.text:
+            element.text = element.text.lstrip()
 
-# -----------------------------------------------------------------------------
+        if len(element) > 0:
+            last_child = element[-1]
+            if last_child.tail:
+                last_child.tail = _WHITESPACE_PATTERN.sub(" ", last_child.tail).rstrip()
+        elif element.text:
+            element.text = element.text.rstrip()
 
-app = Quart("opentts")
-app.secret_key = str(uuid4())
+        if element.tail:
+            element.tail = element.tail.lstrip()
 
-if args.debug:
-    app.config["TEMPLATES_AUTO_RELOAD"] = True
+    return ElementTree.canonicalize(ElementTree.tostring(root, encoding="unicode"))
 
-app = quart_cors.cors(app)
 
-# -----------------------------------------------------------------------------
+def get_canonical_voice(voice: str) -> str:
+    """Resolve voice to tts:voice#speaker (unchanged if it can't be resolved)"""
+    try:
+        tts_name, voice_id, speaker_id = split_voice(resolve_voice(voice))
+    except (ValueError, AssertionError):
+        # Synthesis will report the error
+        return voice
 
+    if speaker_id is not None:
+        return f"{tts_name}:{voice_id}#{speaker_id}"
 
-async def text_to_wav(
+    return f"{tts_name}:{voice_id}"
+
+
+def get_canonical_value(value: typing.Any) -> str:
+    """Format setting value so that equal values are formatted the same
+    (e.g., 1 and 1.0)"""
+    if isinstance(value, (int, float)) and (not isinstance(value, bool)):
+        return format(float(value), ".6g")
+
+    return str(value)
+
+
+def get_audio_settings(
+    tts_name: str, settings: typing.Mapping[str, typing.Any]
+) -> typing.Dict[str, typing.Any]:
+    """Remove synthesis settings that a TTS system ignores (and unset ones)"""
+    tts = _TTS.get(tts_name)
+    used_settings = tts.audio_settings if tts is not None else frozenset()
+
+    return {
+        key: value
+        for key, value in settings.items()
+        if (value is not None)
+        and ((key not in SYNTHESIS_SETTINGS) or (key in used_settings))
+    }
+
+
+def get_request_params(
     text: str,
     voice: str,
     lang: str = "en",
@@ -309,293 +600,1529 @@ async def text_to_wav(
     denoiser_strength: typing.Optional[float] = None,
     noise_scale: typing.Optional[float] = None,
     length_scale: typing.Optional[float] = None,
-    use_cache: bool = True,
     ssml: bool = False,
     ssml_args: typing.Optional[typing.Dict[str, typing.Any]] = None,
-) -> bytes:
-    """Runs TTS for each line and accumulates all audio into a single WAV."""
-    assert voice, "No voice provided"
+    low_latency: bool = False,
+    output_format: str = "wav",
+    **_tts_args,
+) -> typing.Dict[str, typing.Any]:
+    """Get /api/tts parameters that reproduce a synthesis (see get_tts_args)"""
+    if ssml_args is None:
+        ssml_args = {}
 
-    # Look up in cache
-    wav_bytes = bytes()
-    cache_path: typing.Optional[Path] = None
-
-    if use_cache and (_CACHE_DIR is not None):
-        # Ensure unique cache id for different denoiser values
-        settings_str = f"denoiser_strength={denoiser_strength};noise_scale={noise_scale};length_scale={length_scale};ssml={ssml}"
-        cache_key = get_cache_key(text=text, voice=voice, settings=settings_str)
-        cache_path = _CACHE_DIR / f"{cache_key}.wav"
-        if cache_path.is_file():
-            try:
-                _LOGGER.debug("Loading from cache: %s", cache_path)
-                wav_bytes = cache_path.read_bytes()
-                return wav_bytes
-            except Exception:
-                # Allow synthesis to proceed if cache fails
-                _LOGGER.exception("cache load")
+    params = {
+        "text": text,
+        "voice": voice,
+        "lang": lang,
+        "vocoder": vocoder,
+        "denoiserStrength": denoiser_strength,
+        "noiseScale": noise_scale,
+        "lengthScale": length_scale,
+        "ssml": ssml,
+        "ssmlNumbers": ssml_args.get("verbalize_numbers", True),
+        "ssmlDates": ssml_args.get("verbalize_dates", True),
+        "ssmlCurrency": ssml_args.get("verbalize_currency", True),
+        "lowLatency": low_latency,
+        "format": output_format,
+    }
 
-    # -------------------------------------------------------------------------
-    # Synthesis
-    # -------------------------------------------------------------------------
+    # Missing settings use server defaults
+    return {key: value for key, value in params.items() if value is not None}
 
-    # Synthesize text and accumulate into a single WAV file.
-    _LOGGER.info("Synthesizing with %s (%s char(s))...", voice, len(text))
-    start_time = time.time()
 
-    if ssml:
-        wavs_gen = ssml_to_wavs(
-            ssml_text=text,
-            default_voice=voice,
-            default_lang=lang,
-            ssml_args=ssml_args,
-            # Larynx settings
-            vocoder=vocoder,
-            denoiser_strength=denoiser_strength,
-            noise_scale=noise_scale,
-            length_scale=length_scale,
-        )
-    else:
-        wavs_gen = text_to_wavs(
-            text=text,
-            voice=voice,
-            # Larynx settings
-            vocoder=vocoder,
-            denoiser_strength=denoiser_strength,
-            noise_scale=noise_scale,
-            length_scale=length_scale,
-        )
+def is_cache_enabled() -> bool:
+    """True if a memory or disk WAV cache is available"""
+    return (_MEMORY_CACHE is not None) or (_WAV_CACHE is not None)
 
-    wavs = [result async for result in wavs_gen]
-    assert wavs, "No audio returned from synthesis"
 
-    # Final output WAV will use the maximum sample rate
-    sample_rates = set(sample_rate for (_wav, sample_rate) in wavs)
-    final_sample_rate = max(sample_rates)
-    final_sample_width = 2  # bytes (16-bit)
-    final_n_channels = 1  # mono
+def is_cached(cache_key: str) -> bool:
+    """True if audio is in memory or disk cache (doesn't count as a hit)"""
+    if (_MEMORY_CACHE is not None) and _MEMORY_CACHE.contains(cache_key):
+        return True
 
-    with io.BytesIO() as final_wav_io:
-        final_wav_file: wave.Wave_write = wave.open(final_wav_io, "wb")
-        with final_wav_file:
-            final_wav_file.setframerate(final_sample_rate)
-            final_wav_file.setsampwidth(final_sample_width)
-            final_wav_file.setnchannels(final_n_channels)
-
-            # Copy audio from each syntheiszed WAV to the final output.
-            # If rate/width/channels do not match, resample with sox.
-            for synth_wav_bytes, _synth_sample_rate in wavs:
-                with io.BytesIO(synth_wav_bytes) as synth_wav_io:
-                    synth_wav_file: wave.Wave_read = wave.open(synth_wav_io, "rb")
-
-                    # Check settings
-                    if (
-                        (synth_wav_file.getframerate() != final_sample_rate)
-                        or (synth_wav_file.getsampwidth() != final_sample_width)
-                        or (synth_wav_file.getnchannels() != final_n_channels)
-                    ):
-                        # Upsample with sox
-                        sox_cmd = [
-                            "sox",
-                            "-t",
-                            "wav",
-                            "-",
-                            "-t",
-                            "raw",
-                            "-r",
-                            str(final_sample_rate),
-                            "-b",
-                            str(final_sample_width * 8),  # bits
-                            "-c",
-                            str(final_n_channels),
-                            "-",
-                        ]
-                        _LOGGER.debug(sox_cmd)
-                        proc = await asyncio.create_subprocess_exec(
-                            *sox_cmd,
-                            stdin=asyncio.subprocess.PIPE,
-                            stdout=asyncio.subprocess.PIPE,
-                        )
-                        resampled_raw_bytes, _ = await proc.communicate(
-                            input=synth_wav_bytes
-                        )
-                        final_wav_file.writeframes(resampled_raw_bytes)
-                    else:
-                        # Settings match, can write frames directly
-                        final_wav_file.writeframes(
-                            synth_wav_file.readframes(synth_wav_file.getnframes())
-                        )
+    return (_WAV_CACHE is not None) and _WAV_CACHE.contains(cache_key)
 
-        final_wav_bytes = final_wav_io.getvalue()
 
-    end_time = time.time()
-    _LOGGER.debug(
-        "Synthesized %s byte(s) in %s second(s)",
-        len(final_wav_bytes),
-        end_time - start_time,
-    )
+def load_from_cache(cache_key: str) -> typing.Optional[bytes]:
+    """Load WAV bytes from memory or disk cache if present"""
+    if _MEMORY_CACHE is not None:
+        wav_bytes = _MEMORY_CACHE.get(cache_key)
+        if wav_bytes is not None:
+            _LOGGER.debug("Loaded from memory cache: %s", cache_key)
+            return wav_bytes
 
-    if final_wav_bytes and (cache_path is not None):
-        try:
-            _LOGGER.debug("Writing to cache: %s", cache_path)
-            cache_path.write_bytes(final_wav_bytes)
-        except Exception:
-            # Continue if a cache write fails
-            _LOGGER.exception("cache save")
+    if _WAV_CACHE is None:
+        return None
 
-    return final_wav_bytes
+    try:
+        wav_bytes = _WAV_CACHE.get(cache_key)
+        if wav_bytes is not None:
+            _LOGGER.debug("Loaded from cache: %s", cache_key)
 
+            if _MEMORY_CACHE is not None:
+                # Promote to memory
+                _MEMORY_CACHE.put(cache_key, wav_bytes)
 
-async def text_to_wavs(
-    text: str, voice: str, **say_args
-) -> typing.AsyncIterable[WAV_AND_SAMPLE_RATE]:
-    voice = resolve_voice(voice)
+        return wav_bytes
+    except Exception:
+        # Allow synthesis to proceed if cache fails
+        _LOGGER.exception("cache load")
 
-    assert ":" in voice, f"Invalid voice: {voice}"
-    tts_name, voice_id = voice.split(":", maxsplit=1)
-    tts = _TTS.get(tts_name.lower())
-    assert tts, f"No TTS named {tts_name}"
+    return None
 
-    if "#" in voice_id:
-        voice_id, speaker_id = voice_id.split("#", maxsplit=1)
-        say_args["speaker_id"] = speaker_id
 
-    # Process by line with single TTS
-    for line_index, line in enumerate(text.strip().splitlines()):
-        line = line.strip()
-        if not line:
-            continue
+def save_to_cache(
+    cache_key: str,
+    wav_bytes: bytes,
+    suffix: str = ".wav",
+    params: typing.Optional[typing.Dict[str, typing.Any]] = None,
+):
+    """Save WAV (or encoded audio) bytes to memory and disk cache.
 
-        _LOGGER.debug("Synthesizing line %s: %s", line_index + 1, line)
-        line_wav_bytes = await tts.say(line, voice_id, **say_args)
+    params are the /api/tts parameters of the request, kept in the disk cache
+    index for --prewarm-top.
+    """
+    if _MEMORY_CACHE is not None:
+        _MEMORY_CACHE.put(cache_key, wav_bytes)
 
-        assert line_wav_bytes, f"No WAV audio from line: {line_index+1}"
-        _LOGGER.debug(
-            "Got %s WAV byte(s) for line %s", len(line_wav_bytes), line_index + 1,
-        )
+    if _WAV_CACHE is None:
+        return
 
-        with io.BytesIO(line_wav_bytes) as line_wav_io:
-            line_wav_file: wave.Wave_read = wave.open(line_wav_io, "rb")
-            with line_wav_file:
-                yield (line_wav_bytes, line_wav_file.getframerate())
+    try:
+        _LOGGER.debug("Writing to cache: %s", cache_key)
+        _WAV_CACHE.put(cache_key, wav_bytes, suffix=suffix, params=params)
+    except Exception:
+        # Continue if a cache write fails
+        _LOGGER.exception("cache save")
 
 
-async def ssml_to_wavs(
-    ssml_text: str,
-    default_lang: str,
-    default_voice: str,
-    ssml_args: typing.Optional[typing.Dict[str, typing.Any]] = None,
-    **say_args,
-) -> typing.AsyncIterable[WAV_AND_SAMPLE_RATE]:
-    if ssml_args is None:
-        ssml_args = {}
+# Coalesce identical requests/sentences that are synthesized concurrently
+_WAV_FLIGHTS = SingleFlight()
+_SENTENCE_FLIGHTS = SingleFlight()
 
-    for sent_index, sentence in enumerate(
-        gruut.sentences(
-            ssml_text,
-            lang=default_lang,
-            ssml=True,
-            explicit_lang=False,
-            phonemes=False,
-            pos=False,
-            **ssml_args,
-        )
-    ):
-        sent_text = sentence.text_with_ws
-        if not sent_text.strip():
-            # Skip empty sentences
-            continue
+# Set up job audio directory
+_JOBS_TEMP_DIR: typing.Optional[tempfile.TemporaryDirectory] = None
 
-        sent_voice = default_voice
-        if sentence.voice:
-            sent_voice = sentence.voice
-        elif sentence.lang and (sentence.lang != default_lang):
-            sent_voice = sentence.lang
+if args.jobs_dir:
+    jobs_dir = Path(args.jobs_dir)
+else:
+    # pylint: disable=consider-using-with
+    _JOBS_TEMP_DIR = tempfile.TemporaryDirectory(prefix="opentts_jobs_")
+    jobs_dir = Path(_JOBS_TEMP_DIR.name)
 
-        sent_voice = resolve_voice(sent_voice)
+_JOBS = JobManager(jobs_dir, ttl=args.job_ttl, max_running=args.max_running_jobs)
 
-        assert ":" in sent_voice, f"Invalid voice format: {sent_voice}"
-        tts_name, voice_id = sent_voice.split(":")
-        tts = _TTS.get(tts_name.lower())
-        assert tts, f"No TTS named {tts_name}"
+# -----------------------------------------------------------------------------
 
-        if "#" in voice_id:
-            voice_id, speaker_id = voice_id.split("#", maxsplit=1)
-            say_args["speaker_id"] = speaker_id
-        else:
-            # Need to remove speaker id for single speaker voices
-            say_args.pop("speaker_id", None)
 
-        _LOGGER.debug(
-            "Synthesizing sentence %s with voice %s: %s",
-            sent_index + 1,
-            sent_voice,
-            sent_text.strip(),
-        )
+def has_python_tts(module_name: str, tts_name: str) -> bool:
+    """True if the Python package for a neural TTS system can be imported"""
+    try:
+        importlib.import_module(module_name)
+        return True
+    except Exception:
+        if args.debug:
+            _LOGGER.exception(tts_name)
 
-        sent_wav_bytes = await tts.say(sent_text, voice_id, **say_args)
-        assert sent_wav_bytes, f"No WAV audio from sentence: {sent_text}"
-        _LOGGER.debug(
-            "Got %s WAV byte(s) for line %s", len(sent_wav_bytes), sent_index + 1,
-        )
+    return False
 
-        # Add WAV bytes and sample rate to list.
-        # We will resample everything and append audio at the end.
-        with io.BytesIO(sent_wav_bytes) as sent_wav_io:
-            sent_wav_file: wave.Wave_read = wave.open(sent_wav_io, "rb")
-            with sent_wav_file:
-                sample_rate = sent_wav_file.getframerate()
-                sample_width = sent_wav_file.getsampwidth()
-                n_channels = sent_wav_file.getnchannels()
-
-                # Add pauses from SSML <break> tags
-                pause_before_ms = sentence.pause_before_ms
-                if sentence.words:
-                    # Add pause from first word
-                    pause_before_ms += sentence.words[0].pause_before_ms
-
-                if pause_before_ms > 0:
-                    pause_before_sec = pause_before_ms / 1000
-                    yield (
-                        make_silence_wav(
-                            pause_before_sec, sample_rate, sample_width, n_channels,
-                        ),
-                        sample_rate,
-                    )
 
-                yield (sent_wav_bytes, sample_rate)
+# Neural TTS systems that synthesize in Python
+larynx_available = (not args.no_larynx) and has_python_tts("larynx", "larynx")
+glow_speak_available = (not args.no_glow_speak) and has_python_tts(
+    "glow_speak", "glow-speak"
+)
+coqui_available = (not args.no_coqui) and has_python_tts("TTS", "coqui-tts")
+
+
+def get_inference_threads(
+    num_engines: int,
+) -> typing.Tuple[typing.Optional[int], typing.Optional[int]]:
+    """Get (concurrent syntheses, threads per synthesis) for each neural TTS system"""
+    # Cores are split between worker processes, and then between the neural
+    # TTS systems in each process so their thread pools fit the budget together.
+    num_cores = args.cpu_budget or os.cpu_count() or 1
+    if args.workers > 0:
+        num_cores = max(1, num_cores // args.workers)
+
+    num_cores = max(1, num_cores // max(1, num_engines))
+
+    if args.inference_threads is not None:
+        inference_threads = max(1, min(args.inference_threads, num_cores))
+    elif args.inference_mode == "latency":
+        # Few syntheses, many threads each
+        inference_threads = num_cores
+    elif args.inference_mode == "throughput":
+        # Many syntheses, one thread each
+        inference_threads = 1
+    else:
+        # Library defaults
+        return (None, None)
 
-                pause_after_ms = sentence.pause_after_ms
-                if sentence.words:
-                    # Add pause from last word
-                    pause_after_ms += sentence.words[-1].pause_after_ms
+    return (max(1, num_cores // inference_threads), inference_threads)
 
-                if pause_after_ms > 0:
-                    pause_after_sec = pause_after_ms / 1000
-                    yield (
-                        make_silence_wav(
-                            pause_after_sec, sample_rate, sample_width, n_channels,
-                        ),
-                        sample_rate,
-                    )
 
+_MAX_WORKERS, _INFERENCE_THREADS = get_inference_threads(
+    sum((larynx_available, glow_speak_available, coqui_available))
+)
+_LOGGER.debug(
+    "Inference threads: %s synthesis(es) x %s thread(s)",
+    _MAX_WORKERS,
+    _INFERENCE_THREADS,
+)
 
-def make_silence_wav(
-    seconds: float, sample_rate: int, sample_width: int, num_channels: int
-) -> bytes:
-    """Create a WAV file with silence"""
-    with io.BytesIO() as wav_io:
-        wav_file: wave.Wave_write = wave.open(wav_io, "wb")
-        with wav_file:
-            wav_file.setframerate(sample_rate)
-            wav_file.setsampwidth(sample_width)
-            wav_file.setnchannels(num_channels)
-
-            num_zeros = int(
-                math.ceil(seconds * sample_rate * sample_width * num_channels)
-            )
-            wav_file.writeframes(bytes(num_zeros))
+# Load text to speech systems
+_TTS: typing.Dict[str, TTSBase] = {}
 
-        return wav_io.getvalue()
+# Models loaded by Larynx, Glow-Speak, and Coqui-TTS share a memory budget
+_MODEL_CACHE = ModelCache(max_bytes=args.model_cache_size)
+
+# espeak
+if (not args.no_espeak) and shutil.which("espeak-ng"):
+    _TTS["espeak"] = EspeakTTS()
+
+# flite
+if (not args.no_flite) and shutil.which("flite"):
+    flite_voices_dir = _VOICES_DIR / "flite"
+    if args.flite_voices_dir:
+        flite_voices_dir = Path(args.flite_voices_dir)
+
+    _TTS["flite"] = FliteTTS(voice_dir=flite_voices_dir)
+
+# festival
+if (not args.no_festival) and shutil.which("festival"):
+    _TTS["festival"] = FestivalTTS()
+
+# nanotts
+if (not args.no_nanotts) and shutil.which("nanotts"):
+    _TTS["nanotts"] = NanoTTS()
+
+# MaryTTS
+if (not args.no_marytts) and shutil.which("java"):
+    _TTS["marytts"] = MaryTTS(base_dir=(_VOICES_DIR / "marytts"))
+
+# Larynx
+if larynx_available:
+    _TTS["larynx"] = LarynxTTS(
+        models_dir=(_VOICES_DIR / "larynx"),
+        model_cache=_MODEL_CACHE,
+        max_workers=_MAX_WORKERS,
+        inference_threads=_INFERENCE_THREADS,
+    )
+
+# Glow-Speak
+if glow_speak_available:
+    _TTS["glow-speak"] = GlowSpeakTTS(
+        models_dir=(_VOICES_DIR / "glow-speak"),
+        model_cache=_MODEL_CACHE,
+        max_workers=_MAX_WORKERS,
+        inference_threads=_INFERENCE_THREADS,
+    )
+
+# Coqui-TTS
+if coqui_available:
+    _TTS["coqui-tts"] = CoquiTTS(
+        models_dir=(_VOICES_DIR / "coqui-tts"),
+        model_cache=_MODEL_CACHE,
+        max_workers=_MAX_WORKERS,
+        inference_threads=_INFERENCE_THREADS,
+    )
+
+# Run TTS systems that synthesize in Python in separate processes
+_WORKERS: typing.Optional[WorkerPool] = None
+
+if args.workers > 0:
+    worker_tts = {tts_name: tts for tts_name, tts in _TTS.items() if tts.in_process}
+
+    if worker_tts:
+        _WORKERS = WorkerPool(
+            args.workers,
+            engines={
+                tts_name: {
+                    "class": tts.__class__.__name__,
+                    "kwargs": {
+                        "models_dir": str(getattr(tts, "models_dir")),
+                        "max_workers": _MAX_WORKERS,
+                        "inference_threads": _INFERENCE_THREADS,
+                    },
+                }
+                for tts_name, tts in worker_tts.items()
+            },
+            model_cache_size=args.model_cache_size,
+            debug=args.debug,
+        )
+
+        for tts_name, tts in worker_tts.items():
+            _TTS[tts_name] = WorkerTTS(tts_name, tts, _WORKERS)
+
+        _LOGGER.debug(
+            "Using %s worker(s) for %s", args.workers, ", ".join(worker_tts.keys())
+        )
+
+_LOGGER.debug("Loaded TTS systems: %s", ", ".join(_TTS.keys()))
+
+# Limit concurrent syntheses per TTS system
+_ENGINE_CONCURRENCY: typing.Dict[str, typing.Optional[int]] = {
+    tts_name: tts.max_concurrency for tts_name, tts in _TTS.items()
+}
+
+if args.engine_concurrency:
+    for engine_name, engine_max in args.engine_concurrency:
+        engine_max_value = int(engine_max)
+        tts_max = _ENGINE_CONCURRENCY.get(engine_name)
+        if (tts_max is not None) and (engine_max_value > tts_max):
+            _LOGGER.warning(
+                "%s supports at most %s concurrent syntheses", engine_name, tts_max
+            )
+            engine_max_value = tts_max
+
+        _ENGINE_CONCURRENCY[engine_name] = engine_max_value
+
+_TTS_LIMITERS: typing.Dict[str, EngineLimiter] = {
+    tts_name: EngineLimiter(
+        tts_name,
+        max_concurrency=tts_max,
+        max_queue=args.engine_max_queue,
+        max_wait=args.engine_max_wait,
+    )
+    for tts_name, tts_max in _ENGINE_CONCURRENCY.items()
+}
+
+_LOGGER.debug("Engine concurrency: %s", _ENGINE_CONCURRENCY)
+
+# Voices are listed once, instead of on every request
+_VOICE_CATALOG = VoiceCatalog(_TTS)
+_LOOP.run_until_complete(_VOICE_CATALOG.refresh())
+
+# Aliases and loaded TTS systems are compiled once, instead of on every request.
+# Call _VOICE_RESOLVER.compile() if either changes.
+_VOICE_RESOLVER = VoiceResolver(_VOICE_ALIASES, _TTS)
+
+# -----------------------------------------------------------------------------
+
+app = Quart("opentts")
+app.secret_key = str(uuid4())
+
+
+@app.before_request
+async def start_request_timer():
+    """Record when request started."""
+    g.request_start_time = time.perf_counter()
+
+
+@app.after_request
+async def record_request(response: Response) -> Response:
+    """Record request count and duration."""
+    endpoint = request.url_rule.rule if request.url_rule is not None else "other"
+    metrics.HTTP_REQUESTS.inc(endpoint, str(response.status_code))
+
+    start_time = getattr(g, "request_start_time", None)
+    if start_time is not None:
+        metrics.HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start_time, endpoint
+        )
+
+    return response
+
+
+_BACKGROUND_TASKS: typing.List["asyncio.Future"] = []
+
+
+@app.before_serving
+async def start_background_tasks():
+    """Start periodic tasks."""
+    # Load models in the background so /api/ready can report progress
+    _BACKGROUND_TASKS.append(asyncio.ensure_future(warm_up()))
+
+    # Remove expired jobs
+    _BACKGROUND_TASKS.append(asyncio.ensure_future(_JOBS.expire_forever()))
+
+    if _CACHE_WARMER is not None:
+        # Fill cache with common requests
+        _BACKGROUND_TASKS.append(asyncio.ensure_future(prewarm_cache()))
+
+    if args.voices_refresh_interval:
+        # Reload available voices
+        _BACKGROUND_TASKS.append(
+            asyncio.ensure_future(
+                _VOICE_CATALOG.refresh_forever(args.voices_refresh_interval)
+            )
+        )
+
+
+# Voice -> "ok" or error from warm-up
+_PRELOAD_RESULTS: typing.Dict[str, str] = {}
+
+# Set once preloaded voices are warmed up
+_READY = asyncio.Event()
+
+
+def get_preload_voices() -> typing.List[typing.Tuple[str, typing.Optional[str]]]:
+    """Get (voice, vocoder) pairs from --preload"""
+    preload_voices: typing.List[typing.Tuple[str, typing.Optional[str]]] = []
+
+    for preload_voice in args.preload or []:
+        if preload_voice == "aliases":
+            # Voice that each language alias currently resolves to
+            for alias_key in list(_VOICE_ALIASES.keys()):
+                try:
+                    preload_voices.append((resolve_voice(alias_key), None))
+                except ValueError:
+                    _LOGGER.debug("No voice for alias: %s", alias_key)
+
+            continue
+
+        # <VOICE>;<VOCODER>
+        vocoder: typing.Optional[str] = None
+        if ";" in preload_voice:
+            preload_voice, vocoder = preload_voice.split(";", maxsplit=1)
+
+        preload_voices.append((preload_voice, vocoder))
+
+    # Remove duplicates, keeping order
+    return list(dict.fromkeys(preload_voices))
+
+
+async def warm_up():
+    """Load models and synthesize a short utterance with each preloaded voice"""
+    for voice, vocoder in get_preload_voices():
+        preload_key = voice if vocoder is None else f"{voice};{vocoder}"
+        _LOGGER.debug("Warming up %s", preload_key)
+
+        try:
+            tts_name, voice_id, speaker_id = split_voice(resolve_voice(voice))
+
+            say_args: typing.Dict[str, typing.Any] = {
+                "vocoder": vocoder or args.larynx_quality,
+                "denoiser_strength": args.larynx_denoiser_strength,
+                "noise_scale": args.larynx_noise_scale,
+                "length_scale": args.larynx_length_scale,
+            }
+
+            if speaker_id is not None:
+                say_args["speaker_id"] = speaker_id
+
+            # Loads models and initializes denoiser on first use
+            await synthesize(
+                tts_name, args.warmup_text, voice_id, use_cache=False, **say_args
+            )
+            _PRELOAD_RESULTS[preload_key] = "ok"
+        except Exception as e:
+            # Server is still usable without this voice being warm
+            _LOGGER.exception("warm up %s", preload_key)
+            _PRELOAD_RESULTS[preload_key] = f"{e.__class__.__name__}: {e}"
+
+    _READY.set()
+    _LOGGER.info("Ready (warmed up %s voice(s))", len(_PRELOAD_RESULTS))
+
+
+def get_prewarm_requests() -> typing.List[typing.Dict[str, typing.Any]]:
+    """Get requests from --prewarm-file and --prewarm-top"""
+    prewarm_requests: typing.List[typing.Dict[str, typing.Any]] = []
+
+    for prewarm_path in args.prewarm_file or []:
+        prewarm_requests.extend(load_requests(prewarm_path))
+
+    if args.prewarm_top:
+        if _WAV_CACHE is not None:
+            prewarm_requests.extend(_WAV_CACHE.most_used(args.prewarm_top))
+        else:
+            _LOGGER.warning("--prewarm-top requires --cache")
+
+    return prewarm_requests
+
+
+async def prewarm_request(params: typing.Dict[str, typing.Any]) -> bool:
+    """Synthesize a request into the cache at low priority (False if cached)"""
+    tts_args = get_tts_args(params, str(params.get("text", "")), default_cache=True)
+    output_format = get_output_format(str(params.get("format", "wav")))
+
+    cache_key = get_audio_cache_key(output_format, tts_args)
+    assert cache_key is not None, "Cache is disabled"
+
+    if is_cached(cache_key):
+        return False
+
+    # Live requests get TTS systems first
+    await text_to_audio(
+        output_format, check_cache=False, priority=PRIORITY_LOW, **tts_args
+    )
+
+    return True
+
+
+async def prewarm_cache():
+    """Synthesize requests into the cache once voices are warmed up"""
+    assert _CACHE_WARMER is not None
+    await _READY.wait()
+
+    try:
+        prewarm_requests = get_prewarm_requests()
+    except Exception:
+        _LOGGER.exception("prewarm")
+        return
+
+    await _CACHE_WARMER.run(prewarm_requests)
+
+
+# Fills cache in the background with --prewarm-file/--prewarm-top
+_CACHE_WARMER: typing.Optional[CacheWarmer] = None
+
+if args.prewarm_file or args.prewarm_top:
+    if is_cache_enabled():
+        _CACHE_WARMER = CacheWarmer(prewarm_request, delay=args.prewarm_delay)
+    else:
+        _LOGGER.warning("Pre-warming requires --cache or --cache-memory-size")
+
+
+@app.before_serving
+async def pin_models():
+    """Keep models of hot voices loaded."""
+    for pin_voice in args.pin_voice or []:
+        try:
+            tts_name, voice_id, _speaker_id = split_voice(resolve_voice(pin_voice))
+        except Exception:
+            _LOGGER.exception("pin %s", pin_voice)
+            continue
+
+        _MODEL_CACHE.pin(f"{tts_name}:{voice_id}")
+        _LOGGER.debug("Pinned %s:%s", tts_name, voice_id)
+
+
+@app.before_serving
+async def start_workers():
+    """Start worker processes."""
+    if _WORKERS is not None:
+        # Workers need to know which models are pinned
+        await _WORKERS.start(pinned=_MODEL_CACHE.stats()["pinned"])
+
+
+@app.after_serving
+async def stop_background_tasks():
+    """Stop periodic tasks."""
+    for task in _BACKGROUND_TASKS:
+        task.cancel()
+
+    _JOBS.cancel_all()
+
+    if _WORKERS is not None:
+        await _WORKERS.stop()
+
+
+if args.debug:
+    app.config["TEMPLATES_AUTO_RELOAD"] = True
+
+app = quart_cors.cors(app)
+
+# -----------------------------------------------------------------------------
+
+
+def get_audio_cache_key(
+    output_format: OutputFormat, tts_args: typing.Mapping[str, typing.Any]
+) -> typing.Optional[str]:
+    """Get cache key for audio from text_to_audio (None if not cached)"""
+    if not (tts_args.get("use_cache", True) and is_cache_enabled()):
+        return None
+
+    return get_wav_cache_key(
+        text=tts_args["text"],
+        voice=tts_args["voice"],
+        lang=tts_args.get("lang", "en"),
+        vocoder=tts_args.get("vocoder"),
+        denoiser_strength=tts_args.get("denoiser_strength"),
+        noise_scale=tts_args.get("noise_scale"),
+        length_scale=tts_args.get("length_scale"),
+        ssml=tts_args.get("ssml", False),
+        ssml_args=tts_args.get("ssml_args"),
+        output_format=output_format.name,
+        low_latency=tts_args.get("low_latency", False),
+    )
+
+
+def load_cached_audio(cache_key: str) -> typing.Union[bytes, Path, None]:
+    """Load audio bytes from memory or disk cache, or get the path of a large
+    cached file so it can be sent without reading it into memory"""
+    if _MEMORY_CACHE is not None:
+        audio_bytes = _MEMORY_CACHE.get(cache_key)
+        if audio_bytes is not None:
+            _LOGGER.debug("Loaded from memory cache: %s", cache_key)
+            return audio_bytes
+
+    if _WAV_CACHE is None:
+        return None
+
+    try:
+        cache_path = _WAV_CACHE.lookup(cache_key)
+        if cache_path is None:
+            return None
+
+        if cache_path.stat().st_size > _MAX_CACHE_READ_SIZE:
+            _LOGGER.debug("Sending from cache: %s", cache_key)
+            return cache_path
+
+        audio_bytes = cache_path.read_bytes()
+        _LOGGER.debug("Loaded from cache: %s", cache_key)
+
+        if _MEMORY_CACHE is not None:
+            # Promote to memory
+            _MEMORY_CACHE.put(cache_key, audio_bytes)
+
+        return audio_bytes
+    except FileNotFoundError:
+        # File was removed externally
+        _LOGGER.warning("Missing cache file: %s", cache_key)
+        _WAV_CACHE.remove(cache_key)
+    except Exception:
+        # Allow synthesis to proceed if cache fails
+        _LOGGER.exception("cache load")
+
+    return None
+
+
+async def text_to_wav(
+    text: str,
+    voice: str,
+    lang: str = "en",
+    vocoder: typing.Optional[str] = None,
+    denoiser_strength: typing.Optional[float] = None,
+    noise_scale: typing.Optional[float] = None,
+    length_scale: typing.Optional[float] = None,
+    use_cache: bool = True,
+    ssml: bool = False,
+    ssml_args: typing.Optional[typing.Dict[str, typing.Any]] = None,
+    cache_result: bool = True,
+    check_cache: bool = True,
+    low_latency: bool = False,
+    priority: int = PRIORITY_NORMAL,
+) -> bytes:
+    """Runs TTS for each line and accumulates all audio into a single WAV.
+
+    If cache_result is False, a cached WAV is still used but a new one is
+    not saved. If check_cache is False, the caller already missed the cache.
+    """
+    assert voice, "No voice provided"
+
+    # Look up in cache
+    cache_key: typing.Optional[str] = None
+
+    if use_cache and is_cache_enabled():
+        cache_key = get_wav_cache_key(
+            text=text,
+            voice=voice,
+            lang=lang,
+            vocoder=vocoder,
+            denoiser_strength=denoiser_strength,
+            noise_scale=noise_scale,
+            length_scale=length_scale,
+            ssml=ssml,
+            ssml_args=ssml_args,
+            low_latency=low_latency,
+        )
+
+        wav_bytes = load_from_cache(cache_key) if check_cache else None
+        if wav_bytes:
+            return wav_bytes
+
+    # Identical concurrent requests share a single synthesis
+    flight_key = get_flight_key(
+        text,
+        voice,
+        ssml_args,
+        lang=lang,
+        vocoder=vocoder,
+        denoiser_strength=denoiser_strength,
+        noise_scale=noise_scale,
+        length_scale=length_scale,
+        use_cache=use_cache,
+        ssml=ssml,
+        cache_result=cache_result,
+        low_latency=low_latency,
+        # Requests don't wait on lower priority work
+        priority=priority,
+    )
+
+    return await _WAV_FLIGHTS.run(
+        flight_key,
+        functools.partial(
+            synthesize_wav,
+            text=text,
+            voice=voice,
+            lang=lang,
+            vocoder=vocoder,
+            denoiser_strength=denoiser_strength,
+            noise_scale=noise_scale,
+            length_scale=length_scale,
+            use_cache=use_cache,
+            ssml=ssml,
+            ssml_args=ssml_args,
+            cache_key=cache_key if cache_result else None,
+            low_latency=low_latency,
+            priority=priority,
+        ),
+    )
+
+
+async def text_to_audio_chunk(
+    text: str,
+    voice: str,
+    lang: str = "en",
+    vocoder: typing.Optional[str] = None,
+    denoiser_strength: typing.Optional[float] = None,
+    noise_scale: typing.Optional[float] = None,
+    length_scale: typing.Optional[float] = None,
+    use_cache: bool = True,
+    ssml: bool = False,
+    ssml_args: typing.Optional[typing.Dict[str, typing.Any]] = None,
+    low_latency: bool = False,
+    priority: int = PRIORITY_NORMAL,
+) -> AudioChunk:
+    """Runs TTS and returns the audio without building a WAV file.
+
+    A cached WAV is still used, but a new one is not saved.
+    """
+    assert voice, "No voice provided"
+
+    if use_cache and is_cache_enabled():
+        cache_key = get_wav_cache_key(
+            text=text,
+            voice=voice,
+            lang=lang,
+            vocoder=vocoder,
+            denoiser_strength=denoiser_strength,
+            noise_scale=noise_scale,
+            length_scale=length_scale,
+            ssml=ssml,
+            ssml_args=ssml_args,
+            low_latency=low_latency,
+        )
+
+        wav_bytes = load_from_cache(cache_key)
+        if wav_bytes:
+            return AudioChunk.from_wav(wav_bytes)
+
+    # Identical concurrent requests share a single synthesis
+    flight_key = get_flight_key(
+        text,
+        voice,
+        ssml_args,
+        lang=lang,
+        vocoder=vocoder,
+        denoiser_strength=denoiser_strength,
+        noise_scale=noise_scale,
+        length_scale=length_scale,
+        use_cache=use_cache,
+        ssml=ssml,
+        low_latency=low_latency,
+        priority=priority,
+        result="audio",
+    )
+
+    return await _WAV_FLIGHTS.run(
+        flight_key,
+        functools.partial(
+            synthesize_audio,
+            text=text,
+            voice=voice,
+            lang=lang,
+            vocoder=vocoder,
+            denoiser_strength=denoiser_strength,
+            noise_scale=noise_scale,
+            length_scale=length_scale,
+            use_cache=use_cache,
+            ssml=ssml,
+            ssml_args=ssml_args,
+            low_latency=low_latency,
+            priority=priority,
+        ),
+    )
+
+
+def get_flight_key(
+    text: str,
+    voice: str,
+    ssml_args: typing.Optional[typing.Dict[str, typing.Any]],
+    **settings,
+) -> str:
+    """Get key shared by identical concurrent syntheses"""
+    flight_settings = ";".join(
+        [f"{name}={value}" for name, value in settings.items()]
+        + [f"ssml_args={sorted(ssml_args.items()) if ssml_args else None}"]
+    )
+
+    return get_cache_key(text=text, voice=voice, settings=flight_settings)
+
+
+async def text_to_audio(
+    output_format: OutputFormat,
+    use_cache: bool = True,
+    check_cache: bool = True,
+    **tts_args,
+) -> bytes:
+    """Runs TTS and returns audio in the requested format.
+
+    Encoded audio is cached instead of the WAV it was encoded from. If
+    check_cache is False, the caller already missed the cache.
+    """
+    if output_format.sf_format is None:
+        return await text_to_wav(
+            use_cache=use_cache, check_cache=check_cache, **tts_args
+        )
+
+    cache_key = get_audio_cache_key(output_format, {"use_cache": use_cache, **tts_args})
+
+    if (cache_key is not None) and check_cache:
+        audio_bytes = load_from_cache(cache_key)
+        if audio_bytes:
+            return audio_bytes
+
+    # Encoded straight from PCM without building a WAV
+    audio = await text_to_audio_chunk(use_cache=use_cache, **tts_args)
+
+    # Encoding is CPU-bound
+    loop = asyncio.get_running_loop()
+    audio_bytes = await loop.run_in_executor(None, encode_audio, audio, output_format)
+
+    if cache_key is not None:
+        save_to_cache(
+            cache_key,
+            audio_bytes,
+            suffix=output_format.extension,
+            params=get_request_params(output_format=output_format.name, **tts_args),
+        )
+
+    return audio_bytes
+
+
+async def synthesize_audio(
+    text: str,
+    voice: str,
+    lang: str = "en",
+    vocoder: typing.Optional[str] = None,
+    denoiser_strength: typing.Optional[float] = None,
+    noise_scale: typing.Optional[float] = None,
+    length_scale: typing.Optional[float] = None,
+    use_cache: bool = True,
+    ssml: bool = False,
+    ssml_args: typing.Optional[typing.Dict[str, typing.Any]] = None,
+    low_latency: bool = False,
+    priority: int = PRIORITY_NORMAL,
+) -> AudioChunk:
+    """Synthesizes text and joins all audio into a single 16-bit mono chunk."""
+    _LOGGER.info("Synthesizing with %s (%s char(s))...", voice, len(text))
+    start_time = time.time()
+
+    audio_gen = get_audio_gen(
+        text=text,
+        voice=voice,
+        lang=lang,
+        ssml=ssml,
+        ssml_args=ssml_args,
+        use_cache=use_cache,
+        low_latency=low_latency,
+        priority=priority,
+        # Larynx settings
+        vocoder=vocoder,
+        denoiser_strength=denoiser_strength,
+        noise_scale=noise_scale,
+        length_scale=length_scale,
+    )
+
+    audios = [audio async for audio in audio_gen]
+    assert audios, "No audio returned from synthesis"
+
+    # Final output will use the maximum sample rate (16-bit mono)
+    final_sample_rate = max(audio.sample_rate for audio in audios)
+    final_n_channels = 1
+
+    final_audio = AudioChunk.join(
+        [
+            await convert_audio(audio, final_sample_rate, final_n_channels)
+            for audio in audios
+        ]
+    )
+
+    end_time = time.time()
+    _LOGGER.debug(
+        "Synthesized %s byte(s) in %s second(s)",
+        final_audio.samples.nbytes,
+        end_time - start_time,
+    )
+
+    return final_audio
+
+
+async def synthesize_wav(
+    text: str,
+    voice: str,
+    lang: str = "en",
+    vocoder: typing.Optional[str] = None,
+    denoiser_strength: typing.Optional[float] = None,
+    noise_scale: typing.Optional[float] = None,
+    length_scale: typing.Optional[float] = None,
+    use_cache: bool = True,
+    ssml: bool = False,
+    ssml_args: typing.Optional[typing.Dict[str, typing.Any]] = None,
+    cache_key: typing.Optional[str] = None,
+    low_latency: bool = False,
+    priority: int = PRIORITY_NORMAL,
+) -> bytes:
+    """Synthesizes text and saves the final WAV to the cache if a key is given."""
+    final_audio = await synthesize_audio(
+        text=text,
+        voice=voice,
+        lang=lang,
+        vocoder=vocoder,
+        denoiser_strength=denoiser_strength,
+        noise_scale=noise_scale,
+        length_scale=length_scale,
+        use_cache=use_cache,
+        ssml=ssml,
+        ssml_args=ssml_args,
+        low_latency=low_latency,
+        priority=priority,
+    )
+
+    # Only encoded as WAV once
+    final_wav_bytes = final_audio.to_wav()
+
+    if final_wav_bytes and (cache_key is not None):
+        save_to_cache(
+            cache_key,
+            final_wav_bytes,
+            params=get_request_params(
+                text=text,
+                voice=voice,
+                lang=lang,
+                vocoder=vocoder,
+                denoiser_strength=denoiser_strength,
+                noise_scale=noise_scale,
+                length_scale=length_scale,
+                ssml=ssml,
+                ssml_args=ssml_args,
+                low_latency=low_latency,
+            ),
+        )
+
+    return final_wav_bytes
+
+
+async def text_to_wav_stream(
+    text: str,
+    voice: str,
+    lang: str = "en",
+    vocoder: typing.Optional[str] = None,
+    denoiser_strength: typing.Optional[float] = None,
+    noise_scale: typing.Optional[float] = None,
+    length_scale: typing.Optional[float] = None,
+    use_cache: bool = True,
+    ssml: bool = False,
+    ssml_args: typing.Optional[typing.Dict[str, typing.Any]] = None,
+    on_sentence: typing.Optional[typing.Callable[[], None]] = None,
+    cache_result: bool = True,
+    output_format: OutputFormat = OUTPUT_FORMATS["wav"],
+    low_latency: bool = False,
+) -> typing.AsyncIterable[bytes]:
+    """Runs TTS for each line and yields a streaming WAV as audio is produced.
+
+    A WAV header with an unknown length is yielded first, followed by the
+    audio frames of each line/sentence as soon as it has been synthesized.
+    The sample rate of the first chunk is used for the whole stream.
+
+    For other output formats, audio is encoded as each line/sentence is
+    synthesized instead.
+
+    If cache_result is False, a cached WAV is still used but a new one is
+    not saved (audio frames are not kept in memory).
+
+    With low_latency, the first clause of the first sentence is synthesized
+    on its own (ahead of other work) so audio can start sooner.
+    """
+    assert voice, "No voice provided"
+
+    # Look up in cache
+    cache_key: typing.Optional[str] = None
+    cache_params: typing.Optional[typing.Dict[str, typing.Any]] = None
+
+    if use_cache and is_cache_enabled():
+        cache_key = get_wav_cache_key(
+            text=text,
+            voice=voice,
+            lang=lang,
+            vocoder=vocoder,
+            denoiser_strength=denoiser_strength,
+            noise_scale=noise_scale,
+            length_scale=length_scale,
+            ssml=ssml,
+            ssml_args=ssml_args,
+            output_format=output_format.name,
+            low_latency=low_latency,
+        )
+
+        wav_bytes = load_from_cache(cache_key)
+        if wav_bytes:
+            yield wav_bytes
+            return
+
+        # Stored with cached audio so it can be synthesized again
+        cache_params = get_request_params(
+            text=text,
+            voice=voice,
+            lang=lang,
+            vocoder=vocoder,
+            denoiser_strength=denoiser_strength,
+            noise_scale=noise_scale,
+            length_scale=length_scale,
+            ssml=ssml,
+            ssml_args=ssml_args,
+            low_latency=low_latency,
+            output_format=output_format.name,
+        )
+
+    # -------------------------------------------------------------------------
+    # Synthesis
+    # -------------------------------------------------------------------------
+
+    _LOGGER.info("Streaming with %s (%s char(s))...", voice, len(text))
+    start_time = time.time()
+
+    audio_gen = get_audio_gen(
+        text=text,
+        voice=voice,
+        lang=lang,
+        ssml=ssml,
+        ssml_args=ssml_args,
+        use_cache=use_cache,
+        on_sentence=on_sentence,
+        low_latency=low_latency,
+        # Larynx settings
+        vocoder=vocoder,
+        denoiser_strength=denoiser_strength,
+        noise_scale=noise_scale,
+        length_scale=length_scale,
+    )
+
+    final_sample_rate: typing.Optional[int] = None
+    final_sample_width = 2  # bytes (16-bit)
+    final_n_channels = 1  # mono
+
+    # Audio is kept only if the complete WAV will be cached
+    all_audio: typing.Optional[typing.List[AudioChunk]] = (
+        []
+        if (cache_key is not None)
+        and cache_result
+        and (output_format.sf_format is None)
+        else None
+    )
+
+    loop = asyncio.get_running_loop()
+    encoder: typing.Optional[AudioEncoder] = None
+
+    async for synth_audio in audio_gen:
+        if final_sample_rate is None:
+            # Rate of first chunk is used for the rest of the stream
+            final_sample_rate = synth_audio.sample_rate
+
+            if output_format.sf_format is None:
+                yield make_streaming_wav_header(
+                    final_sample_rate, final_sample_width, final_n_channels
+                )
+            else:
+                encoder = AudioEncoder(
+                    output_format, final_sample_rate, final_n_channels
+                )
+
+        audio = await convert_audio(synth_audio, final_sample_rate, final_n_channels)
+        frames = audio.to_frames()
+
+        if encoder is not None:
+            # Encoding is CPU-bound
+            encoded_bytes = await loop.run_in_executor(None, encoder.encode, frames)
+            if encoded_bytes:
+                yield encoded_bytes
+
+            continue
+
+        if all_audio is not None:
+            all_audio.append(audio)
+
+        yield frames
+
+    assert final_sample_rate is not None, "No audio returned from synthesis"
+
+    if encoder is not None:
+        encoded_bytes = await loop.run_in_executor(None, encoder.finish)
+        if encoded_bytes:
+            yield encoded_bytes
+
+        if (cache_key is not None) and cache_result:
+            # Complete file, including headers updated after streaming
+            save_to_cache(
+                cache_key,
+                encoder.getvalue(),
+                suffix=output_format.extension,
+                params=cache_params,
+            )
+
+    end_time = time.time()
+    _LOGGER.debug("Streamed audio in %s second(s)", end_time - start_time)
+
+    if (cache_key is not None) and all_audio:
+        save_to_cache(
+            cache_key, AudioChunk.join(all_audio).to_wav(), params=cache_params
+        )
+
+
+def get_audio_gen(
+    text: str,
+    voice: str,
+    lang: str = "en",
+    ssml: bool = False,
+    ssml_args: typing.Optional[typing.Dict[str, typing.Any]] = None,
+    low_latency: bool = False,
+    priority: int = PRIORITY_NORMAL,
+    **say_args,
+) -> typing.AsyncIterable[AudioChunk]:
+    """Get generator of audio chunks for plain text or SSML"""
+    if ssml:
+        return ssml_to_audio(
+            ssml_text=text,
+            default_voice=voice,
+            default_lang=lang,
+            ssml_args=ssml_args,
+            low_latency=low_latency,
+            priority=priority,
+            **say_args,
+        )
+
+    return text_to_audio_chunks(
+        text=text,
+        voice=voice,
+        lang=lang,
+        low_latency=low_latency,
+        priority=priority,
+        **say_args,
+    )
+
+
+async def convert_audio(
+    audio: AudioChunk, sample_rate: int, n_channels: int
+) -> AudioChunk:
+    """Convert audio to the desired rate/channels in an executor if needed"""
+    if (audio.sample_rate == sample_rate) and (audio.channels == n_channels):
+        # Settings match, can use audio directly
+        return audio
+
+    _LOGGER.debug(
+        "Converting audio (rate=%s->%s, channels=%s->%s)",
+        audio.sample_rate,
+        sample_rate,
+        audio.channels,
+        n_channels,
+    )
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, audio.convert, sample_rate, n_channels)
+
+
+async def synthesize(
+    tts_name: str,
+    text: str,
+    voice_id: str,
+    use_cache: bool = True,
+    priority: int = PRIORITY_NORMAL,
+    **say_args,
+) -> AudioChunk:
+    """Synthesize a single line/sentence to audio, using sentence cache if enabled.
+
+    Waiting syntheses with a lower priority value get the TTS system first.
+    """
+    tts = _TTS.get(tts_name)
+    assert tts, f"No TTS named {tts_name}"
+
+    sentence_key = get_sentence_cache_key(tts_name, voice_id, text, say_args)
+    use_sentence_cache = use_cache and (_SENTENCE_CACHE is not None)
+
+    if use_sentence_cache and (_SENTENCE_CACHE is not None):
+        audio = _SENTENCE_CACHE.get(sentence_key)
+        if audio is not None:
+            _LOGGER.debug("Loaded sentence from cache: %s", sentence_key)
+            return audio
+
+    async def say() -> AudioChunk:
+        try:
+            # Limit concurrent use of this TTS system
+            async with _TTS_LIMITERS[tts_name].slot(priority):
+                start_time = time.perf_counter()
+                audio = await tts.say_pcm(text, voice_id, **say_args)
+                end_time = time.perf_counter()
+        except EngineBusyError:
+            metrics.SYNTHESES.inc(tts_name, voice_id, "busy")
+            raise
+        except asyncio.CancelledError:
+            # Client disconnected or deadline passed
+            metrics.SYNTHESES.inc(tts_name, voice_id, "cancelled")
+            raise
+        except Exception:
+            metrics.SYNTHESES.inc(tts_name, voice_id, "error")
+            raise
+
+        record_synthesis(tts_name, voice_id, audio, end_time - start_time)
+
+        if (
+            (audio.num_frames > 0)
+            and use_sentence_cache
+            and (_SENTENCE_CACHE is not None)
+        ):
+            _SENTENCE_CACHE.put(sentence_key, audio)
+
+        return audio
+
+    # Identical sentences being synthesized at the same time share the work
+    # (requests don't wait on lower priority work).
+    return await _SENTENCE_FLIGHTS.run(f"{sentence_key}-{use_cache}-{priority}", say)
+
+
+def record_synthesis(tts_name: str, voice_id: str, audio: AudioChunk, seconds: float):
+    """Record synthesis time and real-time factor"""
+    metrics.SYNTHESES.inc(tts_name, voice_id, "ok")
+    metrics.SYNTHESIS_SECONDS.observe(seconds, tts_name, voice_id)
+
+    audio_seconds = audio.seconds
+    metrics.AUDIO_SECONDS.inc(tts_name, voice_id, amount=audio_seconds)
+
+    if audio_seconds > 0:
+        real_time_factor = seconds / audio_seconds
+        metrics.REAL_TIME_FACTOR.observe(real_time_factor, tts_name, voice_id)
+        _LOGGER.debug(
+            "Real-time factor: %0.2f (infer=%0.2f sec, audio=%0.2f sec)",
+            real_time_factor,
+            seconds,
+            audio_seconds,
+        )
+
+
+async def text_to_audio_chunks(
+    text: str,
+    voice: str,
+    lang: str = "en",
+    use_cache: bool = True,
+    on_sentence: typing.Optional[typing.Callable[[], None]] = None,
+    low_latency: bool = False,
+    priority: int = PRIORITY_NORMAL,
+    **say_args,
+) -> typing.AsyncIterable[AudioChunk]:
+    tts_name, voice_id, speaker_id = split_voice(resolve_voice(voice))
+    if speaker_id is not None:
+        say_args["speaker_id"] = speaker_id
+
+    async def synthesize_line(
+        line_index: int, line: str, line_priority: int = priority
+    ) -> AudioChunk:
+        _LOGGER.debug("Synthesizing line %s: %s", line_index + 1, line)
+        line_audio = await synthesize(
+            tts_name,
+            line,
+            voice_id,
+            use_cache=use_cache,
+            priority=line_priority,
+            **say_args,
+        )
+
+        assert line_audio.num_frames > 0, f"No audio from line: {line_index+1}"
+        _LOGGER.debug(
+            "Got %s audio byte(s) for line %s", line_audio.nbytes, line_index + 1,
+        )
+
+        return line_audio
+
+    def line_tasks() -> typing.Iterable[typing.Awaitable[AudioChunk]]:
+        is_first_line = True
+
+        # Process by line with single TTS
+        for line_index, line in enumerate(text.strip().splitlines()):
+            line = line.strip()
+            if not line:
+                continue
+
+            if is_first_line and low_latency:
+                # First clause goes ahead of everything else
+                first_clause, *rest_of_line = split_first_clause(line, lang)
+                yield synthesize_line(
+                    line_index, first_clause, get_clause_priority(priority)
+                )
+
+                for line_part in rest_of_line:
+                    yield synthesize_line(line_index, line_part)
+            else:
+                yield synthesize_line(line_index, line)
+
+            is_first_line = False
+
+    # Lines are synthesized in parallel, but returned in order
+    async for line_result in run_ordered(line_tasks(), args.parallel_sentences):
+        yield line_result
+
+        if on_sentence is not None:
+            on_sentence()
+
+
+async def ssml_to_audio(
+    ssml_text: str,
+    default_lang: str,
+    default_voice: str,
+    ssml_args: typing.Optional[typing.Dict[str, typing.Any]] = None,
+    use_cache: bool = True,
+    on_sentence: typing.Optional[typing.Callable[[], None]] = None,
+    low_latency: bool = False,
+    priority: int = PRIORITY_NORMAL,
+    **say_args,
+) -> typing.AsyncIterable[AudioChunk]:
+    if ssml_args is None:
+        ssml_args = {}
+
+    async def synthesize_sentence(
+        sent_index: int,
+        sentence: gruut.const.Sentence,
+        words: typing.Optional[typing.Sequence[gruut.const.Word]] = None,
+        pause_before: bool = True,
+        pause_after: bool = True,
+        sent_priority: int = priority,
+    ) -> typing.List[AudioChunk]:
+        if words is None:
+            sent_text = sentence.text_with_ws
+        else:
+            # Part of sentence
+            sent_text = "".join(word.text_with_ws for word in words)
+
+        sent_voice = default_voice
+        if sentence.voice:
+            sent_voice = sentence.voice
+        elif sentence.lang and (sentence.lang != default_lang):
+            sent_voice = sentence.lang
+
+        sent_voice = resolve_voice(sent_voice)
+
+        assert ":" in sent_voice, f"Invalid voice format: {sent_voice}"
+        tts_name, voice_id = sent_voice.split(":")
+        tts_name = tts_name.lower()
+        assert tts_name in _TTS, f"No TTS named {tts_name}"
+
+        # Sentences may be synthesized in parallel with different speakers
+        sent_say_args = dict(say_args)
+
+        if "#" in voice_id:
+            voice_id, speaker_id = voice_id.split("#", maxsplit=1)
+            sent_say_args["speaker_id"] = speaker_id
+        else:
+            # Need to remove speaker id for single speaker voices
+            sent_say_args.pop("speaker_id", None)
+
+        _LOGGER.debug(
+            "Synthesizing sentence %s with voice %s: %s",
+            sent_index + 1,
+            sent_voice,
+            sent_text.strip(),
+        )
+
+        sent_audio = await synthesize(
+            tts_name,
+            sent_text,
+            voice_id,
+            use_cache=use_cache,
+            priority=sent_priority,
+            **sent_say_args,
+        )
+        assert sent_audio.num_frames > 0, f"No audio from sentence: {sent_text}"
+        _LOGGER.debug(
+            "Got %s audio byte(s) for line %s", sent_audio.nbytes, sent_index + 1,
+        )
+
+        # Audio is resampled and appended at the end
+        sent_audios: typing.List[AudioChunk] = []
+
+        # Add pauses from SSML <break> tags
+        pause_before_ms = sentence.pause_before_ms
+        if sentence.words:
+            # Add pause from first word
+            pause_before_ms += sentence.words[0].pause_before_ms
+
+        if pause_before and (pause_before_ms > 0):
+            sent_audios.append(
+                AudioChunk.silence(
+                    pause_before_ms / 1000, sent_audio.sample_rate, sent_audio.channels
+                )
+            )
+
+        sent_audios.append(sent_audio)
+
+        pause_after_ms = sentence.pause_after_ms
+        if sentence.words:
+            # Add pause from last word
+            pause_after_ms += sentence.words[-1].pause_after_ms
+
+        if pause_after and (pause_after_ms > 0):
+            sent_audios.append(
+                AudioChunk.silence(
+                    pause_after_ms / 1000, sent_audio.sample_rate, sent_audio.channels
+                )
+            )
+
+        return sent_audios
+
+    def sentence_tasks() -> typing.Iterable[typing.Awaitable[typing.List[AudioChunk]]]:
+        is_first_sentence = True
+
+        for sent_index, sentence in enumerate(
+            gruut.sentences(
+                ssml_text,
+                lang=default_lang,
+                ssml=True,
+                explicit_lang=False,
+                phonemes=False,
+                pos=False,
+                **ssml_args,
+            )
+        ):
+            if not sentence.text_with_ws.strip():
+                # Skip empty sentences
+                continue
+
+            if is_first_sentence and low_latency:
+                is_first_sentence = False
+
+                # First clause goes ahead of everything else
+                clause_length = get_first_clause_length(sentence.words)
+                if clause_length is not None:
+                    yield synthesize_sentence(
+                        sent_index,
+                        sentence,
+                        words=sentence.words[:clause_length],
+                        pause_after=False,
+                        sent_priority=get_clause_priority(priority),
+                    )
+                    yield synthesize_sentence(
+                        sent_index,
+                        sentence,
+                        words=sentence.words[clause_length:],
+                        pause_before=False,
+                    )
+                else:
+                    yield synthesize_sentence(
+                        sent_index,
+                        sentence,
+                        sent_priority=get_clause_priority(priority),
+                    )
+
+                continue
+
+            yield synthesize_sentence(sent_index, sentence)
+
+    # Sentences are synthesized in parallel (possibly with different TTS
+    # systems), but returned in document order.
+    async for sent_audios in run_ordered(sentence_tasks(), args.parallel_sentences):
+        for sent_audio in sent_audios:
+            yield sent_audio
+
+        if on_sentence is not None:
+            on_sentence()
+
+
+def split_first_clause(text: str, lang: str) -> typing.List[str]:
+    """Split plain text after the first clause of its first sentence.
+
+    Returns [clause, rest] or [text] if there's no clause break (e.g., a
+    comma) that's followed by more words in the same sentence.
+    """
+    if not gruut.is_language_supported(lang):
+        return [text]
+
+    # Only the start of the text matters
+    sentences = gruut.sentences(
+        text[:_MAX_CLAUSE_SEARCH_CHARS],
+        lang=lang,
+        explicit_lang=False,
+        phonemes=False,
+        pos=False,
+        verbalize_numbers=False,
+        verbalize_dates=False,
+        verbalize_currency=False,
+    )
+
+    first_sentence = next(iter(sentences), None)
+    if first_sentence is None:
+        return [text]
+
+    clause_length = get_first_clause_length(first_sentence.words)
+    if clause_length is None:
+        return [text]
+
+    # Whitespace doesn't change the audio
+    clause_words = first_sentence.words[:clause_length]
+    clause = " ".join("".join(word.text_with_ws for word in clause_words).split())
+    norm_text = " ".join(text.split())
+
+    if not norm_text.startswith(clause):
+        # Text was changed during tokenization
+        return [text]
+
+    return [clause, norm_text[len(clause) :].strip()]
+
+
+def get_clause_priority(priority: int) -> int:
+    """Get priority of the first clause with low latency (background work
+    stays behind requests)"""
+    if priority <= PRIORITY_NORMAL:
+        return PRIORITY_HIGH
+
+    return priority
+
+
+def get_first_clause_length(
+    words: typing.Sequence[gruut.const.Word],
+) -> typing.Optional[int]:
+    """Get number of words up to and including the first minor break (None if
+    there isn't one followed by more words)"""
+    for word_index, word in enumerate(words):
+        if not word.is_minor_break:
+            continue
+
+        if any(not rest_word.is_break for rest_word in words[word_index + 1 :]):
+            return word_index + 1
+
+        break
+
+    return None
+
+
+def make_streaming_wav_header(
+    sample_rate: int, sample_width: int, num_channels: int
+) -> bytes:
+    """Create a WAV header for audio of unknown length"""
+    # Sizes are set to the maximum value since the length isn't known yet.
+    # Most players will read data until the end of the stream.
+    unknown_size = 0xFFFFFFFF
+    block_align = sample_width * num_channels
+
+    return b"".join(
+        (
+            b"RIFF",
+            struct.pack("<I", unknown_size),
+            b"WAVE",
+            b"fmt ",
+            struct.pack(
+                "<IHHIIHH",
+                16,  # chunk size
+                1,  # PCM
+                num_channels,
+                sample_rate,
+                sample_rate * block_align,  # byte rate
+                block_align,
+                sample_width * 8,  # bits per sample
+            ),
+            b"data",
+            struct.pack("<I", unknown_size),
+        )
+    )
 
 
 # -----------------------------------------------------------------------------
@@ -606,55 +2133,136 @@ def make_silence_wav(
 @app.route("/api/voices")
 async def app_voices() -> Response:
     """Get available voices."""
-    languages = set(request.args.getlist("language"))
-    locales = set(request.args.getlist("locale"))
-    genders = set(request.args.getlist("gender"))
-    tts_names = set(request.args.getlist("tts_name"))
-
-    voices: typing.Dict[str, typing.Any] = {}
-    for tts_name, tts in _TTS.items():
-        if tts_names and (tts_name not in tts_names):
-            # Skip TTS
-            continue
+    if convert_bool(request.args.get("refresh", "false")):
+        await _VOICE_CATALOG.refresh()
+
+    return catalog_response(
+        lambda: jsonify(
+            _VOICE_CATALOG.voices(
+                languages=request.args.getlist("language"),
+                locales=request.args.getlist("locale"),
+                genders=request.args.getlist("gender"),
+                tts_names=request.args.getlist("tts_name"),
+            )
+        )
+    )
 
-        async for voice in tts.voices():
-            if languages and (voice.language not in languages):
-                # Skip language
-                continue
 
-            if locales and (voice.locale not in locales):
-                # Skip locale
-                continue
+@app.route("/api/languages")
+async def app_languages() -> Response:
+    """Get available languages."""
+    return catalog_response(
+        lambda: jsonify(
+            list(_VOICE_CATALOG.languages(tts_names=request.args.getlist("tts_name")))
+        )
+    )
 
-            if genders and (voice.gender not in genders):
-                # Skip gender
-                continue
 
-            # Prepend TTS system name to voice ID
-            full_id = f"{tts_name}:{voice.id}"
-            voices[full_id] = dataclasses.asdict(voice)
+def catalog_response(make_response: typing.Callable[[], Response]) -> Response:
+    """Create response from voice catalog or 304 if client's copy is current"""
+    # Filtered responses differ, so include query in ETag
+    etag = hashlib.sha256(
+        f"{_VOICE_CATALOG.etag}?{request.query_string.decode()}".encode()
+    ).hexdigest()[:32]
+
+    if request.if_none_match.contains(etag):
+        response = Response("", status=304)
+    else:
+        response = make_response()
 
-            # Add TTS name
-            voices[full_id]["tts_name"] = tts_name
+    response.set_etag(etag)
 
-    return jsonify(voices)
+    return response
 
 
-@app.route("/api/languages")
-async def app_languages() -> Response:
-    """Get available languages."""
-    tts_names = set(request.args.getlist("tts_name"))
-    languages: typing.Set[str] = set()
+@app.route("/metrics")
+async def app_metrics() -> Response:
+    """Get server metrics in Prometheus text format."""
+    caches = {
+        "memory": _MEMORY_CACHE,
+        "disk": _WAV_CACHE,
+        "sentence": _SENTENCE_CACHE,
+    }
 
-    for tts_name, tts in _TTS.items():
-        if tts_names and (tts_name not in tts_names):
-            # Skip TTS
+    for cache_name, cache in caches.items():
+        if cache is None:
             continue
 
-        async for voice in tts.voices():
-            languages.add(voice.language)
+        cache_stats = cache.stats()
+        metrics.CACHE_HITS.set(cache_stats["hits"], cache_name)
+        metrics.CACHE_MISSES.set(cache_stats["misses"], cache_name)
+        metrics.CACHE_BYTES.set(cache_stats["bytes"], cache_name)
+
+    for tts_name, limiter in _TTS_LIMITERS.items():
+        metrics.ENGINE_ACTIVE.set(limiter.active, tts_name)
+        metrics.ENGINE_QUEUED.set(limiter.waiting, tts_name)
+        metrics.ENGINE_REJECTED.set(limiter.rejected + limiter.timeouts, tts_name)
+
+    model_stats = _MODEL_CACHE.stats()
+    model_bytes, model_evictions = model_stats["bytes"], model_stats["evictions"]
+
+    if _WORKERS is not None:
+        # Models loaded in worker processes
+        worker_model_stats = _WORKERS.model_stats()
+        model_bytes += worker_model_stats["bytes"]
+        model_evictions += worker_model_stats["evictions"]
+
+    metrics.MODEL_BYTES.set(model_bytes)
+    metrics.MODEL_EVICTIONS.set(model_evictions)
+
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+
+@app.route("/api/stats")
+async def app_stats() -> Response:
+    """Get server statistics."""
+    cache_stats: typing.Dict[str, typing.Any] = {}
+
+    if _MEMORY_CACHE is not None:
+        cache_stats["memory"] = _MEMORY_CACHE.stats()
+
+    if _WAV_CACHE is not None:
+        cache_stats["disk"] = _WAV_CACHE.stats()
+
+    if _SENTENCE_CACHE is not None:
+        cache_stats["sentence"] = _SENTENCE_CACHE.stats()
+
+    return jsonify(
+        {
+            "cache": cache_stats,
+            "coalesced": {
+                "requests": _WAV_FLIGHTS.coalesced,
+                "sentences": _SENTENCE_FLIGHTS.coalesced,
+            },
+            "engines": {
+                tts_name: limiter.stats() for tts_name, limiter in _TTS_LIMITERS.items()
+            },
+            "voices": {**_VOICE_CATALOG.stats(), **_VOICE_RESOLVER.stats()},
+            "jobs": _JOBS.stats(),
+            "models": _MODEL_CACHE.stats(),
+            "workers": _WORKERS.stats() if _WORKERS is not None else None,
+            "prewarm": _CACHE_WARMER.stats() if _CACHE_WARMER is not None else None,
+        }
+    )
+
+
+@app.route("/api/ready")
+async def app_ready() -> typing.Tuple[Response, int]:
+    """Check if preloaded voices are warmed up (503 until they are)."""
+    return (
+        jsonify({"ready": _READY.is_set(), "preloaded": _PRELOAD_RESULTS}),
+        200 if _READY.is_set() else 503,
+    )
+
 
-    return jsonify(list(languages))
+async def prepend_chunk(
+    first_chunk: bytes, chunks: typing.AsyncIterator[bytes]
+) -> typing.AsyncIterator[bytes]:
+    """Yield an already received chunk, then the rest"""
+    yield first_chunk
+
+    async for chunk in chunks:
+        yield chunk
 
 
 def convert_bool(bool_str: str) -> bool:
@@ -665,49 +2273,690 @@ def convert_bool(bool_str: str) -> bool:
 @app.route("/api/tts", methods=["GET", "POST"])
 async def app_say() -> Response:
     """Speak text to WAV."""
-    lang = request.args.get("lang", "en")
-
-    voice = request.args.get("voice", "")
-    assert voice, "No voice provided"
-
-    # cache=false or cache=0 disables WAV cache
-    use_cache = convert_bool(request.args.get("cache", "false"))
-
     # Text can come from POST body or GET ?text arg
     if request.method == "POST":
         text = (await request.data).decode()
     else:
         text = request.args.get("text", "")
 
-    assert text, "No text provided"
+    # cache=false or cache=0 disables WAV cache
+    tts_args = get_tts_args(request.args, text, default_cache=False)
 
-    vocoder = request.args.get("vocoder", args.larynx_quality)
+    output_format = get_request_format()
 
-    # Denoiser strength
-    denoiser_strength = request.args.get(
-        "denoiserStrength", args.larynx_denoiser_strength
+    # stream=true sends audio as each sentence is synthesized
+    stream = convert_bool(request.args.get("stream", "false"))
+
+    deadline = get_request_deadline()
+
+    if stream:
+        wav_stream = deadline.iterate(
+            text_to_wav_stream(**tts_args, output_format=output_format)
+        )
+
+        # Wait for the first chunk so that errors (e.g., busy TTS) are
+        # reported with a proper status code instead of a truncated stream.
+        first_chunk = await wav_stream.__anext__()
+
+        return Response(
+            prepend_chunk(first_chunk, wav_stream), mimetype=output_format.mimetype
+        )
+
+    # Cached audio is identified by its cache key
+    cache_key = get_audio_cache_key(output_format, tts_args)
+    if cache_key is not None:
+        if request.if_none_match.contains(cache_key) and is_cached(cache_key):
+            # Client's copy is current (audio isn't read or counted as a hit)
+            response = Response("", status=304)
+            response.set_etag(cache_key)
+            return response
+
+        cached_audio = load_cached_audio(cache_key)
+        if cached_audio is not None:
+            return await audio_response(cached_audio, output_format, etag=cache_key)
+
+    audio_bytes = await deadline.run(
+        text_to_audio(output_format, check_cache=(cache_key is None), **tts_args)
+    )
+
+    return await audio_response(audio_bytes, output_format, etag=cache_key)
+
+
+async def audio_response(
+    audio: typing.Union[bytes, Path],
+    output_format: OutputFormat,
+    etag: typing.Optional[str] = None,
+) -> Response:
+    """Create response for audio bytes or file that honors Range requests"""
+    if isinstance(audio, Path):
+        # Sent from disk in chunks
+        response = Response(
+            app.response_class.file_body_class(audio), mimetype=output_format.mimetype
+        )
+        audio_size = audio.stat().st_size
+        response.content_length = audio_size
+    else:
+        response = Response(audio, mimetype=output_format.mimetype)
+        audio_size = len(audio)
+
+    if etag is not None:
+        response.set_etag(etag)
+
+    request_range = request.range
+    if request_range is not None:
+        if_range = request.if_range
+        if (if_range.date is not None) or (
+            (if_range.etag is not None) and (if_range.etag != etag)
+        ):
+            # Audio has changed, send all of it
+            request_range = None
+
+    response.accept_ranges = "bytes"
+
+    if request_range is not None:
+        # Werkzeug resolves suffix ranges (bytes=-N) and open-ended ranges
+        byte_range = request_range.range_for_length(audio_size)
+        if byte_range is None:
+            return Response(
+                "", status=416, headers={"Content-Range": f"bytes */{audio_size}"}
+            )
+
+        # Only the requested bytes are read from a file
+        start, stop = byte_range
+        await response.response.make_conditional(start, stop)
+
+        response.status_code = 206
+        response.content_length = stop - start
+        response.content_range = ContentRange("bytes", start, stop, audio_size)
+
+    return response
+
+
+def get_request_deadline() -> Deadline:
+    """Get deadline from ?timeout or X-Request-Timeout header (seconds)"""
+    timeout_str = request.args.get("timeout") or request.headers.get(
+        "X-Request-Timeout"
+    )
+    if not timeout_str:
+        return Deadline()
+
+    timeout = float(timeout_str)
+    assert timeout > 0, "Timeout must be positive"
+
+    return Deadline(timeout)
+
+
+def get_request_format() -> OutputFormat:
+    """Get output audio format from ?format or Accept header (default: WAV)"""
+    format_name = request.args.get("format")
+    if format_name:
+        return get_output_format(format_name)
+
+    # WAV is first, so it's preferred when the client doesn't care
+    best_mimetype = request.accept_mimetypes.best_match(
+        [output_format.mimetype for output_format in OUTPUT_FORMATS.values()]
+    )
+    if best_mimetype:
+        return get_output_format(best_mimetype)
+
+    return OUTPUT_FORMATS["wav"]
+
+
+@app.route("/api/tts/batch", methods=["POST"])
+async def app_say_batch() -> Response:
+    """Speak a JSON list of texts to WAV files inside a ZIP file."""
+    items = await request.get_json(force=True)
+    assert isinstance(items, list), "Expected JSON list"
+    assert items, "No items provided"
+
+    # Query parameters are defaults for each item
+    defaults = request.args.to_dict()
+    batch_items: typing.List[BatchItem] = []
+    file_names: typing.Set[str] = set()
+
+    for item_index, item in enumerate(items):
+        # Every item is checked before any synthesis starts
+        try:
+            assert isinstance(item, dict), "Not a JSON object"
+
+            params = {**defaults, **item}
+            tts_args = get_tts_args(
+                params, str(params.get("text", "")), default_cache=True
+            )
+
+            # Resolve up front so items can be grouped by voice
+            voice = resolve_voice(tts_args["voice"])
+            split_voice(voice)
+
+            output_format = get_output_format(str(params.get("format", "wav")))
+        except (AssertionError, ValueError) as e:
+            raise BatchItemError(item_index, e) from e
+
+        file_name = get_batch_file_name(
+            item_index, params.get("name"), file_names, output_format.extension
+        )
+        file_names.add(file_name)
+
+        batch_items.append(
+            BatchItem(item_index, file_name, voice, output_format, tts_args)
+        )
+
+    zip_stream = get_request_deadline().iterate(batch_to_zip(batch_items))
+
+    # Wait for the first chunk so that errors (e.g., deadline) are reported
+    # with a proper status code instead of a truncated ZIP file.
+    first_chunk = await zip_stream.__anext__()
+
+    return Response(
+        prepend_chunk(first_chunk, zip_stream),
+        mimetype="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="opentts.zip"'},
+    )
+
+
+class BatchItemError(Exception):
+    """Raised when an item in a /api/tts/batch request is invalid"""
+
+    def __init__(self, index: int, error: Exception):
+        super().__init__(f"Item {index}: {error}")
+        self.index = index
+
+
+@dataclasses.dataclass
+class BatchItem:
+    """Single utterance from /api/tts/batch"""
+
+    index: int
+    file_name: str
+    voice: str
+    output_format: OutputFormat
+    tts_args: typing.Dict[str, typing.Any]
+
+
+class ZipChunks:
+    """Write-only file that collects bytes written by zipfile"""
+
+    def __init__(self):
+        self.chunks: typing.List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        """Collect written bytes"""
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        """Nothing to flush"""
+
+    def take(self) -> bytes:
+        """Get and clear collected bytes"""
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def get_batch_file_name(
+    item_index: int,
+    name: typing.Optional[str],
+    used_names: typing.Set[str],
+    extension: str = ".wav",
+) -> str:
+    """Get a safe, unique audio file name for a batch item"""
+    file_name = f"{item_index:05d}{extension}"
+    if name:
+        # Only allow simple file names
+        name = re.sub(r"[^\w.-]", "_", Path(str(name)).name).strip(".")
+        if name:
+            file_name = (
+                name if name.lower().endswith(extension) else f"{name}{extension}"
+            )
+
+    if file_name in used_names:
+        file_name = f"{Path(file_name).stem}-{item_index:05d}{extension}"
+
+    return file_name
+
+
+async def batch_to_zip(
+    batch_items: typing.List[BatchItem],
+) -> typing.AsyncIterator[bytes]:
+    """Synthesize batch items and stream WAV files inside a ZIP file.
+
+    Items are grouped by voice so each voice's models stay loaded while its
+    items are synthesized. Different voices (and TTS systems) run at the same
+    time, and files are added to the ZIP as soon as they're ready.
+    """
+    voice_items: typing.Dict[str, typing.List[BatchItem]] = defaultdict(list)
+    for batch_item in batch_items:
+        voice_items[batch_item.voice].append(batch_item)
+
+    # Bounded so that finished audio doesn't pile up in memory for slow clients
+    # (item, WAV bytes or None, error)
+    results: "asyncio.Queue[typing.Tuple[BatchItem, typing.Optional[bytes], str]]"
+    results = asyncio.Queue(maxsize=max(1, args.batch_concurrency))
+    voice_semaphore = asyncio.Semaphore(max(1, args.batch_concurrency))
+
+    async def synthesize_voice(items: typing.List[BatchItem]):
+        async with voice_semaphore:
+            for batch_item in items:
+                try:
+                    wav_bytes = await text_to_audio(
+                        batch_item.output_format, **batch_item.tts_args
+                    )
+                    await results.put((batch_item, wav_bytes, ""))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    _LOGGER.exception("batch item %s", batch_item.index)
+                    await results.put(
+                        (batch_item, None, f"{e.__class__.__name__}: {e}")
+                    )
+
+    voice_tasks = [
+        asyncio.ensure_future(synthesize_voice(items)) for items in voice_items.values()
+    ]
+
+    zip_chunks = ZipChunks()
+    errors: typing.List[typing.Dict[str, typing.Any]] = []
+
+    try:
+        # WAV audio doesn't compress well, so files are only stored
+        with zipfile.ZipFile(
+            zip_chunks, mode="w", compression=zipfile.ZIP_STORED
+        ) as zip_file:
+            for _ in range(len(batch_items)):
+                batch_item, wav_bytes, error = await results.get()
+                if wav_bytes is None:
+                    errors.append(
+                        {
+                            "index": batch_item.index,
+                            "name": batch_item.file_name,
+                            "error": error,
+                        }
+                    )
+                    continue
+
+                zip_file.writestr(batch_item.file_name, wav_bytes)
+                yield zip_chunks.take()
+
+            if errors:
+                # Report failed items instead of failing the whole batch
+                zip_file.writestr(
+                    "errors.json", json.dumps(sorted(errors, key=lambda e: e["index"]))
+                )
+
+        # Central directory
+        yield zip_chunks.take()
+    finally:
+        for voice_task in voice_tasks:
+            voice_task.cancel()
+
+
+@app.route("/api/jobs", methods=["POST"])
+async def app_create_job() -> typing.Tuple[Response, int, typing.Dict[str, str]]:
+    """Start synthesizing text in the background."""
+    # Text comes from POST body, settings are the same as /api/tts
+    text = (await request.data).decode()
+    tts_args = get_tts_args(request.args, text, default_cache=False)
+
+    # No one is waiting for the first audio of a background job, and sentence
+    # progress assumes sentences aren't split.
+    tts_args["low_latency"] = False
+
+    # Fail now instead of in the background
+    resolve_voice(tts_args["voice"])
+
+    sentences_total = count_sentences(
+        tts_args["text"], tts_args["lang"], tts_args["ssml"], tts_args["ssml_args"]
+    )
+
+    async def job_audio(job: Job) -> typing.AsyncIterator[bytes]:
+        # Complete WAV isn't kept in memory for caching, since jobs may be long
+        async for chunk in text_to_wav_stream(
+            **tts_args, on_sentence=job.sentence_done, cache_result=False
+        ):
+            yield chunk
+
+    job = _JOBS.create(job_audio, sentences_total=sentences_total)
+
+    return (
+        jsonify(job.to_dict()),
+        202,
+        {"Location": f"/api/jobs/{job.id}"},
+    )
+
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+async def app_job_status(job_id: str) -> Response:
+    """Get status and progress of a job."""
+    return jsonify(_JOBS.get(job_id).to_dict())
+
+
+@app.route("/api/jobs/<job_id>", methods=["DELETE"])
+async def app_delete_job(job_id: str) -> Response:
+    """Cancel a job and delete its audio."""
+    _JOBS.remove(job_id)
+
+    return Response("", status=204)
+
+
+@app.route("/api/jobs/<job_id>/audio", methods=["GET"])
+async def app_job_audio(
+    job_id: str,
+) -> typing.Union[Response, typing.Tuple[Response, int]]:
+    """Stream WAV audio from a job, waiting for audio that's not ready yet."""
+    job = _JOBS.get(job_id)
+
+    if job.status == Job.FAILED:
+        # Job status has the error
+        return (jsonify(job.to_dict()), 409)
+
+    if job.status == Job.CANCELLED:
+        # Audio file was never finished
+        return (jsonify(job.to_dict()), 410)
+
+    return Response(_JOBS.read_audio(job), mimetype="audio/wav")
+
+
+@app.websocket("/api/tts/ws")
+async def app_say_ws():
+    """Speak text fragments as they arrive, sending back raw audio by sentence.
+
+    Messages from the client are JSON objects:
+    {"text": "..."} adds text, {"flush": true} speaks any text left over, and
+    {"end": true} speaks any text left over and closes the connection.
+
+    For each sentence, a JSON marker is sent followed by a binary message with
+    16-bit mono PCM audio. A final {"type": "done"} is sent after "end".
+    """
+    # Same settings as /api/tts, but text comes from messages
+    tts_args = get_tts_args(websocket.args, "", require_text=False)
+    tts_name, voice_id, speaker_id = split_voice(resolve_voice(tts_args["voice"]))
+
+    say_args: typing.Dict[str, typing.Any] = {
+        "vocoder": tts_args["vocoder"],
+        "denoiser_strength": tts_args["denoiser_strength"],
+        "noise_scale": tts_args["noise_scale"],
+        "length_scale": tts_args["length_scale"],
+    }
+
+    if speaker_id is not None:
+        say_args["speaker_id"] = speaker_id
+
+    await websocket.accept()
+
+    # (index, text, synthesis task) or None when the client is done
+    sentences: "asyncio.Queue[typing.Optional[typing.Tuple[int, str, asyncio.Future]]]"
+    sentences = asyncio.Queue()
+
+    # Limits sentences being synthesized or waiting to be sent
+    sentence_slots = asyncio.Semaphore(max(1, args.parallel_sentences))
+
+    async def receive_text():
+        segmenter = SentenceSegmenter(tts_args["lang"], tts_args["ssml_args"])
+        sent_index = 0
+        is_first_sentence = True
+
+        try:
+            while True:
+                message = await websocket.receive()
+                if isinstance(message, bytes):
+                    message = message.decode()
+
+                message = json.loads(message)
+                assert isinstance(message, dict), "Expected JSON object"
+
+                is_end = bool(message.get("end", False))
+                is_flush = is_end or bool(message.get("flush", False))
+
+                for sent_text in segmenter.add(
+                    str(message.get("text", "")), flush=is_flush
+                ):
+                    sent_parts = [sent_text]
+                    part_priority = PRIORITY_NORMAL
+
+                    if is_first_sentence and tts_args["low_latency"]:
+                        # First clause is sent on its own, ahead of other work
+                        sent_parts = split_first_clause(sent_text, tts_args["lang"])
+                        part_priority = PRIORITY_HIGH
+
+                    is_first_sentence = False
+
+                    for part_text in sent_parts:
+                        await sentence_slots.acquire()
+                        sent_task = asyncio.ensure_future(
+                            synthesize(
+                                tts_name,
+                                part_text,
+                                voice_id,
+                                use_cache=tts_args["use_cache"],
+                                priority=part_priority,
+                                **say_args,
+                            )
+                        )
+                        await sentences.put((sent_index, part_text, sent_task))
+                        sent_index += 1
+                        part_priority = PRIORITY_NORMAL
+
+                if is_end:
+                    break
+        finally:
+            sentences.put_nowait(None)
+
+    receive_task = asyncio.ensure_future(receive_text())
+    stream_sample_rate: typing.Optional[int] = None
+
+    try:
+        while True:
+            sentence = await sentences.get()
+            if sentence is None:
+                break
+
+            sent_index, sent_text, sent_task = sentence
+            try:
+                sent_audio = await sent_task
+
+                if stream_sample_rate is None:
+                    # Rate of first sentence is used for the rest of the stream
+                    stream_sample_rate = sent_audio.sample_rate
+
+                sent_audio = await convert_audio(sent_audio, stream_sample_rate, 1)
+                frames = sent_audio.to_frames()
+            except Exception as e:
+                # Report failed sentence and keep going
+                _LOGGER.exception("websocket sentence %s", sent_index)
+                await websocket.send(
+                    json.dumps(
+                        {
+                            "type": "error",
+                            "index": sent_index,
+                            "error": f"{e.__class__.__name__}: {e}",
+                        }
+                    )
+                )
+                continue
+            finally:
+                sentence_slots.release()
+
+            await websocket.send(
+                json.dumps(
+                    {
+                        "type": "sentence",
+                        "index": sent_index,
+                        "text": sent_text.strip(),
+                        "sample_rate": stream_sample_rate,
+                        "sample_width": 2,
+                        "channels": 1,
+                        "bytes": len(frames),
+                    }
+                )
+            )
+            await websocket.send(frames)
+
+        try:
+            await receive_task
+        except Exception as e:
+            _LOGGER.exception("websocket")
+            await websocket.send(
+                json.dumps({"type": "error", "error": f"{e.__class__.__name__}: {e}"})
+            )
+            return
+
+        await websocket.send(json.dumps({"type": "done"}))
+    finally:
+        receive_task.cancel()
+
+        # Client disconnected or failed
+        while not sentences.empty():
+            sentence = sentences.get_nowait()
+            if sentence is not None:
+                sentence[2].cancel()
+
+
+class SentenceSegmenter:
+    """Splits text that arrives in fragments into complete sentences.
+
+    Text is kept until gruut finds the end of a sentence, so sentences can be
+    synthesized before all of the text has arrived. Languages that gruut
+    doesn't support are split into lines instead.
+    """
+
+    def __init__(
+        self, lang: str, ssml_args: typing.Optional[typing.Dict[str, typing.Any]] = None
+    ):
+        self.lang = lang
+        self.ssml_args = ssml_args or {}
+        self.use_gruut = gruut.is_language_supported(lang)
+
+        # Text since the last complete sentence boundary
+        self.text = ""
+
+        # Number of sentences in text that were already returned
+        self.num_returned = 0
+
+    def add(self, fragment: str, flush: bool = False) -> typing.List[str]:
+        """Add text and get sentences that are newly complete"""
+        self.text += fragment
+        if not self.text:
+            return []
+
+        if self.use_gruut:
+            sentences, last_complete = self._split_sentences()
+        else:
+            sentences = self.text.splitlines(keepends=True)
+            last_complete = self.text.endswith("\n")
+
+        if flush:
+            last_complete = True
+
+        if not last_complete:
+            # Last sentence may still grow
+            sentences = sentences[:-1]
+
+        new_sentences = sentences[self.num_returned :]
+
+        if last_complete:
+            # Sentences are re-split from here on
+            self.text = ""
+            self.num_returned = 0
+        else:
+            self.num_returned = max(self.num_returned, len(sentences))
+
+        return [sentence for sentence in new_sentences if sentence.strip()]
+
+    def _split_sentences(self) -> typing.Tuple[typing.List[str], bool]:
+        """Split text with gruut and check if the last sentence is complete"""
+        sentences = list(
+            gruut.sentences(
+                self.text,
+                lang=self.lang,
+                explicit_lang=False,
+                phonemes=False,
+                pos=False,
+                **self.ssml_args,
+            )
+        )
+
+        if not sentences:
+            return [], False
+
+        # Last sentence is complete if it ends with punctuation and whitespace
+        last_sentence = sentences[-1]
+        last_complete = (
+            bool(last_sentence.words)
+            and last_sentence.words[-1].is_major_break
+            and last_sentence.text_with_ws[-1:].isspace()
+        )
+
+        return [sentence.text_with_ws for sentence in sentences], last_complete
+
+
+def count_sentences(
+    text: str,
+    lang: str,
+    ssml: bool,
+    ssml_args: typing.Optional[typing.Dict[str, typing.Any]] = None,
+) -> int:
+    """Count lines (text) or sentences (SSML) that will be synthesized"""
+    if not ssml:
+        return sum(1 for line in text.strip().splitlines() if line.strip())
+
+    return sum(
+        1
+        for sentence in gruut.sentences(
+            text,
+            lang=lang,
+            ssml=True,
+            explicit_lang=False,
+            phonemes=False,
+            pos=False,
+            **(ssml_args or {}),
+        )
+        if sentence.text_with_ws.strip()
     )
+
+
+def get_tts_args(
+    params: typing.Mapping[str, typing.Any],
+    text: str,
+    default_cache: bool = False,
+    require_text: bool = True,
+) -> typing.Dict[str, typing.Any]:
+    """Get arguments for text_to_wav from /api/tts query parameters"""
+    lang = str(params.get("lang", "en"))
+
+    voice = str(params.get("voice", ""))
+    assert voice, "No voice provided"
+
+    use_cache = convert_bool(str(params.get("cache", default_cache)))
+
+    if require_text:
+        assert text, "No text provided"
+
+    vocoder = params.get("vocoder", args.larynx_quality)
+
+    # Denoiser strength
+    denoiser_strength = params.get("denoiserStrength", args.larynx_denoiser_strength)
     if denoiser_strength is not None:
         denoiser_strength = float(denoiser_strength)
 
     # Noise and length scales
-    noise_scale = request.args.get("noiseScale", args.larynx_noise_scale)
+    noise_scale = params.get("noiseScale", args.larynx_noise_scale)
     if noise_scale is not None:
         noise_scale = float(noise_scale)
 
-    length_scale = request.args.get("lengthScale", args.larynx_length_scale)
+    length_scale = params.get("lengthScale", args.larynx_length_scale)
     if length_scale is not None:
         length_scale = float(length_scale)
 
-    speaker_id = str(request.args.get("speakerId", ""))
+    speaker_id = str(params.get("speakerId", ""))
     if speaker_id and ("#" not in voice):
         voice = f"{voice}#{speaker_id}"
 
     # SSML settings
-    ssml = convert_bool(request.args.get("ssml", "false"))
-    ssml_numbers = convert_bool(request.args.get("ssmlNumbers", "true"))
-    ssml_dates = convert_bool(request.args.get("ssmlDates", "true"))
-    ssml_currency = convert_bool(request.args.get("ssmlCurrency", "true"))
+    ssml = convert_bool(str(params.get("ssml", "false")))
+    ssml_numbers = convert_bool(str(params.get("ssmlNumbers", "true")))
+    ssml_dates = convert_bool(str(params.get("ssmlDates", "true")))
+    ssml_currency = convert_bool(str(params.get("ssmlCurrency", "true")))
 
     ssml_args = {
         "verbalize_numbers": ssml_numbers,
@@ -715,57 +2964,41 @@ async def app_say() -> Response:
         "verbalize_currency": ssml_currency,
     }
 
-    wav_bytes = await text_to_wav(
-        text=text,
-        voice=voice,
-        lang=lang,
-        vocoder=vocoder,
-        denoiser_strength=denoiser_strength,
-        noise_scale=noise_scale,
-        length_scale=length_scale,
-        use_cache=use_cache,
-        ssml=ssml,
-        ssml_args=ssml_args,
-    )
-
-    return Response(wav_bytes, mimetype="audio/wav")
-
-
-def resolve_voice(voice: str, fallback_voice: typing.Optional[str] = None) -> str:
-    """Resolve a voice or language based on aliases"""
-    original_voice = voice
-    if "#" in voice:
-        # Remove speaker id
-        # tts:voice#speaker_id
-        voice, _speaker_id = voice.split("#", maxsplit=1)
-
-    # Resolve voices in order:
-    # 1. Aliases in order of preference
-    # 2. fallback voice provided
-    # 3. Original voice
-    # 4. espeak voice
+    # Split first sentence to reduce time to first audio
+    low_latency = convert_bool(str(params.get("lowLatency", "false")))
+
+    return {
+        "text": text,
+        "voice": voice,
+        "lang": lang,
+        "vocoder": vocoder,
+        "denoiser_strength": denoiser_strength,
+        "noise_scale": noise_scale,
+        "length_scale": length_scale,
+        "use_cache": use_cache,
+        "ssml": ssml,
+        "ssml_args": ssml_args,
+        "low_latency": low_latency,
+    }
 
-    fallback_voices = []
-    if fallback_voice is not None:
-        fallback_voices.append(fallback_voice)
 
-    fallback_voices.append(original_voice)
+def split_voice(voice: str) -> typing.Tuple[str, str, typing.Optional[str]]:
+    """Split a resolved voice (tts:voice#speaker) into its parts"""
+    assert ":" in voice, f"Invalid voice: {voice}"
+    tts_name, voice_id = voice.split(":", maxsplit=1)
+    tts_name = tts_name.lower()
+    assert tts_name in _TTS, f"No TTS named {tts_name}"
 
-    alias_key = voice.lower()
-    if alias_key not in _VOICE_ALIASES:
-        # en-US -> en
-        alias_key = re.split(r"[-_]", alias_key, maxsplit=1)[0]
+    speaker_id: typing.Optional[str] = None
+    if "#" in voice_id:
+        voice_id, speaker_id = voice_id.split("#", maxsplit=1)
 
-    if ":" not in voice:
-        fallback_voices.append(f"espeak:{voice}")
+    return tts_name, voice_id, speaker_id
 
-    for preferred_voice in itertools.chain(_VOICE_ALIASES[alias_key], fallback_voices):
-        tts, _voice_id = preferred_voice.split(":", maxsplit=1)
-        if tts in _TTS:
-            # If TTS system is loaded, assume voice will be present
-            return preferred_voice
 
-    raise ValueError(f"Cannot resolve voice: {voice}")
+def resolve_voice(voice: str, fallback_voice: typing.Optional[str] = None) -> str:
+    """Resolve a voice or language based on aliases"""
+    return _VOICE_RESOLVER.resolve(voice, fallback_voice)
 
 
 # -----------------------------------------------------------------------------
@@ -787,29 +3020,24 @@ async def api_process():
     if ";" in voice:
         voice, vocoder = voice.split(";", maxsplit=1)
 
-    wav_bytes = await text_to_wav(
-        text,
-        voice,
+    output_format = get_request_format()
+    audio_bytes = await text_to_audio(
+        output_format,
+        text=text,
+        voice=voice,
         vocoder=vocoder,
         denoiser_strength=args.larynx_denoiser_strength,
         noise_scale=args.larynx_noise_scale,
         length_scale=args.larynx_length_scale,
     )
 
-    return Response(wav_bytes, mimetype="audio/wav")
+    return Response(audio_bytes, mimetype=output_format.mimetype)
 
 
 @app.route("/voices", methods=["GET"])
 async def api_voices():
     """MaryTTS-compatible /voices endpoint"""
-    voices = []
-    for tts_name, tts in _TTS.items():
-        async for voice in tts.voices():
-            # Prepend TTS system name to voice ID
-            full_id = f"{tts_name}:{voice.id}"
-            voices.append(full_id)
-
-    return "\n".join(voices)
+    return catalog_response(lambda: Response("\n".join(_VOICE_CATALOG.voice_ids())))
 
 
 @app.route("/version", methods=["GET"])
@@ -854,6 +3082,33 @@ async def img(filename) -> Response:
 api_doc(app, config_path="swagger.yaml", url_prefix="/openapi", title="OpenTTS")
 
 
+@app.errorhandler(EngineBusyError)
+async def handle_busy(err) -> typing.Tuple[str, int, typing.Dict[str, str]]:
+    """Return 503 so clients/load balancers can retry elsewhere."""
+    _LOGGER.warning(err)
+    return (str(err), 503, {"Retry-After": str(err.retry_after)})
+
+
+@app.errorhandler(DeadlineExceededError)
+async def handle_deadline(err) -> typing.Tuple[str, int]:
+    """Return 504 when synthesis didn't finish in time."""
+    _LOGGER.warning(err)
+    return (str(err), 504)
+
+
+@app.errorhandler(JobNotFoundError)
+async def handle_job_not_found(err) -> typing.Tuple[str, int]:
+    """Return 404 for unknown or expired jobs."""
+    return (f"No job with id {err}", 404)
+
+
+@app.errorhandler(BatchItemError)
+async def handle_batch_item(err) -> typing.Tuple[str, int]:
+    """Return 400 for a batch request with an invalid item."""
+    _LOGGER.warning(err)
+    return (str(err), 400)
+
+
 @app.errorhandler(Exception)
 async def handle_error(err) -> typing.Tuple[str, int]:
     """Return error as text."""
@@ -892,5 +3147,11 @@ except KeyboardInterrupt:
     _LOOP.call_soon(shutdown_event.set)
 finally:
     # Clean up WAV cache
+    if _WAV_CACHE is not None:
+        _WAV_CACHE.close()
+
     if _CACHE_TEMP_DIR is not None:
         _CACHE_TEMP_DIR.cleanup()
+
+    if _JOBS_TEMP_DIR is not None:
+        _JOBS_TEMP_DIR.cleanup()
@@ -0,0 +1,580 @@
+"""Audio conversion for OpenTTS"""
+import functools
+import io
+import math
+import typing
+import wave
+from dataclasses import dataclass
+
+import numpy as np
+
+# Number of zero crossings of the windowed sinc filter on each side.
+# Higher values give a sharper cutoff at the cost of more computation.
+_FILTER_ZEROS = 16
+
+# Shape parameter for the Kaiser window (~80 dB stopband attenuation)
+_KAISER_BETA = 8.6
+
+# Number of output samples computed at once during resampling
+_BLOCK_SIZE = 8192
+
+# -----------------------------------------------------------------------------
+
+
+def convert_frames(
+    frames: bytes,
+    src_rate: int,
+    src_width: int,
+    src_channels: int,
+    dst_rate: int,
+    dst_width: int,
+    dst_channels: int,
+) -> bytes:
+    """Convert raw PCM audio frames to a different rate/width/channels"""
+    if (
+        (src_rate == dst_rate)
+        and (src_width == dst_width)
+        and (src_channels == dst_channels)
+    ):
+        # Nothing to do
+        return frames
+
+    audio = frames_to_float(frames, src_width, src_channels)
+    audio = convert_channels(audio, dst_channels)
+    audio = resample(audio, src_rate, dst_rate)
+
+    return float_to_frames(audio, dst_width)
+
+
+def frames_to_float(frames: bytes, sample_width: int, num_channels: int) -> np.ndarray:
+    """Convert little-endian PCM frames to float32 array with shape (samples, channels) in [-1, 1]"""
+    if sample_width == 1:
+        # 8-bit WAV audio is unsigned
+        audio = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sample_width == 2:
+        audio = np.frombuffer(frames, dtype="<i2").astype(np.float32) / (1 << 15)
+    elif sample_width == 3:
+        # Sign-extend 24-bit samples into 32-bit integers
+        frame_bytes = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3)
+        samples = np.zeros((frame_bytes.shape[0], 4), dtype=np.uint8)
+        samples[:, 1:] = frame_bytes
+        audio = samples.view("<i4").reshape(-1).astype(np.float32) / (1 << 31)
+    elif sample_width == 4:
+        audio = np.frombuffer(frames, dtype="<i4").astype(np.float32) / (1 << 31)
+    else:
+        raise ValueError(f"Unsupported sample width: {sample_width}")
+
+    return audio.reshape(-1, num_channels)
+
+
+def float_to_frames(audio: np.ndarray, sample_width: int) -> bytes:
+    """Convert float array with shape (samples, channels) to little-endian PCM frames"""
+    audio = np.clip(audio, -1.0, 1.0)
+
+    if sample_width == 1:
+        samples = np.clip(np.round(audio * 128) + 128, 0, 255).astype(np.uint8)
+    elif sample_width == 2:
+        samples = np.clip(np.round(audio * (1 << 15)), -(1 << 15), (1 << 15) - 1)
+        samples = samples.astype("<i2")
+    elif sample_width == 3:
+        int_samples = np.clip(
+            np.round(audio.astype(np.float64) * (1 << 23)), -(1 << 23), (1 << 23) - 1
+        ).astype("<i4")
+
+        # Drop most significant byte
+        samples = int_samples.reshape(-1, 1).view(np.uint8)[:, :3]
+    elif sample_width == 4:
+        samples = np.clip(
+            np.round(audio.astype(np.float64) * (1 << 31)), -(1 << 31), (1 << 31) - 1
+        ).astype("<i4")
+    else:
+        raise ValueError(f"Unsupported sample width: {sample_width}")
+
+    return np.ascontiguousarray(samples).tobytes()
+
+
+def convert_channels(audio: np.ndarray, num_channels: int) -> np.ndarray:
+    """Mix down or duplicate channels of audio with shape (samples, channels)"""
+    if audio.shape[1] == num_channels:
+        return audio
+
+    if audio.shape[1] > 1:
+        # Average channels
+        audio = audio.mean(axis=1, keepdims=True)
+
+    if num_channels > 1:
+        # Duplicate mono channel
+        audio = np.repeat(audio, num_channels, axis=1)
+
+    return audio
+
+
+# -----------------------------------------------------------------------------
+
+
+def resample(audio: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """Resample audio with shape (samples, channels) using a polyphase filter"""
+    if (src_rate == dst_rate) or (audio.shape[0] == 0):
+        return audio
+
+    up, down, taps, half_width = get_resample_filter(src_rate, dst_rate)
+
+    num_out = int(math.ceil(audio.shape[0] * up / down))
+
+    # Pad so that every filter tap lands on a valid index
+    padded = np.pad(
+        audio.astype(np.float32, copy=False), ((half_width, half_width + 1), (0, 0))
+    )
+
+    return apply_resample_filter(padded, 0, num_out, 0, up, down, taps)
+
+
+def apply_resample_filter(
+    padded: np.ndarray,
+    out_start: int,
+    out_end: int,
+    padded_start: int,
+    up: int,
+    down: int,
+    taps: np.ndarray,
+) -> np.ndarray:
+    """Compute output samples [out_start, out_end) of a polyphase filter.
+
+    padded holds zero-padded input starting at index padded_start, and must
+    cover every tap of the requested output samples.
+    """
+    num_channels = padded.shape[1]
+    offsets = np.arange(1, taps.shape[1] + 1) - padded_start
+    resampled = np.empty((out_end - out_start, num_channels), dtype=np.float32)
+
+    for block_start in range(out_start, out_end, _BLOCK_SIZE):
+        block_end = min(block_start + _BLOCK_SIZE, out_end)
+        block_out = slice(block_start - out_start, block_end - out_start)
+
+        # Input position of each output sample is (n * down / up).
+        # The integer part selects input samples, the remainder selects the phase.
+        positions = np.arange(block_start, block_end, dtype=np.int64) * down
+        input_indexes = (positions // up)[:, None] + offsets[None, :]
+        block_taps = taps[positions % up]
+
+        for channel in range(num_channels):
+            resampled[block_out, channel] = np.einsum(
+                "ij,ij->i", padded[input_indexes, channel], block_taps
+            )
+
+    return resampled
+
+
+class StreamResampler:
+    """Resamples audio that arrives in pieces as if it were one array.
+
+    Input that later output samples still depend on is kept between calls,
+    so the joined output matches resample() on the whole stream.
+    """
+
+    def __init__(self, src_rate: int, dst_rate: int, num_channels: int = 1):
+        self.up, self.down, self.taps, self.half_width = get_resample_filter(
+            src_rate, dst_rate
+        )
+
+        # Zero-padded input (like resample) and its index in the padded stream
+        self._buffer = np.zeros((self.half_width, num_channels), dtype=np.float32)
+        self._buffer_start = 0
+
+        self._num_in = 0
+        self._num_out = 0
+
+    def process(self, audio: np.ndarray) -> np.ndarray:
+        """Resample the next piece of audio with shape (samples, channels)"""
+        self._buffer = np.concatenate(
+            (self._buffer, audio.astype(np.float32, copy=False))
+        )
+        self._num_in += audio.shape[0]
+
+        # Output sample n needs input up to (n * down // up) + half_width
+        ready_in = self._num_in - self.half_width
+        num_ready = max(0, -((-ready_in * self.up) // self.down))
+
+        return self._resample(num_ready)
+
+    def finish(self) -> np.ndarray:
+        """Resample the remaining audio, padding the end with zeros"""
+        self._buffer = np.pad(self._buffer, ((0, self.half_width + 1), (0, 0)))
+        num_out = -((-self._num_in * self.up) // self.down)
+
+        return self._resample(num_out)
+
+    def _resample(self, out_end: int) -> np.ndarray:
+        out_start = self._num_out
+        out_end = max(out_start, out_end)
+
+        resampled = apply_resample_filter(
+            self._buffer,
+            out_start,
+            out_end,
+            self._buffer_start,
+            self.up,
+            self.down,
+            self.taps,
+        )
+        self._num_out = out_end
+
+        # Drop input that no later output sample needs
+        next_start = (out_end * self.down) // self.up + 1
+        if next_start > self._buffer_start:
+            self._buffer = self._buffer[next_start - self._buffer_start :]
+            self._buffer_start = next_start
+
+        return resampled
+
+
+@functools.lru_cache(maxsize=32)
+def get_resample_filter(
+    src_rate: int, dst_rate: int
+) -> typing.Tuple[int, int, np.ndarray, int]:
+    """Create polyphase filter taps for a pair of sample rates.
+
+    Returns up factor, down factor, taps with shape (up, 2 * half_width), and
+    half width of filter (in input samples).
+    """
+    rate_gcd = math.gcd(src_rate, dst_rate)
+    up = dst_rate // rate_gcd
+    down = src_rate // rate_gcd
+
+    # Cut off at the lower Nyquist frequency to avoid aliasing when downsampling
+    cutoff = min(1.0, dst_rate / src_rate)
+    half_width = int(math.ceil(_FILTER_ZEROS / cutoff))
+
+    # Distance (in input samples) from each output phase to each input sample
+    phases = np.arange(up, dtype=np.float64) / up
+    sample_offsets = np.arange(-half_width + 1, half_width + 1, dtype=np.float64)
+    distances = phases[:, None] - sample_offsets[None, :]
+
+    # Kaiser-windowed sinc
+    window_pos = np.clip(distances / half_width, -1.0, 1.0)
+    window = np.i0(_KAISER_BETA * np.sqrt(1.0 - (window_pos**2))) / np.i0(
+        _KAISER_BETA
+    )
+    taps = cutoff * np.sinc(cutoff * distances) * window
+
+    # Normalize each phase for unity gain at DC
+    taps /= taps.sum(axis=1, keepdims=True)
+
+    return up, down, taps.astype(np.float32), half_width
+
+
+# -----------------------------------------------------------------------------
+
+
+@dataclass(eq=False)
+class AudioChunk:
+    """16-bit PCM audio passed between TTS systems and the web server.
+
+    Samples are an int16 array with channels interleaved. WAV bytes are only
+    created (to_wav) when audio leaves the server.
+    """
+
+    samples: np.ndarray
+    sample_rate: int
+    channels: int = 1
+
+    @staticmethod
+    def from_wav(wav_bytes: bytes) -> "AudioChunk":
+        """Load audio from a WAV file, converting to 16-bit if needed"""
+        with io.BytesIO(wav_bytes) as wav_io:
+            wav_file: wave.Wave_read = wave.open(wav_io, "rb")
+            with wav_file:
+                sample_rate = wav_file.getframerate()
+                sample_width = wav_file.getsampwidth()
+                channels = wav_file.getnchannels()
+                frames = wav_file.readframes(wav_file.getnframes())
+
+        if sample_width != 2:
+            frames = float_to_frames(frames_to_float(frames, sample_width, channels), 2)
+
+        return AudioChunk(np.frombuffer(frames, dtype="<i2"), sample_rate, channels)
+
+    @staticmethod
+    def from_array(
+        audio: np.ndarray, sample_rate: int, channels: int = 1
+    ) -> "AudioChunk":
+        """Create chunk from int16 samples or float samples in [-1, 1]"""
+        audio = np.asarray(audio)
+        if audio.dtype != np.int16:
+            audio = np.frombuffer(
+                float_to_frames(audio.reshape(-1, channels), 2), dtype="<i2"
+            )
+
+        return AudioChunk(audio.reshape(-1), sample_rate, channels)
+
+    @staticmethod
+    def silence(seconds: float, sample_rate: int, channels: int = 1) -> "AudioChunk":
+        """Create chunk of silence"""
+        num_frames = int(math.ceil(seconds * sample_rate))
+
+        return AudioChunk(
+            np.zeros(num_frames * channels, dtype=np.int16), sample_rate, channels
+        )
+
+    @staticmethod
+    def join(chunks: typing.Sequence["AudioChunk"]) -> "AudioChunk":
+        """Concatenate chunks with the same rate and channels"""
+        assert chunks, "No audio chunks"
+
+        return AudioChunk(
+            np.concatenate([chunk.samples for chunk in chunks]),
+            chunks[0].sample_rate,
+            chunks[0].channels,
+        )
+
+    @property
+    def num_frames(self) -> int:
+        """Number of samples per channel"""
+        return len(self.samples) // self.channels
+
+    @property
+    def seconds(self) -> float:
+        """Duration of audio"""
+        return self.num_frames / self.sample_rate if self.sample_rate > 0 else 0.0
+
+    @property
+    def nbytes(self) -> int:
+        """Size of samples in bytes"""
+        return self.samples.nbytes
+
+    def to_frames(self) -> bytes:
+        """Get little-endian PCM frames"""
+        return self.samples.astype("<i2", copy=False).tobytes()
+
+    def to_wav(self) -> bytes:
+        """Encode as a complete WAV file"""
+        with io.BytesIO() as wav_io:
+            wav_file: wave.Wave_write = wave.open(wav_io, "wb")
+            with wav_file:
+                wav_file.setframerate(self.sample_rate)
+                wav_file.setsampwidth(2)
+                wav_file.setnchannels(self.channels)
+                wav_file.writeframes(self.samples.astype("<i2", copy=False))
+
+            return wav_io.getvalue()
+
+    def convert(self, sample_rate: int, channels: int = 1) -> "AudioChunk":
+        """Convert to a different rate/channels (CPU-bound if they differ)"""
+        if (sample_rate == self.sample_rate) and (channels == self.channels):
+            return self
+
+        audio = self.samples.reshape(-1, self.channels).astype(np.float32) / (1 << 15)
+        audio = convert_channels(audio, channels)
+        audio = resample(audio, self.sample_rate, sample_rate)
+
+        return AudioChunk.from_array(audio, sample_rate, channels)
+
+
+# -----------------------------------------------------------------------------
+
+
+@dataclass
+class OutputFormat:
+    """Audio format that synthesized speech can be returned in"""
+
+    name: str
+    mimetype: str
+    extension: str
+
+    # Format and subtype for soundfile (None for WAV)
+    sf_format: typing.Optional[str] = None
+    sf_subtype: typing.Optional[str] = None
+
+    # Sample rates supported by the codec (None for any)
+    sample_rates: typing.Optional[typing.Sequence[int]] = None
+
+    # False if the header is only correct once encoding is finished
+    streamable: bool = True
+
+
+OUTPUT_FORMATS: typing.Dict[str, OutputFormat] = {
+    "wav": OutputFormat("wav", "audio/wav", ".wav"),
+    "opus": OutputFormat(
+        "opus",
+        "audio/ogg",
+        ".opus",
+        sf_format="OGG",
+        sf_subtype="OPUS",
+        sample_rates=[8000, 12000, 16000, 24000, 48000],
+    ),
+    "flac": OutputFormat(
+        "flac",
+        "audio/flac",
+        ".flac",
+        sf_format="FLAC",
+        sf_subtype="PCM_16",
+        # STREAMINFO has the total length and checksum
+        streamable=False,
+    ),
+    "mp3": OutputFormat(
+        "mp3",
+        "audio/mpeg",
+        ".mp3",
+        sf_format="MP3",
+        sf_subtype="MPEG_LAYER_III",
+        # Xing/LAME header has the frame count and seek table
+        streamable=False,
+    ),
+}
+
+# Alternative names for ?format= and mimetypes for Accept
+FORMAT_ALIASES: typing.Dict[str, str] = {
+    "wave": "wav",
+    "ogg": "opus",
+    "audio/wav": "wav",
+    "audio/wave": "wav",
+    "audio/x-wav": "wav",
+    "audio/ogg": "opus",
+    "audio/opus": "opus",
+    "audio/flac": "flac",
+    "audio/x-flac": "flac",
+    "audio/mpeg": "mp3",
+    "audio/mp3": "mp3",
+}
+
+
+def get_output_format(name: str) -> OutputFormat:
+    """Get output format by name, alias, or mimetype"""
+    name = name.strip().lower()
+    output_format = OUTPUT_FORMATS.get(FORMAT_ALIASES.get(name, name))
+    if output_format is None:
+        raise ValueError(f"Unsupported audio format: {name}")
+
+    return output_format
+
+
+class _EncodedBuffer:
+    """Seekable in-memory file that tracks bytes not yet sent.
+
+    Encoders may seek back to update headers when they are closed. Those
+    updates only make it into the complete file from getvalue(), since the
+    start of a stream has already been sent.
+    """
+
+    def __init__(self):
+        self._buffer = io.BytesIO()
+        self._sent = 0
+
+    def write(self, data: bytes) -> int:
+        """Write encoded bytes"""
+        return self._buffer.write(data)
+
+    def read(self, size: int = -1) -> bytes:
+        """Read encoded bytes"""
+        return self._buffer.read(size)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        """Move write position"""
+        return self._buffer.seek(offset, whence)
+
+    def tell(self) -> int:
+        """Get write position"""
+        return self._buffer.tell()
+
+    def take(self) -> bytes:
+        """Get bytes written since the last call"""
+        data = self._buffer.getbuffer()[self._sent :].tobytes()
+        self._sent += len(data)
+
+        return data
+
+    def getvalue(self) -> bytes:
+        """Get complete encoded file"""
+        return self._buffer.getvalue()
+
+
+class AudioEncoder:
+    """Incrementally encodes 16-bit PCM audio to a compressed format.
+
+    Formats that aren't streamable are held back until finish, which returns
+    the complete file with its final header.
+
+    Requires the soundfile package (libsndfile >= 1.1 for MP3).
+    Each call may block, so it should be run in an executor.
+    """
+
+    def __init__(
+        self, output_format: OutputFormat, sample_rate: int, num_channels: int = 1
+    ):
+        import soundfile
+
+        assert output_format.sf_format, f"Not an encoded format: {output_format.name}"
+
+        self.output_format = output_format
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+
+        # Resample if codec doesn't support the rate
+        self.encoded_rate = sample_rate
+        if output_format.sample_rates and (
+            sample_rate not in output_format.sample_rates
+        ):
+            self.encoded_rate = min(
+                (rate for rate in output_format.sample_rates if rate >= sample_rate),
+                default=max(output_format.sample_rates),
+            )
+
+        # Resampler state is kept between chunks so streamed audio is continuous
+        self._resampler: typing.Optional[StreamResampler] = None
+        if self.encoded_rate != sample_rate:
+            self._resampler = StreamResampler(
+                sample_rate, self.encoded_rate, num_channels
+            )
+
+        self._buffer = _EncodedBuffer()
+        self._file = soundfile.SoundFile(
+            self._buffer,
+            mode="w",
+            samplerate=self.encoded_rate,
+            channels=num_channels,
+            format=output_format.sf_format,
+            subtype=output_format.sf_subtype,
+        )
+
+    def encode(self, frames: bytes) -> bytes:
+        """Encode 16-bit PCM frames and return newly available encoded bytes"""
+        if self._resampler is not None:
+            audio = frames_to_float(frames, 2, self.num_channels)
+            frames = float_to_frames(self._resampler.process(audio), 2)
+
+        self._write(frames)
+
+        if not self.output_format.streamable:
+            return bytes()
+
+        return self._buffer.take()
+
+    def finish(self) -> bytes:
+        """Flush encoder and return remaining encoded bytes"""
+        if self._resampler is not None:
+            self._write(float_to_frames(self._resampler.finish(), 2))
+
+        self._file.close()
+
+        if not self.output_format.streamable:
+            return self._buffer.getvalue()
+
+        return self._buffer.take()
+
+    def getvalue(self) -> bytes:
+        """Get the complete encoded file (after finish)"""
+        return self._buffer.getvalue()
+
+    def _write(self, frames: bytes):
+        audio = np.frombuffer(frames, dtype="<i2").reshape(-1, self.num_channels)
+        if audio.shape[0] > 0:
+            self._file.write(audio)
+
+
+def encode_audio(audio: AudioChunk, output_format: OutputFormat) -> bytes:
+    """Encode complete audio to a compressed format"""
+    encoder = AudioEncoder(output_format, audio.sample_rate, audio.channels)
+    encoder.encode(audio.to_frames())
+    encoder.finish()
+
+    return encoder.getvalue()
@@ -0,0 +1,98 @@
+"""Background pre-warming of the audio cache"""
+import asyncio
+import json
+import logging
+import typing
+from pathlib import Path
+
+_LOGGER = logging.getLogger("opentts")
+
+# Request parameters (text, voice, and other /api/tts parameters)
+WarmRequest = typing.Dict[str, typing.Any]
+
+# Synthesizes a request into the cache (returns False if it was already cached)
+WarmFunc = typing.Callable[[WarmRequest], typing.Awaitable[bool]]
+
+# -----------------------------------------------------------------------------
+
+
+class CacheWarmer:
+    """Synthesizes requests in the background until they're all cached.
+
+    Requests are synthesized one at a time with a pause in between, so live
+    traffic isn't starved. Failed requests are logged and skipped.
+    """
+
+    def __init__(self, warm_func: WarmFunc, delay: float = 0.0):
+        self.warm_func = warm_func
+        self.delay = delay
+
+        self.total = 0
+        self.warmed = 0
+        self.cached = 0
+        self.failed = 0
+        self.done = False
+
+    async def run(self, requests: typing.Sequence[WarmRequest]):
+        """Synthesize each request that isn't already cached"""
+        self.total += len(requests)
+        _LOGGER.info("Pre-warming cache with %s request(s)", len(requests))
+
+        for request in requests:
+            try:
+                if await self.warm_func(request):
+                    self.warmed += 1
+                else:
+                    self.cached += 1
+            except Exception as e:
+                self.failed += 1
+                _LOGGER.warning(
+                    "Failed to pre-warm %s (%s: %s)",
+                    str(request.get("text", ""))[:50],
+                    e.__class__.__name__,
+                    e,
+                )
+
+            if self.delay > 0:
+                await asyncio.sleep(self.delay)
+
+        self.done = True
+        _LOGGER.info(
+            "Pre-warmed cache (warmed=%s, cached=%s, failed=%s)",
+            self.warmed,
+            self.cached,
+            self.failed,
+        )
+
+    def stats(self) -> typing.Dict[str, typing.Any]:
+        """Get pre-warming progress"""
+        return {
+            "total": self.total,
+            "warmed": self.warmed,
+            "cached": self.cached,
+            "failed": self.failed,
+            "done": self.done,
+        }
+
+
+def load_requests(path: typing.Union[str, Path]) -> typing.List[WarmRequest]:
+    """Load requests from a file with one JSON object per line.
+
+    Blank lines and lines starting with # are skipped.
+    """
+    requests: typing.List[WarmRequest] = []
+
+    with open(path, "r", encoding="utf-8") as requests_file:
+        for line_index, line in enumerate(requests_file):
+            line = line.strip()
+            if (not line) or line.startswith("#"):
+                continue
+
+            request = json.loads(line)
+            assert isinstance(
+                request, dict
+            ), f"Line {line_index + 1} of {path} is not a JSON object"
+
+            requests.append(request)
+
+    return requests
@@ -0,0 +1,301 @@
+"""Concurrency helpers for OpenTTS"""
+import asyncio
+import contextlib
+import functools
+import heapq
+import itertools
+import math
+import time
+import typing
+from collections import deque
+
+T = typing.TypeVar("T")
+
+# Weight of the most recent synthesis time in the running average
+_DURATION_WEIGHT = 0.2
+
+# Slot priorities (lower is served first)
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+# -----------------------------------------------------------------------------
+
+
+class _Flight:
+    """Shared task and the number of callers waiting on it"""
+
+    def __init__(self, task: "asyncio.Future"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into a single call.
+
+    The first caller for a key starts the work and later callers await the
+    same result. The shared work is only cancelled once every caller waiting
+    on it has been cancelled.
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._flights: typing.Dict[str, _Flight] = {}
+
+    async def run(self, key: str, func: typing.Callable[[], typing.Awaitable[T]]) -> T:
+        """Run func or wait for the in-flight call with the same key"""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(func()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(
+                functools.partial(self._finished, key, flight)
+            )
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if (flight.waiters <= 1) and (not flight.task.done()):
+                # No one else is waiting
+                flight.task.cancel()
+
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def _finished(self, key: str, flight: _Flight, _task: "asyncio.Future"):
+        if self._flights.get(key) is flight:
+            self._flights.pop(key, None)
+
+
+# -----------------------------------------------------------------------------
+
+
+async def run_ordered(
+    aws: typing.Iterable[typing.Awaitable[T]], max_pending: int = 1
+) -> typing.AsyncIterator[T]:
+    """Run awaitables concurrently and yield their results in order.
+
+    At most max_pending awaitables are scheduled at once, and aws is only
+    consumed as results are yielded. Pending tasks are cancelled if the
+    generator is closed early.
+    """
+    max_pending = max(1, max_pending)
+    pending: "typing.Deque[asyncio.Future]" = deque()
+
+    try:
+        for aw in aws:
+            pending.append(asyncio.ensure_future(aw))
+
+            if len(pending) >= max_pending:
+                yield await pending.popleft()
+
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+# -----------------------------------------------------------------------------
+
+
+class DeadlineExceededError(Exception):
+    """Raised when a request isn't done before its deadline"""
+
+    def __init__(self, timeout: float):
+        super().__init__(f"Request not done within {timeout} second(s)")
+        self.timeout = timeout
+
+
+class Deadline:
+    """Time limit for a request.
+
+    Work that's still running when the deadline passes is cancelled, which
+    also cancels queued sentences and stops programs synthesizing them.
+    """
+
+    def __init__(self, timeout: typing.Optional[float] = None):
+        self.timeout = timeout
+        self.expires: typing.Optional[float] = None
+
+        if timeout is not None:
+            self.expires = time.monotonic() + timeout
+
+    def remaining(self) -> typing.Optional[float]:
+        """Seconds left until the deadline (None if there isn't one)"""
+        if self.expires is None:
+            return None
+
+        return max(0.0, self.expires - time.monotonic())
+
+    async def run(self, aw: typing.Awaitable[T]) -> T:
+        """Await aw, cancelling it if the deadline passes first"""
+        if self.timeout is None:
+            return await aw
+
+        try:
+            return await asyncio.wait_for(aw, self.remaining())
+        except asyncio.TimeoutError:
+            raise DeadlineExceededError(self.timeout) from None
+
+    async def iterate(
+        self, chunks: typing.AsyncGenerator[T, None]
+    ) -> typing.AsyncIterator[T]:
+        """Yield from chunks, closing it if the deadline passes first"""
+        try:
+            while True:
+                try:
+                    chunk = await self.run(chunks.__anext__())
+                except StopAsyncIteration:
+                    break
+
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+
+# -----------------------------------------------------------------------------
+
+
+class EngineBusyError(Exception):
+    """Raised when a TTS system can't accept more work"""
+
+    def __init__(self, engine: str, retry_after: int):
+        super().__init__(f"{engine} is busy, retry after {retry_after} second(s)")
+        self.engine = engine
+        self.retry_after = retry_after
+
+
+class EngineLimiter:
+    """Admission control for a single TTS system.
+
+    At most max_concurrency callers hold a slot at once. Up to max_queue more
+    may wait for a slot, each for no longer than max_wait seconds. Callers
+    beyond that are rejected immediately with EngineBusyError, so overload
+    fails fast instead of growing an unbounded queue.
+
+    Waiting callers get free slots in order of priority, then arrival.
+    """
+
+    def __init__(
+        self,
+        engine: str,
+        max_concurrency: typing.Optional[int] = None,
+        max_queue: typing.Optional[int] = None,
+        max_wait: typing.Optional[float] = None,
+    ):
+        self.engine = engine
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+        # Running average of how long a slot is held (seconds)
+        self.avg_duration: typing.Optional[float] = None
+
+        # Slots not held or handed to a waiter
+        self._free_slots = max_concurrency or 0
+
+        # Waiting callers as (priority, arrival, future)
+        self._waiters: typing.List[typing.Tuple[int, int, "asyncio.Future"]] = []
+        self._arrivals = itertools.count()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_NORMAL) -> typing.AsyncIterator[None]:
+        """Hold a slot for the duration of a synthesis"""
+        if self.max_concurrency is not None:
+            await self._acquire(priority)
+
+        self.active += 1
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._record_duration(time.perf_counter() - start_time)
+
+            if self.max_concurrency is not None:
+                self._release()
+
+    def retry_after(self) -> int:
+        """Estimate seconds until a slot is likely to be free"""
+        if (self.avg_duration is None) or (not self.max_concurrency):
+            return 1
+
+        # Time for the queue ahead to drain
+        rounds = (self.waiting / self.max_concurrency) + 1
+        return max(1, int(math.ceil(self.avg_duration * rounds)))
+
+    def stats(self) -> typing.Dict[str, typing.Any]:
+        """Get limiter statistics"""
+        return {
+            "active": self.active,
+            "queued": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "max_wait": self.max_wait,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+        }
+
+    async def _acquire(self, priority: int):
+        assert self.max_concurrency is not None
+
+        if (self._free_slots > 0) and (not self._waiters):
+            # Free slot and no one ahead
+            self._free_slots -= 1
+            return
+
+        if (self.max_queue is not None) and (self.waiting >= self.max_queue):
+            self.rejected += 1
+            raise EngineBusyError(self.engine, self.retry_after())
+
+        future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        waiter = (priority, next(self._arrivals), future)
+        heapq.heappush(self._waiters, waiter)
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done():
+                # Slot was handed over at the same time, pass it on
+                self._release()
+            else:
+                future.cancel()
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+
+            if isinstance(e, asyncio.TimeoutError):
+                self.timeouts += 1
+                raise EngineBusyError(self.engine, self.retry_after())
+
+            raise
+        finally:
+            self.waiting -= 1
+
+    def _release(self):
+        # Hand slot directly to the next waiter, so it can't be taken by a
+        # caller that arrives before the waiter wakes up.
+        if self._waiters:
+            _priority, _arrival, future = heapq.heappop(self._waiters)
+            future.set_result(None)
+        else:
+            self._free_slots += 1
+
+    def _record_duration(self, duration: float):
+        if self.avg_duration is None:
+            self.avg_duration = duration
+        else:
+            self.avg_duration += _DURATION_WEIGHT * (duration - self.avg_duration)
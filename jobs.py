@@ -0,0 +1,234 @@
+"""Long-running synthesis jobs whose audio is written to disk"""
+import asyncio
+import logging
+import struct
+import time
+import typing
+from pathlib import Path
+from uuid import uuid4
+
+_LOGGER = logging.getLogger("opentts")
+
+# Bytes read at a time when streaming job audio
+_READ_SIZE = 64 * 1024
+
+# Size of a canonical WAV header (RIFF + fmt + data)
+_WAV_HEADER_SIZE = 44
+
+# Placeholder chunk size used by streaming WAV headers
+_UNKNOWN_SIZE = 0xFFFFFFFF
+
+JobAudio = typing.Callable[["Job"], typing.AsyncIterator[bytes]]
+
+# -----------------------------------------------------------------------------
+
+
+class Job:
+    """Single synthesis job"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, job_id: str, audio_path: Path, sentences_total: int = 0):
+        self.id = job_id
+        self.audio_path = audio_path
+        self.status = Job.QUEUED
+        self.error: typing.Optional[str] = None
+
+        self.created = time.time()
+        self.started: typing.Optional[float] = None
+        self.finished: typing.Optional[float] = None
+
+        self.sentences_total = sentences_total
+        self.sentences_done = 0
+        self.bytes_written = 0
+
+        self.task: typing.Optional["asyncio.Future"] = None
+
+        # Replaced each time audio is written or the job finishes
+        self.changed = asyncio.Event()
+
+    @property
+    def is_finished(self) -> bool:
+        """True if no more audio will be written"""
+        return self.status in {Job.DONE, Job.FAILED, Job.CANCELLED}
+
+    def sentence_done(self):
+        """Record that another sentence was synthesized"""
+        self.sentences_done += 1
+
+    def notify(self):
+        """Wake up readers waiting for audio"""
+        changed = self.changed
+        self.changed = asyncio.Event()
+        changed.set()
+
+    def to_dict(self) -> typing.Dict[str, typing.Any]:
+        """Get job status as a JSON-compatible dict"""
+        if self.status == Job.DONE:
+            progress = 1.0
+        elif self.sentences_total > 0:
+            progress = min(1.0, self.sentences_done / self.sentences_total)
+        else:
+            progress = 0.0
+
+        return {
+            "id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "sentences_total": self.sentences_total,
+            "sentences_done": self.sentences_done,
+            "progress": progress,
+            "bytes": self.bytes_written,
+        }
+
+
+class JobNotFoundError(Exception):
+    """Raised when a job id is unknown or has expired"""
+
+
+class JobManager:
+    """Runs synthesis jobs in the background and keeps their audio on disk.
+
+    Audio is appended to a file as it's produced, so memory use doesn't grow
+    with the length of the text, and it can be read back while the job is
+    still running. Finished jobs are removed after ttl seconds.
+    """
+
+    def __init__(self, jobs_dir: typing.Union[str, Path], ttl: float, max_running: int):
+        self.jobs_dir = Path(jobs_dir)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+
+        self.ttl = ttl
+        self.jobs: typing.Dict[str, Job] = {}
+        self._running = asyncio.Semaphore(max(1, max_running))
+
+    def create(self, job_audio: JobAudio, sentences_total: int = 0) -> Job:
+        """Start a new job that writes the audio from job_audio"""
+        job_id = uuid4().hex
+        job = Job(job_id, self.jobs_dir / f"{job_id}.wav", sentences_total)
+
+        # Readers may open the file before any audio has been written
+        job.audio_path.touch()
+
+        self.jobs[job_id] = job
+        job.task = asyncio.ensure_future(self._run(job, job_audio))
+
+        return job
+
+    def get(self, job_id: str) -> Job:
+        """Get job by id"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise JobNotFoundError(job_id)
+
+        return job
+
+    def remove(self, job_id: str):
+        """Cancel job (if running) and delete its audio"""
+        job = self.get(job_id)
+        if (job.task is not None) and (not job.task.done()):
+            job.task.cancel()
+
+        self.jobs.pop(job_id, None)
+        job.audio_path.unlink(missing_ok=True)
+
+    async def read_audio(self, job: Job) -> typing.AsyncIterator[bytes]:
+        """Yield job audio as it's written, until the job is finished"""
+        with open(job.audio_path, "rb") as audio_file:
+            while True:
+                # Get event before reading to avoid missing a notification
+                changed = job.changed
+                is_finished = job.is_finished
+
+                data = audio_file.read(_READ_SIZE)
+                if data:
+                    yield data
+                elif is_finished:
+                    break
+                else:
+                    await changed.wait()
+
+    async def expire_forever(self):
+        """Remove finished jobs older than the TTL"""
+        while True:
+            await asyncio.sleep(max(1.0, self.ttl / 10))
+
+            now = time.time()
+            for job in list(self.jobs.values()):
+                if (job.finished is not None) and ((now - job.finished) > self.ttl):
+                    _LOGGER.debug("Job expired: %s", job.id)
+
+                    try:
+                        self.remove(job.id)
+                    except Exception:
+                        _LOGGER.exception("remove job")
+
+    def cancel_all(self):
+        """Cancel all running jobs"""
+        for job in self.jobs.values():
+            if (job.task is not None) and (not job.task.done()):
+                job.task.cancel()
+
+    def stats(self) -> typing.Dict[str, int]:
+        """Get number of jobs with each status"""
+        status_counts: typing.Dict[str, int] = {}
+        for job in self.jobs.values():
+            status_counts[job.status] = status_counts.get(job.status, 0) + 1
+
+        return status_counts
+
+    # -------------------------------------------------------------------------
+
+    async def _run(self, job: Job, job_audio: JobAudio):
+        try:
+            async with self._running:
+                job.status = Job.RUNNING
+                job.started = time.time()
+                _LOGGER.debug("Job started: %s", job.id)
+
+                with open(job.audio_path, "wb") as audio_file:
+                    async for chunk in job_audio(job):
+                        audio_file.write(chunk)
+                        audio_file.flush()
+                        job.bytes_written += len(chunk)
+                        job.notify()
+
+                finalize_wav(job.audio_path)
+                job.status = Job.DONE
+        except asyncio.CancelledError:
+            job.status = Job.CANCELLED
+        except Exception as e:
+            _LOGGER.exception("job %s", job.id)
+            job.status = Job.FAILED
+            job.error = f"{e.__class__.__name__}: {e}"
+        finally:
+            job.finished = time.time()
+            job.notify()
+            _LOGGER.debug("Job %s: %s", job.status, job.id)
+
+
+def finalize_wav(wav_path: Path):
+    """Replace unknown sizes in a streaming WAV header with the actual sizes"""
+    file_size = wav_path.stat().st_size
+    if file_size < _WAV_HEADER_SIZE:
+        return
+
+    with open(wav_path, "r+b") as wav_file:
+        wav_file.seek(4)
+        (riff_size,) = struct.unpack("<I", wav_file.read(4))
+        if riff_size != _UNKNOWN_SIZE:
+            # Complete WAV (e.g., from cache)
+            return
+
+        wav_file.seek(4)
+        wav_file.write(struct.pack("<I", file_size - 8))
+
+        wav_file.seek(_WAV_HEADER_SIZE - 4)
+        wav_file.write(struct.pack("<I", file_size - _WAV_HEADER_SIZE))
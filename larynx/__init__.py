@@ -55,6 +55,47 @@ def text_to_speech(
     custom_voices_dir: typing.Optional[typing.Union[str, Path]] = None,
     url_format: str = DEFAULT_VOICE_URL_FORMAT,
 ) -> typing.Iterable[TextToSpeechResult]:
+    sentences = submit_text_to_speech(
+        text,
+        voice_or_lang=voice_or_lang,
+        vocoder_or_quality=vocoder_or_quality,
+        ssml=ssml,
+        tts_settings=tts_settings,
+        vocoder_settings=vocoder_settings,
+        denoiser_strength=denoiser_strength,
+        executor=executor,
+        custom_voices_dir=custom_voices_dir,
+        url_format=url_format,
+    )
+
+    try:
+        for future, result in sentences:
+            result.audio = future.result()
+
+            yield result
+    finally:
+        # Drop sentences that haven't started if the generator is closed early
+        for future, _result in sentences:
+            future.cancel()
+
+
+def submit_text_to_speech(
+    text: str,
+    voice_or_lang: str = "en-us",
+    vocoder_or_quality: typing.Union[str, VocoderQuality] = VocoderQuality.HIGH,
+    ssml: bool = False,
+    tts_settings: typing.Optional[typing.Dict[str, typing.Any]] = None,
+    vocoder_settings: typing.Optional[typing.Dict[str, typing.Any]] = None,
+    denoiser_strength: float = 0.0,
+    executor: typing.Optional[Executor] = None,
+    custom_voices_dir: typing.Optional[typing.Union[str, Path]] = None,
+    url_format: str = DEFAULT_VOICE_URL_FORMAT,
+) -> typing.List[typing.Tuple[Future, TextToSpeechResult]]:
+    """Submit each sentence to the executor without waiting for audio.
+
+    Returns a (future, result) pair per sentence in order. Futures can be
+    cancelled to drop sentences that haven't started yet.
+    """
     resolved_name = resolve_voice_name(voice_or_lang)
     voice_lang, _voice_name, _voice_model_type = split_voice_name(resolved_name)
     voice_lang = gruut.resolve_lang(voice_lang)
@@ -62,7 +103,7 @@ def text_to_speech(
     if executor is None:
         executor = ThreadPoolExecutor()
 
-    futures: typing.Dict[Future, TextToSpeechResult] = {}
+    sentences: typing.List[typing.Tuple[Future, TextToSpeechResult]] = []
 
     for sentence in gruut.sentences(
         text, lang=voice_lang, ssml=ssml, explicit_lang=False
@@ -135,16 +176,18 @@ def text_to_speech(
             pause_after_ms=sentence.pause_after_ms,
         )
 
-        futures[future] = TextToSpeechResult(
-            text=sentence.text_with_ws,
-            audio=None,
-            sample_rate=audio_settings.sample_rate,
+        sentences.append(
+            (
+                future,
+                TextToSpeechResult(
+                    text=sentence.text_with_ws,
+                    audio=None,
+                    sample_rate=audio_settings.sample_rate,
+                ),
+            )
         )
 
-    for future, result in futures.items():
-        result.audio = future.result()
-
-        yield result
+    return sentences
 
 
 # lang -> phoneme -> id
@@ -239,6 +282,7 @@ def get_tts_model(
     lang: str = "en-us",
     url_format: str = DEFAULT_VOICE_URL_FORMAT,
     custom_voices_dir: typing.Optional[typing.Union[str, Path]] = None,
+    session_options: typing.Optional[onnxruntime.SessionOptions] = None,
 ) -> typing.Optional[TextToSpeechModel]:
     resolved_name = resolve_voice_name(name or gruut.resolve_lang(lang))
 
@@ -297,7 +341,9 @@ def get_tts_model(
             audio_settings = AudioSettings(**config["audio"])
 
         # Load checkpoint
-        model = load_tts_model(voice_model_type, model_dir,)
+        model = load_tts_model(
+            voice_model_type, model_dir, session_options=session_options
+        )
         setattr(model, "phoneme_to_id", phoneme_to_id)
         setattr(model, "audio_settings", audio_settings)
 
@@ -319,9 +365,10 @@ def load_tts_model(
     model_type: typing.Union[str, TextToSpeechType],
     model_path: typing.Union[str, Path],
     no_optimizations: bool = False,
+    session_options: typing.Optional[onnxruntime.SessionOptions] = None,
 ) -> TextToSpeechModel:
     """Load the appropriate text to speech model"""
-    sess_options = onnxruntime.SessionOptions()
+    sess_options = session_options or onnxruntime.SessionOptions()
     if no_optimizations:
         sess_options.graph_optimization_level = (
             onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
@@ -349,6 +396,7 @@ def get_vocoder_model(
     denoiser_strength: float = 0.0,
     url_format: str = DEFAULT_VOICE_URL_FORMAT,
     custom_voices_dir: typing.Optional[typing.Union[str, Path]] = None,
+    session_options: typing.Optional[onnxruntime.SessionOptions] = None,
 ) -> typing.Optional[VocoderModel]:
     # Try to load model from cache first
     maybe_model = _VOCODER_MODEL_CACHE.get(name_or_quality)
@@ -382,7 +430,10 @@ def get_vocoder_model(
         _LOGGER.debug("Using vocoder at %s", model_dir)
 
         model = load_vocoder_model(
-            VocoderType.HIFI_GAN, model_dir, denoiser_strength=denoiser_strength,
+            VocoderType.HIFI_GAN,
+            model_dir,
+            denoiser_strength=denoiser_strength,
+            session_options=session_options,
         )
 
         # Cache
@@ -399,9 +450,10 @@ def load_vocoder_model(
     no_optimizations: bool = False,
     denoiser_strength: float = 0.0,
     executor: typing.Optional[Executor] = None,
+    session_options: typing.Optional[onnxruntime.SessionOptions] = None,
 ) -> VocoderModel:
     """Load the appropriate vocoder model"""
-    sess_options = onnxruntime.SessionOptions()
+    sess_options = session_options or onnxruntime.SessionOptions()
     if no_optimizations:
         sess_options.graph_optimization_level = (
             onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
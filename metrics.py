@@ -0,0 +1,349 @@
+"""Metrics for OpenTTS in Prometheus text format"""
+import bisect
+import math
+import threading
+import typing
+
+# Content type of Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = typing.Tuple[str, ...]
+
+# -----------------------------------------------------------------------------
+
+
+class Metric:
+    """Named metric with a fixed set of labels"""
+
+    metric_type = "untyped"
+
+    def __init__(
+        self, name: str, help_text: str, label_names: typing.Sequence[str] = ()
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+
+        self._values: typing.Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, *label_values: str):
+        """Set value (used to export counts kept elsewhere)"""
+        with self._lock:
+            self._values[self._labels(label_values)] = value
+
+    def samples(self) -> typing.Iterable[typing.Tuple[str, LabelValues, float]]:
+        """Get (suffix, label values, value) for each sample"""
+        with self._lock:
+            return [("", labels, value) for labels, value in self._values.items()]
+
+    def render(self) -> typing.Iterable[str]:
+        """Get lines in Prometheus text format"""
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} {self.metric_type}"
+
+        for suffix, labels, value in self.samples():
+            yield (
+                f"{self.name}{suffix}"
+                f"{format_labels(self.label_names, labels)} {format_value(value)}"
+            )
+
+    def _labels(self, label_values: typing.Sequence[str]) -> LabelValues:
+        assert len(label_values) == len(
+            self.label_names
+        ), f"Expected labels {self.label_names} for {self.name}"
+
+        return tuple(str(v) for v in label_values)
+
+
+class Counter(Metric):
+    """Value that only goes up"""
+
+    metric_type = "counter"
+
+    def inc(self, *label_values: str, amount: float = 1):
+        """Increase counter"""
+        labels = self._labels(label_values)
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    """Value that goes up and down"""
+
+    metric_type = "gauge"
+
+
+class Histogram(Metric):
+    """Counts of observations in cumulative buckets"""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label_names: typing.Sequence[str] = (),
+        buckets: typing.Sequence[float] = (0.1, 0.5, 1, 5, 10),
+    ):
+        super().__init__(name, help_text, label_names)
+        self.buckets = sorted(buckets)
+
+        # labels -> (bucket counts, sum, count)
+        self._histograms: typing.Dict[
+            LabelValues, typing.Tuple[typing.List[int], float, int]
+        ] = {}
+
+    def observe(self, value: float, *label_values: str):
+        """Add an observation"""
+        labels = self._labels(label_values)
+        with self._lock:
+            bucket_counts, value_sum, value_count = self._histograms.get(
+                labels, ([0] * len(self.buckets), 0.0, 0)
+            )
+
+            bucket_index = bisect.bisect_left(self.buckets, value)
+            if bucket_index < len(bucket_counts):
+                bucket_counts[bucket_index] += 1
+
+            self._histograms[labels] = (
+                bucket_counts,
+                value_sum + value,
+                value_count + 1,
+            )
+
+    def take(
+        self,
+    ) -> typing.List[typing.Tuple[LabelValues, typing.List[int], float, int]]:
+        """Remove and return (labels, bucket counts, sum, count) for each label set.
+
+        Used to send observations from a worker process to the web server.
+        """
+        with self._lock:
+            histograms = [
+                (labels, bucket_counts, value_sum, value_count)
+                for labels, (
+                    bucket_counts,
+                    value_sum,
+                    value_count,
+                ) in self._histograms.items()
+            ]
+            self._histograms = {}
+
+        return histograms
+
+    def merge(
+        self,
+        label_values: typing.Sequence[str],
+        bucket_counts: typing.Sequence[int],
+        value_sum: float,
+        value_count: int,
+    ):
+        """Add observations taken from another histogram with the same buckets"""
+        labels = self._labels(label_values)
+        with self._lock:
+            old_counts, old_sum, old_count = self._histograms.get(
+                labels, ([0] * len(self.buckets), 0.0, 0)
+            )
+
+            self._histograms[labels] = (
+                [old + new for old, new in zip(old_counts, bucket_counts)],
+                old_sum + value_sum,
+                old_count + value_count,
+            )
+
+    def render(self) -> typing.Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} {self.metric_type}"
+
+        with self._lock:
+            histograms = [
+                (labels, list(bucket_counts), value_sum, value_count)
+                for labels, (
+                    bucket_counts,
+                    value_sum,
+                    value_count,
+                ) in self._histograms.items()
+            ]
+
+        bucket_label_names = self.label_names + ("le",)
+        for labels, bucket_counts, value_sum, value_count in histograms:
+            cumulative_count = 0
+            for bucket, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative_count += bucket_count
+                bucket_labels = format_labels(
+                    bucket_label_names, labels + (format_value(bucket),)
+                )
+                yield f"{self.name}_bucket{bucket_labels} {cumulative_count}"
+
+            inf_labels = format_labels(bucket_label_names, labels + ("+Inf",))
+            yield f"{self.name}_bucket{inf_labels} {value_count}"
+
+            sample_labels = format_labels(self.label_names, labels)
+            yield f"{self.name}_sum{sample_labels} {format_value(value_sum)}"
+            yield f"{self.name}_count{sample_labels} {value_count}"
+
+
+# -----------------------------------------------------------------------------
+
+
+MetricType = typing.TypeVar("MetricType", bound=Metric)
+
+
+class Registry:
+    """Collection of metrics to export"""
+
+    def __init__(self):
+        self.metrics: typing.List[Metric] = []
+
+    def add(self, metric: MetricType) -> MetricType:
+        """Add metric to registry"""
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Get all metrics in Prometheus text format"""
+        lines: typing.List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+
+        lines.append("")
+
+        return "\n".join(lines)
+
+
+def format_labels(
+    label_names: typing.Sequence[str], label_values: typing.Sequence[str]
+) -> str:
+    """Format labels as {name="value",...}"""
+    if not label_names:
+        return ""
+
+    label_strs = []
+    for name, value in zip(label_names, label_values):
+        value = value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        label_strs.append(f'{name}="{value}"')
+
+    return "{" + ",".join(label_strs) + "}"
+
+
+def format_value(value: float) -> str:
+    """Format sample value"""
+    if isinstance(value, int):
+        return str(value)
+
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+
+    if value.is_integer():
+        return str(int(value))
+
+    return repr(value)
+
+
+# -----------------------------------------------------------------------------
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.add(
+    Counter(
+        "opentts_http_requests_total",
+        "HTTP requests by endpoint and status code",
+        ["endpoint", "status"],
+    )
+)
+
+HTTP_REQUEST_SECONDS = REGISTRY.add(
+    Histogram(
+        "opentts_http_request_duration_seconds",
+        "Time to handle HTTP requests (until response headers)",
+        ["endpoint"],
+        buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30],
+    )
+)
+
+SYNTHESES = REGISTRY.add(
+    Counter(
+        "opentts_syntheses_total",
+        "Lines/sentences synthesized by TTS system, voice, and result",
+        ["tts", "voice", "result"],
+    )
+)
+
+SYNTHESIS_SECONDS = REGISTRY.add(
+    Histogram(
+        "opentts_synthesis_duration_seconds",
+        "Time to synthesize a line/sentence",
+        ["tts", "voice"],
+        buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30],
+    )
+)
+
+AUDIO_SECONDS = REGISTRY.add(
+    Counter(
+        "opentts_audio_seconds_total",
+        "Seconds of audio synthesized",
+        ["tts", "voice"],
+    )
+)
+
+REAL_TIME_FACTOR = REGISTRY.add(
+    Histogram(
+        "opentts_real_time_factor",
+        "Synthesis time divided by audio duration (< 1 is faster than real-time)",
+        ["tts", "voice"],
+        buckets=[0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5],
+    )
+)
+
+CACHE_HITS = REGISTRY.add(
+    Counter("opentts_cache_hits_total", "Audio cache hits", ["cache"])
+)
+
+CACHE_MISSES = REGISTRY.add(
+    Counter("opentts_cache_misses_total", "Audio cache misses", ["cache"])
+)
+
+CACHE_BYTES = REGISTRY.add(
+    Gauge("opentts_cache_bytes", "Size of cached audio", ["cache"])
+)
+
+ENGINE_ACTIVE = REGISTRY.add(
+    Gauge("opentts_engine_active", "Syntheses in progress by TTS system", ["tts"])
+)
+
+ENGINE_QUEUED = REGISTRY.add(
+    Gauge(
+        "opentts_engine_queued",
+        "Syntheses waiting for a TTS system (queue depth)",
+        ["tts"],
+    )
+)
+
+ENGINE_REJECTED = REGISTRY.add(
+    Counter(
+        "opentts_engine_rejected_total",
+        "Syntheses rejected because a TTS system was busy",
+        ["tts"],
+    )
+)
+
+MODEL_LOAD_SECONDS = REGISTRY.add(
+    Histogram(
+        "opentts_model_load_duration_seconds",
+        "Time to load a voice or vocoder model",
+        ["tts", "model"],
+        buckets=[0.1, 0.5, 1, 2.5, 5, 10, 30, 60],
+    )
+)
+
+MODEL_BYTES = REGISTRY.add(
+    Gauge("opentts_model_bytes", "Approximate size of loaded voice/vocoder models")
+)
+
+MODEL_EVICTIONS = REGISTRY.add(
+    Counter(
+        "opentts_model_evictions_total",
+        "Voice/vocoder models unloaded to stay within --model-cache-size",
+    )
+)
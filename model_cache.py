@@ -0,0 +1,125 @@
+"""Memory-budgeted cache of loaded TTS models"""
+import logging
+import threading
+import typing
+from collections import OrderedDict
+from pathlib import Path
+
+_LOGGER = logging.getLogger("opentts")
+
+# -----------------------------------------------------------------------------
+
+
+class _LoadedModel:
+    """Approximate size of a loaded model and how to unload it"""
+
+    def __init__(self, size: int, unload: typing.Callable[[], None]):
+        self.size = size
+        self.unload = unload
+
+
+class ModelCache:
+    """Tracks models loaded by TTS systems and unloads least recently used ones.
+
+    TTS systems add each model they load along with its approximate size and
+    a callback that drops their references to it. When the total size goes
+    over max_bytes, least recently used models are unloaded until it fits.
+    Pinned models are never unloaded.
+
+    Keys are in the form tts:model (e.g., glow-speak:en-us_mary_ann).
+    """
+
+    def __init__(self, max_bytes: typing.Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.loads = 0
+        self.evictions = 0
+
+        self._models: "OrderedDict[str, _LoadedModel]" = OrderedDict()
+        self._pinned: typing.Set[str] = set()
+        self._lock = threading.Lock()
+
+    def add(self, key: str, size: int, unload: typing.Callable[[], None]):
+        """Record a newly loaded model, unloading others if over budget"""
+        evicted: typing.List[typing.Tuple[str, _LoadedModel]] = []
+
+        with self._lock:
+            old_model = self._models.pop(key, None)
+            if old_model is not None:
+                self.total_bytes -= old_model.size
+
+            self._models[key] = _LoadedModel(size, unload)
+            self.total_bytes += size
+            self.loads += 1
+
+            if self.max_bytes is not None:
+                # Oldest first, never the model that was just loaded
+                for old_key in list(self._models.keys()):
+                    if self.total_bytes <= self.max_bytes:
+                        break
+
+                    if (old_key == key) or (old_key in self._pinned):
+                        continue
+
+                    old_model = self._models.pop(old_key)
+                    self.total_bytes -= old_model.size
+                    self.evictions += 1
+                    evicted.append((old_key, old_model))
+
+        for old_key, old_model in evicted:
+            _LOGGER.debug("Unloading model %s (%s byte(s))", old_key, old_model.size)
+
+            try:
+                old_model.unload()
+            except Exception:
+                _LOGGER.exception("unload %s", old_key)
+
+        if (self.max_bytes is not None) and (self.total_bytes > self.max_bytes):
+            _LOGGER.warning(
+                "Loaded models (%s byte(s)) are over budget (%s byte(s))",
+                self.total_bytes,
+                self.max_bytes,
+            )
+
+    def touch(self, key: str):
+        """Mark model as most recently used"""
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+
+    def pin(self, key: str):
+        """Never unload model (may be pinned before it's loaded)"""
+        with self._lock:
+            self._pinned.add(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._models
+
+    def stats(self) -> typing.Dict[str, typing.Any]:
+        """Get cache statistics"""
+        with self._lock:
+            return {
+                "models": list(self._models.keys()),
+                "pinned": sorted(self._pinned),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+
+def get_model_size(*model_paths: typing.Union[str, Path]) -> int:
+    """Estimate memory used by a model from the size of its files"""
+    size = 0
+    for model_path in model_paths:
+        model_path = Path(model_path)
+        if model_path.is_file():
+            size += model_path.stat().st_size
+        elif model_path.is_dir():
+            size += sum(
+                file_path.stat().st_size
+                for file_path in model_path.rglob("*")
+                if file_path.is_file()
+            )
+
+    return size
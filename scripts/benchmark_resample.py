@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Compares in-process audio conversion against sox subprocesses.
+
+Simulates the chunks produced by mixed-voice SSML: sentences at several
+sample rates plus short pauses, all converted to a single output format.
+
+Assumes sox is installed (otherwise only the in-process path is timed).
+"""
+import argparse
+import io
+import logging
+import shutil
+import subprocess
+import sys
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+_DIR = Path(__file__).parent
+sys.path.insert(0, str(_DIR.parent))
+
+from audio import convert_frames  # noqa: E402
+
+_LOGGER = logging.getLogger("benchmark_resample")
+
+# -----------------------------------------------------------------------------
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(prog="benchmark_resample.py")
+    parser.add_argument(
+        "--rates",
+        nargs="+",
+        type=int,
+        default=[16000, 22050],
+        help="Sample rates of synthesized chunks (default: 16000 22050)",
+    )
+    parser.add_argument(
+        "--output-rate",
+        type=int,
+        default=22050,
+        help="Sample rate of final audio (default: 22050)",
+    )
+    parser.add_argument(
+        "--sentence-seconds",
+        type=float,
+        default=3.0,
+        help="Length of each sentence chunk (default: 3.0)",
+    )
+    parser.add_argument(
+        "--pause-seconds",
+        type=float,
+        default=0.5,
+        help="Length of each pause chunk (default: 0.5)",
+    )
+    parser.add_argument(
+        "--chunks",
+        type=int,
+        default=20,
+        help="Number of sentence chunks (default: 20)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    # Create chunks, alternating between sample rates
+    rng = np.random.default_rng(0)
+    chunks = []
+    for chunk_idx in range(args.chunks):
+        rate = args.rates[chunk_idx % len(args.rates)]
+        num_samples = int(args.sentence_seconds * rate)
+        noise = rng.normal(scale=0.1, size=num_samples)
+        chunks.append((rate, np.clip(noise * 32767, -32768, 32767).astype("<i2")))
+
+        num_pause = int(args.pause_seconds * rate)
+        chunks.append((rate, np.zeros(num_pause, dtype="<i2")))
+
+    total_seconds = sum(len(samples) / rate for rate, samples in chunks)
+    _LOGGER.info(
+        "%s chunk(s), %0.2f second(s) of audio", len(chunks), total_seconds,
+    )
+
+    # In-process
+    start_time = time.perf_counter()
+    for rate, samples in chunks:
+        convert_frames(samples.tobytes(), rate, 2, 1, args.output_rate, 2, 1)
+
+    end_time = time.perf_counter()
+    _LOGGER.info("numpy: %0.4f second(s)", end_time - start_time)
+
+    # sox
+    if not shutil.which("sox"):
+        _LOGGER.warning("sox not found, skipping")
+        return
+
+    wav_chunks = [make_wav(rate, samples) for rate, samples in chunks]
+    start_time = time.perf_counter()
+    for wav_bytes in wav_chunks:
+        subprocess.run(
+            [
+                "sox",
+                "-t",
+                "wav",
+                "-",
+                "-t",
+                "raw",
+                "-r",
+                str(args.output_rate),
+                "-b",
+                "16",
+                "-c",
+                "1",
+                "-",
+            ],
+            input=wav_bytes,
+            stdout=subprocess.PIPE,
+            check=True,
+        )
+
+    end_time = time.perf_counter()
+    _LOGGER.info("sox: %0.4f second(s)", end_time - start_time)
+
+
+def make_wav(sample_rate: int, samples: np.ndarray) -> bytes:
+    """Create 16-bit mono WAV file"""
+    with io.BytesIO() as wav_io:
+        wav_file: wave.Wave_write = wave.open(wav_io, "wb")
+        with wav_file:
+            wav_file.setframerate(sample_rate)
+            wav_file.setsampwidth(2)
+            wav_file.setnchannels(1)
+            wav_file.writeframes(samples.tobytes())
+
+        return wav_io.getvalue()
+
+
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    main()
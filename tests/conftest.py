@@ -0,0 +1,6 @@
+"""Shared test setup"""
+import sys
+from pathlib import Path
+
+# Modules live at the top of the repository
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,43 @@
+"""Tests for audio conversion and encoding"""
+import io
+
+import numpy as np
+import pytest
+
+from audio import OUTPUT_FORMATS, AudioChunk, AudioEncoder, encode_audio
+
+soundfile = pytest.importorskip("soundfile")
+
+
+def make_tone(seconds: float, sample_rate: int = 22050) -> AudioChunk:
+    """Create a 440 Hz tone"""
+    times = np.arange(int(seconds * sample_rate)) / sample_rate
+    samples = (np.sin(2 * np.pi * 440 * times) * 12000).astype(np.int16)
+
+    return AudioChunk(samples, sample_rate)
+
+
+@pytest.mark.parametrize("format_name", ["opus", "flac", "mp3"])
+def test_streamed_matches_buffered(format_name):
+    """Concatenated streamed chunks decode to the same duration as a complete file"""
+    output_format = OUTPUT_FORMATS[format_name]
+    audio = make_tone(3.0)
+
+    buffered_bytes = encode_audio(audio, output_format)
+
+    # One sentence-sized chunk at a time
+    encoder = AudioEncoder(output_format, audio.sample_rate, audio.channels)
+    chunk_frames = audio.sample_rate // 2
+    streamed_chunks = [
+        encoder.encode(AudioChunk(samples, audio.sample_rate).to_frames())
+        for samples in np.array_split(
+            audio.samples, range(chunk_frames, audio.num_frames, chunk_frames)
+        )
+    ]
+    streamed_chunks.append(encoder.finish())
+
+    buffered_info = soundfile.info(io.BytesIO(buffered_bytes))
+    streamed_info = soundfile.info(io.BytesIO(b"".join(streamed_chunks)))
+
+    assert streamed_info.frames == buffered_info.frames
+    assert streamed_info.duration == pytest.approx(audio.seconds, abs=0.1)
@@ -0,0 +1,86 @@
+"""Tests for /api/tts/batch (runs the web server with eSpeak)"""
+import json
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+_DIR = Path(__file__).parent.parent
+
+pytestmark = pytest.mark.skipif(
+    shutil.which("espeak-ng") is None, reason="espeak-ng is not installed"
+)
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    """Start the web server with only eSpeak enabled"""
+    with socket.socket() as port_socket:
+        port_socket.bind(("127.0.0.1", 0))
+        port = port_socket.getsockname()[1]
+
+    server_cmd = [sys.executable, str(_DIR / "app.py"), "--port", str(port)]
+    for tts_name in [
+        "flite",
+        "festival",
+        "nanotts",
+        "marytts",
+        "larynx",
+        "glow-speak",
+        "coqui",
+    ]:
+        server_cmd.append(f"--no-{tts_name}")
+
+    proc = subprocess.Popen(server_cmd, cwd=_DIR)
+    url = f"http://127.0.0.1:{port}"
+
+    try:
+        for _ in range(60):
+            try:
+                with urllib.request.urlopen(f"{url}/api/ready"):
+                    break
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.5)
+
+        yield url
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def post_batch(url: str, items) -> urllib.error.HTTPError:
+    """POST batch items and return the error response"""
+    with pytest.raises(urllib.error.HTTPError) as error_info:
+        urllib.request.urlopen(
+            urllib.request.Request(
+                f"{url}/api/tts/batch?voice=espeak:en",
+                data=json.dumps(items).encode(),
+                method="POST",
+            )
+        )
+
+    return error_info.value
+
+
+def test_empty_text(server_url):
+    """Item with empty text is reported by index before synthesis"""
+    error = post_batch(server_url, [{"text": "Hello."}, {"text": ""}])
+
+    assert error.code == 400
+    assert error.read().decode().startswith("Item 1:")
+
+
+def test_unknown_voice(server_url):
+    """Item with a voice that can't be resolved is reported by index"""
+    error = post_batch(
+        server_url, [{"text": "Hello."}, {"text": "Hello.", "voice": "nope:nope"}]
+    )
+
+    assert error.code == 400
+    assert error.read().decode().startswith("Item 1:")
@@ -1,7 +1,6 @@
 """Text to speech wrappers for OpenTTS"""
 import asyncio
 import functools
-import io
 import json
 import logging
 import platform
@@ -9,12 +8,19 @@ import re
 import shlex
 import shutil
 import tempfile
+import threading
+import time
 import typing
 from abc import ABCMeta
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from zipfile import ZipFile
 
+from audio import AudioChunk
+from metrics import MODEL_LOAD_SECONDS
+from model_cache import ModelCache, get_model_size
+
 _LOGGER = logging.getLogger("opentts")
 
 # -----------------------------------------------------------------------------
@@ -36,10 +42,24 @@ class Voice:
 
 VoicesIterable = typing.AsyncGenerator[Voice, None]
 
+# Settings passed to say() that only some TTS systems use
+SYNTHESIS_SETTINGS = frozenset(
+    {"vocoder", "denoiser_strength", "noise_scale", "length_scale"}
+)
+
 
 class TTSBase(metaclass=ABCMeta):
     """Base class of TTS systems."""
 
+    # Maximum number of concurrent calls to say() or None for no limit
+    max_concurrency: typing.Optional[int] = None
+
+    # True if synthesis runs Python code in this process (instead of a program)
+    in_process: bool = False
+
+    # Members of SYNTHESIS_SETTINGS that change the audio (others are ignored)
+    audio_settings: typing.FrozenSet[str] = frozenset()
+
     async def voices(self) -> VoicesIterable:
         """Get list of available voices."""
         yield Voice("", "", "", "", "")
@@ -48,6 +68,41 @@ class TTSBase(metaclass=ABCMeta):
         """Speak text as WAV."""
         return bytes()
 
+    async def say_pcm(self, text: str, voice_id: str, **kwargs) -> AudioChunk:
+        """Speak text as 16-bit PCM audio.
+
+        TTS systems that produce audio in memory should override this (and
+        make say() encode its result) to avoid a WAV round trip.
+        """
+        return AudioChunk.from_wav(await self.say(text, voice_id, **kwargs))
+
+
+async def run_program(
+    program_cmd: typing.Sequence[str], input_bytes: typing.Optional[bytes] = None
+) -> bytes:
+    """Run a program and return its output.
+
+    The program is killed if the caller is cancelled (e.g., the client
+    disconnected), so abandoned requests don't keep using the CPU.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *program_cmd,
+        stdin=asyncio.subprocess.PIPE if input_bytes is not None else None,
+        stdout=asyncio.subprocess.PIPE,
+    )
+
+    try:
+        stdout, _ = await proc.communicate(input=input_bytes)
+    except asyncio.CancelledError:
+        if proc.returncode is None:
+            _LOGGER.debug("Killing %s (pid=%s)", program_cmd[0], proc.pid)
+            proc.kill()
+            await proc.wait()
+
+        raise
+
+    return stdout
+
 
 # -----------------------------------------------------------------------------
 
@@ -65,10 +120,7 @@ class EspeakTTS(TTSBase):
         espeak_cmd = [self.espeak_prog, "--voices"]
         _LOGGER.debug(espeak_cmd)
 
-        proc = await asyncio.create_subprocess_exec(
-            *espeak_cmd, stdout=asyncio.subprocess.PIPE
-        )
-        stdout, _ = await proc.communicate()
+        stdout = await run_program(espeak_cmd)
 
         voices_lines = stdout.decode().splitlines()
         first_line = True
@@ -100,11 +152,7 @@ class EspeakTTS(TTSBase):
         ]
         _LOGGER.debug(espeak_cmd)
 
-        proc = await asyncio.create_subprocess_exec(
-            *espeak_cmd, stdout=asyncio.subprocess.PIPE
-        )
-        stdout, _ = await proc.communicate()
-        return stdout
+        return await run_program(espeak_cmd)
 
 
 # -----------------------------------------------------------------------------
@@ -365,11 +413,7 @@ class FliteTTS(TTSBase):
         ]
         _LOGGER.debug(flite_cmd)
 
-        proc = await asyncio.create_subprocess_exec(
-            *flite_cmd, stdout=asyncio.subprocess.PIPE
-        )
-        stdout, _ = await proc.communicate()
-        return stdout
+        return await run_program(flite_cmd)
 
 
 # -----------------------------------------------------------------------------
@@ -569,14 +613,10 @@ class FestivalTTS(TTSBase):
 
         if shutil.which("festival"):
             try:
-                proc = await asyncio.create_subprocess_exec(
-                    "festival",
-                    stdin=asyncio.subprocess.PIPE,
-                    stdout=asyncio.subprocess.PIPE,
-                )
-
                 list_command = "(print (voice.list))"
-                proc_stdout, _ = await proc.communicate(input=list_command.encode())
+                proc_stdout = await run_program(
+                    ["festival"], input_bytes=list_command.encode()
+                )
                 list_result = proc_stdout.decode()
 
                 # (voice1 voice2 ...)
@@ -630,12 +670,7 @@ class FestivalTTS(TTSBase):
             ]
             _LOGGER.debug(festival_cmd)
 
-            proc = await asyncio.create_subprocess_exec(
-                *festival_cmd,
-                stdin=asyncio.subprocess.PIPE,
-                stdout=asyncio.subprocess.PIPE,
-            )
-            await proc.communicate(input=text.encode(encoding=encoding))
+            await run_program(festival_cmd, input_bytes=text.encode(encoding=encoding))
 
             wav_file.seek(0)
             return wav_file.read()
@@ -672,11 +707,7 @@ class NanoTTS(TTSBase):
             nanotts_cmd = ["nanotts", "-v", voice_id, "-o", shlex.quote(wav_file.name)]
             _LOGGER.debug(nanotts_cmd)
 
-            proc = await asyncio.create_subprocess_exec(
-                *nanotts_cmd, stdin=asyncio.subprocess.PIPE
-            )
-
-            await proc.communicate(input=text.encode())
+            await run_program(nanotts_cmd, input_bytes=text.encode())
 
             wav_file.seek(0)
             return wav_file.read()
@@ -688,6 +719,9 @@ class NanoTTS(TTSBase):
 class MaryTTS(TTSBase):
     """Wraps a local MaryTTS installation (http://mary.dfki.de)"""
 
+    # A single MaryTTS process reads one line of text at a time
+    max_concurrency = 1
+
     def __init__(self, base_dir: typing.Union[str, Path]):
         self.base_dir = Path(base_dir)
         self.voices_dict: typing.Dict[str, Voice] = {}
@@ -761,20 +795,32 @@ class MaryTTS(TTSBase):
 
         assert self.voice_proc is not None
 
-        # Write text
-        text_line = text.strip() + "\n"
+        voice_proc = self.voice_proc
 
-        assert self.voice_proc.stdin is not None
-        self.voice_proc.stdin.write(text_line.encode())
-        await self.voice_proc.stdin.drain()
+        try:
+            # Write text
+            text_line = text.strip() + "\n"
 
-        # Get back size of WAV audio in bytes on first line
-        assert self.voice_proc.stdout is not None
-        size_line = await self.voice_proc.stdout.readline()
-        num_bytes = int(size_line.decode())
+            assert voice_proc.stdin is not None
+            voice_proc.stdin.write(text_line.encode())
+            await voice_proc.stdin.drain()
 
-        _LOGGER.debug("Reading %s byte(s) of WAV audio...", num_bytes)
-        wav_bytes = await self.voice_proc.stdout.readexactly(num_bytes)
+            # Get back size of WAV audio in bytes on first line
+            assert voice_proc.stdout is not None
+            size_line = await voice_proc.stdout.readline()
+            num_bytes = int(size_line.decode())
+
+            _LOGGER.debug("Reading %s byte(s) of WAV audio...", num_bytes)
+            wav_bytes = await voice_proc.stdout.readexactly(num_bytes)
+        except asyncio.CancelledError:
+            # Unread audio would be returned for the next text, so stop the
+            # process instead. It's restarted on the next call.
+            if voice_proc.returncode is None:
+                voice_proc.kill()
+                await voice_proc.wait()
+
+            self.voice_proc = None
+            raise
 
         return wav_bytes
 
@@ -843,9 +889,28 @@ class MaryTTS(TTSBase):
 class LarynxTTS(TTSBase):
     """Wraps Larynx TTS (https://github.com/rhasspy/larynx)"""
 
-    def __init__(self, models_dir: typing.Union[str, Path], sample_rate: int = 22050):
+    in_process = True
+    audio_settings = SYNTHESIS_SETTINGS
+
+    def __init__(
+        self,
+        models_dir: typing.Union[str, Path],
+        sample_rate: int = 22050,
+        model_cache: typing.Optional[ModelCache] = None,
+        max_workers: typing.Optional[int] = None,
+        inference_threads: typing.Optional[int] = None,
+    ):
         self.models_dir = Path(models_dir)
         self.sample_rate = sample_rate
+        self.model_cache = model_cache or ModelCache()
+        self.inference_threads = inference_threads
+
+        # Models are loaded and sentences are synthesized here (larynx would
+        # otherwise create a new thread pool for every call).
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="larynx"
+        )
+        self._load_lock = threading.Lock()
 
         self.larynx_voices = {
             # de-de
@@ -1225,6 +1290,11 @@ class LarynxTTS(TTSBase):
 
     async def say(self, text: str, voice_id: str, **kwargs) -> bytes:
         """Speak text as WAV."""
+        audio = await self.say_pcm(text, voice_id, **kwargs)
+        return audio.to_wav()
+
+    async def say_pcm(self, text: str, voice_id: str, **kwargs) -> AudioChunk:
+        """Speak text as 16-bit PCM audio."""
         denoiser_strength: typing.Optional[float] = kwargs.get("denoiser_strength")
         noise_scale: typing.Optional[float] = kwargs.get("noise_scale")
         length_scale: typing.Optional[float] = kwargs.get("length_scale")
@@ -1237,8 +1307,7 @@ class LarynxTTS(TTSBase):
         # Run text to speech
         import numpy as np
 
-        from larynx import text_to_speech
-        from larynx.wavfile import write as wav_write
+        from larynx import submit_text_to_speech
 
         voice = self.larynx_voices.get(voice_id)
 
@@ -1269,31 +1338,132 @@ class LarynxTTS(TTSBase):
 
         # Run asynchronously in executor
         loop = asyncio.get_running_loop()
-        results = await loop.run_in_executor(
-            None,
+
+        # Load models ahead of time to record how long loading takes
+        await loop.run_in_executor(
+            self.executor,
+            functools.partial(self.load_models, voice_id, vocoder_quality),
+        )
+
+        # Phonemize and queue every sentence on the engine's thread pool
+        sentences = await loop.run_in_executor(
+            self.executor,
             functools.partial(
-                text_to_speech,
+                submit_text_to_speech,
                 text=text,
                 voice_or_lang=voice_id,
                 vocoder_or_quality=vocoder_quality,
                 tts_settings=tts_settings,
                 vocoder_settings=vocoder_settings,
                 custom_voices_dir=self.models_dir,
+                executor=self.executor,
             ),
         )
 
         # Combine all audio
         audios = []
         sample_rate = self.sample_rate
-        for result in results:
-            sample_rate = result.sample_rate
-            audios.append(result.audio)
+        try:
+            for future, result in sentences:
+                audios.append(await asyncio.wrap_future(future))
+                sample_rate = result.sample_rate
+        except asyncio.CancelledError:
+            # Drop queued sentences (ones already running still finish)
+            for future, _result in sentences:
+                future.cancel()
+
+            raise
+
+        return AudioChunk.from_array(np.concatenate(audios), sample_rate)
+
+    def load_models(self, voice_id: str, vocoder_quality: str):
+        """Load (and cache) TTS and vocoder models if not already loaded"""
+        with self._load_lock:
+            self._load_models(voice_id, vocoder_quality)
+
+    def _load_models(self, voice_id: str, vocoder_quality: str):
+        from larynx import (
+            _TTS_MODEL_CACHE,
+            _VOCODER_MODEL_CACHE,
+            VOCODER_QUALITY,
+            get_tts_model,
+            get_vocoder_model,
+            resolve_voice_name,
+        )
+
+        voice_key = f"larynx:{voice_id}"
+        if resolve_voice_name(voice_id) not in _TTS_MODEL_CACHE:
+            load_start_time = time.perf_counter()
+            tts_model = get_tts_model(
+                voice_id,
+                custom_voices_dir=self.models_dir,
+                session_options=get_session_options(self.inference_threads),
+            )
+            MODEL_LOAD_SECONDS.observe(
+                time.perf_counter() - load_start_time, "larynx", voice_id
+            )
+
+            voice = self.larynx_voices.get(voice_id)
+            voice_dir = (
+                self.models_dir / voice.locale / voice.id
+                if voice is not None
+                else self.models_dir / voice_id
+            )
+            self.model_cache.add(
+                voice_key,
+                get_model_size(voice_dir),
+                functools.partial(unload_model, _TTS_MODEL_CACHE, tts_model),
+            )
+        else:
+            self.model_cache.touch(voice_key)
+
+        vocoder_key = f"larynx:{vocoder_quality}"
+        if vocoder_quality not in _VOCODER_MODEL_CACHE:
+            load_start_time = time.perf_counter()
+            vocoder_model = get_vocoder_model(
+                vocoder_quality,
+                custom_voices_dir=self.models_dir,
+                session_options=get_session_options(self.inference_threads),
+            )
+            MODEL_LOAD_SECONDS.observe(
+                time.perf_counter() - load_start_time, "larynx", vocoder_quality
+            )
+
+            # e.g., hifi_gan/universal_large
+            vocoder_name = VOCODER_QUALITY.get(vocoder_quality, vocoder_quality)
+            self.model_cache.add(
+                vocoder_key,
+                get_model_size(self.models_dir / vocoder_name),
+                functools.partial(unload_model, _VOCODER_MODEL_CACHE, vocoder_model),
+            )
+        else:
+            self.model_cache.touch(vocoder_key)
+
+
+def get_session_options(
+    inference_threads: typing.Optional[int] = None, no_optimizations: bool = False
+) -> typing.Any:
+    """Get onnxruntime session options, limiting threads used per inference"""
+    import onnxruntime
+
+    sess_options = onnxruntime.SessionOptions()
+    if no_optimizations:
+        sess_options.graph_optimization_level = (
+            onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
+        )
+
+    if inference_threads is not None:
+        sess_options.intra_op_num_threads = inference_threads
+        sess_options.inter_op_num_threads = 1
 
-        with io.BytesIO() as wav_io:
-            wav_write(wav_io, sample_rate, np.concatenate(audios))
-            wav_data = wav_io.getvalue()
+    return sess_options
 
-        return wav_data
+
+def unload_model(models: typing.Dict[str, typing.Any], model: typing.Any):
+    """Remove every key that refers to a model (voices can have aliases)"""
+    for key, value in list(models.items()):
+        if value is model:
+            models.pop(key, None)
 
 
 # -----------------------------------------------------------------------------
@@ -1320,9 +1490,28 @@ class GlowSpeakVocoderModel:
 class GlowSpeakTTS(TTSBase):
     """Wraps Glow-Speak TTS (https://github.com/rhasspy/glow-speak)"""
 
-    def __init__(self, models_dir: typing.Union[str, Path], sample_rate: int = 22050):
+    in_process = True
+    audio_settings = SYNTHESIS_SETTINGS
+
+    def __init__(
+        self,
+        models_dir: typing.Union[str, Path],
+        sample_rate: int = 22050,
+        model_cache: typing.Optional[ModelCache] = None,
+        max_workers: typing.Optional[int] = None,
+        inference_threads: typing.Optional[int] = None,
+    ):
         self.models_dir = Path(models_dir)
         self.sample_rate = sample_rate
+        self.model_cache = model_cache or ModelCache()
+        self.inference_threads = inference_threads
+
+        # Models are loaded and synthesis runs here, so the engine's threads
+        # stay within its share of the CPU budget.
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="glow-speak"
+        )
+        self._load_lock = threading.Lock()
 
         self.no_optimizations = False
 
@@ -1446,6 +1635,11 @@ class GlowSpeakTTS(TTSBase):
 
     async def say(self, text: str, voice_id: str, **kwargs) -> bytes:
         """Speak text as WAV."""
+        audio = await self.say_pcm(text, voice_id, **kwargs)
+        return audio.to_wav()
+
+    async def say_pcm(self, text: str, voice_id: str, **kwargs) -> AudioChunk:
+        """Speak text as 16-bit PCM audio."""
         denoiser_strength = float(kwargs.get("denoiser_strength", 0.0))
         noise_scale = float(kwargs.get("noise_scale", 0.667))
         length_scale = float(kwargs.get("length_scale", 1.0))
@@ -1454,18 +1648,79 @@ class GlowSpeakTTS(TTSBase):
         # ---------------------------------------------------------------------
 
         # Run text to speech
+        import glow_speak
+
+        voice = self.glow_speak_voices.get(voice_id)
+        assert voice is not None, f"No Glow-Speak voice {voice_id}"
+
+        loop = asyncio.get_running_loop()
+        tts_model, vocoder_model = await loop.run_in_executor(
+            self.executor,
+            functools.partial(
+                self.load_models, voice, vocoder_quality, denoiser_strength
+            ),
+        )
+
+        # Run asynchronously in executor
+        # text -> ids -> mels -> audio -> wav
+        text_ids = await loop.run_in_executor(
+            self.executor,
+            functools.partial(
+                glow_speak.text_to_ids,
+                text=text,
+                phonemizer=tts_model.phonemizer,
+                phoneme_to_id=tts_model.phoneme_to_id,
+                phoneme_map=tts_model.phoneme_map,
+            ),
+        )
+
+        mels = await loop.run_in_executor(
+            self.executor,
+            functools.partial(
+                glow_speak.ids_to_mels,
+                ids=text_ids,
+                tts_model=tts_model.onnx_model,
+                noise_scale=noise_scale,
+                length_scale=length_scale,
+            ),
+        )
+
+        audio = await loop.run_in_executor(
+            self.executor,
+            functools.partial(
+                glow_speak.mels_to_audio,
+                mels,
+                vocoder_model.onnx_model,
+                denoiser_strength=denoiser_strength,
+                bias_spec=vocoder_model.bias_spec,
+            ),
+        )
+
+        return AudioChunk.from_array(
+            audio, vocoder_model.sample_rate, channels=vocoder_model.channels
+        )
+
+    def load_models(
+        self, voice: Voice, vocoder_quality: str, denoiser_strength: float
+    ) -> typing.Tuple[GlowSpeakTTSModel, GlowSpeakVocoderModel]:
+        """Load (and cache) TTS and vocoder models if not already loaded"""
+        with self._load_lock:
+            return self._load_models(voice, vocoder_quality, denoiser_strength)
+
+    def _load_models(
+        self, voice: Voice, vocoder_quality: str, denoiser_strength: float
+    ) -> typing.Tuple[GlowSpeakTTSModel, GlowSpeakVocoderModel]:
         import onnxruntime
         from espeak_phonemizer import Phonemizer
         from phonemes2ids import load_phoneme_ids, load_phoneme_map
 
         import glow_speak
 
-        voice = self.glow_speak_voices.get(voice_id)
-        assert voice is not None, f"No Glow-Speak voice {voice_id}"
-
         # TTS
         tts_model = self.tts_models.get(voice.id)
         if tts_model is None:
+            load_start_time = time.perf_counter()
+
             # Initialize eSpeak phonemizer
             text_language = re.split(r"[-_]", voice.id, maxsplit=1)[0]
             phonemizer = Phonemizer(default_voice=text_language)
@@ -1474,11 +1729,9 @@ class GlowSpeakTTS(TTSBase):
             tts_model_dir = self.models_dir / voice.id
             _LOGGER.debug("Loading glow-speak TTS model from %s", tts_model_dir)
 
-            tts_sess_options = onnxruntime.SessionOptions()
-            if self.no_optimizations:
-                tts_sess_options.graph_optimization_level = (
-                    onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
-                )
+            tts_sess_options = get_session_options(
+                self.inference_threads, no_optimizations=self.no_optimizations
+            )
 
             # Load phoneme -> id map
             with open(
@@ -1502,7 +1755,17 @@ class GlowSpeakTTS(TTSBase):
                 phoneme_map=phoneme_map,
             )
 
+            MODEL_LOAD_SECONDS.observe(
+                time.perf_counter() - load_start_time, "glow-speak", voice.id
+            )
             self.tts_models[voice.id] = tts_model
+            self.model_cache.add(
+                f"glow-speak:{voice.id}",
+                get_model_size(tts_model_dir),
+                functools.partial(self.tts_models.pop, voice.id, None),
+            )
+        else:
+            self.model_cache.touch(f"glow-speak:{voice.id}")
 
         assert tts_model is not None
 
@@ -1512,15 +1775,15 @@ class GlowSpeakTTS(TTSBase):
         )
         vocoder_model = self.vocoder_models.get(vocoder_name)
         if vocoder_model is None:
+            load_start_time = time.perf_counter()
+
             # Load vocoder model
             vocoder_model_dir = self.models_dir / vocoder_name
             _LOGGER.debug("Loading glow-speak vocoder model from %s", vocoder_model_dir)
 
-            vocoder_sess_options = onnxruntime.SessionOptions()
-            if self.no_optimizations:
-                vocoder_sess_options.graph_optimization_level = (
-                    onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
-                )
+            vocoder_sess_options = get_session_options(
+                self.inference_threads, no_optimizations=self.no_optimizations
+            )
 
             # Load audio settings from config file
             with open(
@@ -1544,7 +1807,17 @@ class GlowSpeakTTS(TTSBase):
                 channels=channels,
             )
 
+            MODEL_LOAD_SECONDS.observe(
+                time.perf_counter() - load_start_time, "glow-speak", vocoder_name
+            )
             self.vocoder_models[vocoder_name] = vocoder_model
+            self.model_cache.add(
+                f"glow-speak:{vocoder_name}",
+                get_model_size(vocoder_model_dir),
+                functools.partial(self.vocoder_models.pop, vocoder_name, None),
+            )
+        else:
+            self.model_cache.touch(f"glow-speak:{vocoder_name}")
 
         assert vocoder_model is not None
 
@@ -1555,48 +1828,7 @@ class GlowSpeakTTS(TTSBase):
                 vocoder_model.onnx_model, vocoder_model.num_mels
             )
 
-        # Run asynchronously in executor
-        # text -> ids -> mels -> audio -> wav
-        loop = asyncio.get_running_loop()
-        text_ids = await loop.run_in_executor(
-            None,
-            functools.partial(
-                glow_speak.text_to_ids,
-                text=text,
-                phonemizer=tts_model.phonemizer,
-                phoneme_to_id=tts_model.phoneme_to_id,
-                phoneme_map=tts_model.phoneme_map,
-            ),
-        )
-
-        mels = await loop.run_in_executor(
-            None,
-            functools.partial(
-                glow_speak.ids_to_mels,
-                ids=text_ids,
-                tts_model=tts_model.onnx_model,
-                noise_scale=noise_scale,
-                length_scale=length_scale,
-            ),
-        )
-
-        audio = await loop.run_in_executor(
-            None,
-            functools.partial(
-                glow_speak.mels_to_audio,
-                mels,
-                vocoder_model.onnx_model,
-                denoiser_strength=denoiser_strength,
-                bias_spec=vocoder_model.bias_spec,
-            ),
-        )
-
-        return glow_speak.audio_to_wav(
-            audio,
-            sample_rate=vocoder_model.sample_rate,
-            sample_bytes=vocoder_model.sample_bytes,
-            channels=vocoder_model.channels,
-        )
+        return tts_model, vocoder_model
 
 
 # -----------------------------------------------------------------------------
@@ -1605,8 +1837,25 @@ class GlowSpeakTTS(TTSBase):
 class CoquiTTS(TTSBase):
     """Wraps Coqui TTS (https://github.com/coqui-ai/TTS)"""
 
-    def __init__(self, models_dir: typing.Union[str, Path]):
+    in_process = True
+
+    def __init__(
+        self,
+        models_dir: typing.Union[str, Path],
+        model_cache: typing.Optional[ModelCache] = None,
+        max_workers: typing.Optional[int] = None,
+        inference_threads: typing.Optional[int] = None,
+    ):
         self.models_dir = Path(models_dir)
+        self.model_cache = model_cache or ModelCache()
+        self.inference_threads = inference_threads
+
+        # Models are loaded and synthesis runs here, so the engine's threads
+        # stay within its share of the CPU budget.
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="coqui-tts"
+        )
+        self._load_lock = threading.Lock()
 
         self.synthesizers: typing.Dict[str, typing.Any] = {}
 
@@ -1659,10 +1908,15 @@ class CoquiTTS(TTSBase):
 
     async def say(self, text: str, voice_id: str, **kwargs) -> bytes:
         """Speak text as WAV."""
+        audio = await self.say_pcm(text, voice_id, **kwargs)
+        return audio.to_wav()
+
+    async def say_pcm(self, text: str, voice_id: str, **kwargs) -> AudioChunk:
+        """Speak text as 16-bit PCM audio."""
         speaker_id = kwargs.get("speaker_id")
 
         # Run text to speech
-        from TTS.utils.synthesizer import Synthesizer
+        import numpy as np
 
         voice = self.tts_voices.get(voice_id)
         assert voice is not None, f"No Coqui-TTS voice {voice_id}"
@@ -1677,6 +1931,42 @@ class CoquiTTS(TTSBase):
                 # First speaker id
                 speaker_id = 0
 
+        loop = asyncio.get_running_loop()
+        synthesizer = await loop.run_in_executor(
+            self.executor, functools.partial(self.load_synthesizer, voice)
+        )
+
+        assert synthesizer is not None
+
+        # Ensure full stop
+        text = text.strip()
+        if text and (text[-1] not in {".", "?", "!"}):
+            text = text + "."
+
+        # Run asynchronously in executor
+        audio = await loop.run_in_executor(
+            self.executor,
+            functools.partial(
+                synthesizer.tts, text, speaker_idx=speaker_id,  # type: ignore
+            ),
+        )
+
+        # Normalized the same way as Synthesizer.save_wav
+        audio = np.array(audio)
+        audio = audio * (32767 / max(0.01, np.max(np.abs(audio))))
+
+        return AudioChunk.from_array(
+            audio.astype(np.int16), synthesizer.output_sample_rate  # type: ignore
+        )
+
+    def load_synthesizer(self, voice: Voice) -> typing.Any:
+        """Load (and cache) a voice's synthesizer if not already loaded"""
+        with self._load_lock:
+            return self._load_synthesizer(voice)
+
+    def _load_synthesizer(self, voice: Voice) -> typing.Any:
+        from TTS.utils.synthesizer import Synthesizer
+
         synthesizer = self.synthesizers.get(voice.id)
         if synthesizer is None:
             voice_dir = self.models_dir / voice.id
@@ -1694,6 +1984,13 @@ class CoquiTTS(TTSBase):
             if speakers_json_path.is_file():
                 tts_speakers_file = str(speakers_json_path)
 
+            if self.inference_threads is not None:
+                # torch threads are shared by the whole process
+                import torch
+
+                torch.set_num_threads(self.inference_threads)
+
+            load_start_time = time.perf_counter()
             synthesizer = Synthesizer(
                 tts_checkpoint=str(voice_dir / "model_file.pth.tar"),
                 tts_config_path=str(voice_dir / "config.json"),
@@ -1701,26 +1998,17 @@ class CoquiTTS(TTSBase):
                 vocoder_config=vocoder_config,
                 tts_speakers_file=tts_speakers_file,
             )
+            MODEL_LOAD_SECONDS.observe(
+                time.perf_counter() - load_start_time, "coqui-tts", voice.id
+            )
 
             self.synthesizers[voice.id] = synthesizer
+            self.model_cache.add(
+                f"coqui-tts:{voice.id}",
+                get_model_size(voice_dir),
+                functools.partial(self.synthesizers.pop, voice.id, None),
+            )
+        else:
+            self.model_cache.touch(f"coqui-tts:{voice.id}")
 
-        assert synthesizer is not None
-
-        # Ensure full stop
-        text = text.strip()
-        if text and (text[-1] not in {".", "?", "!"}):
-            text = text + "."
-
-        # Run asynchronously in executor
-        loop = asyncio.get_running_loop()
-        audio = await loop.run_in_executor(
-            None,
-            functools.partial(
-                synthesizer.tts, text, speaker_idx=speaker_id,  # type: ignore
-            ),
-        )
-
-        with io.BytesIO() as wav_io:
-            synthesizer.save_wav(audio, wav_io)  # type: ignore
-
-            return wav_io.getvalue()
+        return synthesizer
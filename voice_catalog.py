@@ -0,0 +1,160 @@
+"""Precomputed catalog of voices from all TTS systems"""
+import asyncio
+import dataclasses
+import hashlib
+import json
+import logging
+import time
+import typing
+from collections import defaultdict
+
+from tts import TTSBase
+
+_LOGGER = logging.getLogger("opentts")
+
+# -----------------------------------------------------------------------------
+
+
+class VoiceCatalog:
+    """Voices from every TTS system, indexed for fast filtering.
+
+    Listing voices can spawn processes (espeak-ng, festival) and read many
+    files from disk, so it is done once in refresh() instead of per request.
+    Each refresh produces a new etag that changes only if the voices do.
+    """
+
+    def __init__(self, tts: typing.Mapping[str, TTSBase]):
+        self.tts = tts
+        self.etag = ""
+        self.last_refresh: typing.Optional[float] = None
+
+        # Full voice id (tts:voice) -> voice properties (with tts_name)
+        self._voices: typing.Dict[str, typing.Dict[str, typing.Any]] = {}
+
+        # property -> value -> full voice ids
+        self._index: typing.Dict[str, typing.Dict[str, typing.Set[str]]] = {}
+
+        self._refresh_lock = asyncio.Lock()
+
+    async def refresh(self):
+        """Reload voices from all TTS systems"""
+        if self._refresh_lock.locked():
+            # Wait for refresh already in progress
+            async with self._refresh_lock:
+                return
+
+        async with self._refresh_lock:
+            start_time = time.perf_counter()
+            voices: typing.Dict[str, typing.Dict[str, typing.Any]] = {}
+
+            for tts_name, tts in self.tts.items():
+                try:
+                    async for voice in tts.voices():
+                        # Prepend TTS system name to voice ID
+                        full_id = f"{tts_name}:{voice.id}"
+                        voices[full_id] = dataclasses.asdict(voice)
+
+                        # Add TTS name
+                        voices[full_id]["tts_name"] = tts_name
+                except Exception:
+                    _LOGGER.exception("voices (%s)", tts_name)
+
+                    # Keep voices from the last refresh
+                    for full_id, voice_dict in self._voices.items():
+                        if voice_dict["tts_name"] == tts_name:
+                            voices[full_id] = voice_dict
+
+            index: typing.Dict[str, typing.Dict[str, typing.Set[str]]] = {
+                key: defaultdict(set)
+                for key in ("language", "locale", "gender", "tts_name")
+            }
+
+            for full_id, voice_dict in voices.items():
+                for key, key_index in index.items():
+                    key_index[voice_dict[key]].add(full_id)
+
+            self._voices = voices
+            self._index = {key: dict(key_index) for key, key_index in index.items()}
+            self.etag = hashlib.sha256(
+                json.dumps(voices, sort_keys=True).encode()
+            ).hexdigest()[:32]
+            self.last_refresh = time.time()
+
+            _LOGGER.debug(
+                "Loaded %s voice(s) in %0.2f second(s)",
+                len(voices),
+                time.perf_counter() - start_time,
+            )
+
+    async def refresh_forever(self, interval: float):
+        """Refresh catalog every interval seconds"""
+        while True:
+            await asyncio.sleep(interval)
+
+            try:
+                await self.refresh()
+            except Exception:
+                _LOGGER.exception("refresh voices")
+
+    def voices(
+        self,
+        languages: typing.Optional[typing.Iterable[str]] = None,
+        locales: typing.Optional[typing.Iterable[str]] = None,
+        genders: typing.Optional[typing.Iterable[str]] = None,
+        tts_names: typing.Optional[typing.Iterable[str]] = None,
+    ) -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+        """Get voices matching all filters (empty filters match everything)"""
+        voice_ids: typing.Optional[typing.Set[str]] = None
+
+        for key, values in (
+            ("language", languages),
+            ("locale", locales),
+            ("gender", genders),
+            ("tts_name", tts_names),
+        ):
+            if not values:
+                continue
+
+            key_index = self._index.get(key, {})
+            matching_ids: typing.Set[str] = set()
+            for value in values:
+                matching_ids.update(key_index.get(value, ()))
+
+            if voice_ids is None:
+                voice_ids = matching_ids
+            else:
+                voice_ids &= matching_ids
+
+        if voice_ids is None:
+            return self._voices
+
+        # Keep TTS/voice order
+        return {
+            full_id: voice_dict
+            for full_id, voice_dict in self._voices.items()
+            if full_id in voice_ids
+        }
+
+    def languages(
+        self, tts_names: typing.Optional[typing.Iterable[str]] = None
+    ) -> typing.Set[str]:
+        """Get languages of voices from TTS systems"""
+        if not tts_names:
+            return set(self._index.get("language", {}).keys())
+
+        return {
+            self._voices[full_id]["language"]
+            for full_id in self.voices(tts_names=tts_names)
+        }
+
+    def voice_ids(self) -> typing.List[str]:
+        """Get full ids (tts:voice) of all voices"""
+        return list(self._voices.keys())
+
+    def stats(self) -> typing.Dict[str, typing.Any]:
+        """Get catalog statistics"""
+        return {
+            "voices": len(self._voices),
+            "etag": self.etag,
+            "last_refresh": self.last_refresh,
+        }
@@ -0,0 +1,130 @@
+"""Precomputed resolution of voices and language aliases"""
+import re
+import threading
+import typing
+
+# -----------------------------------------------------------------------------
+
+
+class VoiceResolver:
+    """Resolves voices and language aliases to tts:voice.
+
+    The first alias of each language whose TTS system is loaded is found once
+    in compile(), and every voice that's resolved afterwards (including voices
+    that can't be resolved) is remembered. Call compile() again if aliases or
+    TTS systems change.
+    """
+
+    def __init__(
+        self,
+        aliases: typing.Mapping[str, typing.Sequence[str]],
+        tts_names: typing.Iterable[str],
+        max_entries: int = 10000,
+    ):
+        self.aliases = aliases
+        self.tts_names = tts_names
+        self.max_entries = max_entries
+
+        # alias -> first voice with a loaded TTS system (None if there isn't one)
+        self._alias_voices: typing.Dict[str, typing.Optional[str]] = {}
+
+        # (voice, fallback voice) -> resolved voice (None if it can't be resolved)
+        self._resolved: typing.Dict[
+            typing.Tuple[str, typing.Optional[str]], typing.Optional[str]
+        ] = {}
+
+        self._loaded_tts: typing.FrozenSet[str] = frozenset()
+        self._lock = threading.Lock()
+
+        self.compile()
+
+    def compile(self):
+        """Rebuild map from current aliases and TTS systems"""
+        loaded_tts = frozenset(self.tts_names)
+        alias_voices: typing.Dict[str, typing.Optional[str]] = {}
+
+        for alias_key, alias_voices_list in self.aliases.items():
+            alias_voices[alias_key.lower()] = next(
+                (
+                    alias_voice
+                    for alias_voice in alias_voices_list
+                    if get_tts_name(alias_voice) in loaded_tts
+                ),
+                None,
+            )
+
+        with self._lock:
+            self._loaded_tts = loaded_tts
+            self._alias_voices = alias_voices
+            self._resolved = {}
+
+    def resolve(self, voice: str, fallback_voice: typing.Optional[str] = None) -> str:
+        """Resolve a voice or language based on aliases"""
+        resolve_key = (voice, fallback_voice)
+        resolved_voice = self._resolved.get(resolve_key, "")
+
+        if resolved_voice == "":
+            resolved_voice = self._resolve(voice, fallback_voice)
+
+            with self._lock:
+                if len(self._resolved) >= self.max_entries:
+                    # Don't grow without bound on arbitrary voice names
+                    self._resolved.clear()
+
+                self._resolved[resolve_key] = resolved_voice
+
+        if resolved_voice is None:
+            raise ValueError(f"Cannot resolve voice: {voice.split('#', maxsplit=1)[0]}")
+
+        return resolved_voice
+
+    def stats(self) -> typing.Dict[str, typing.Any]:
+        """Get resolver statistics"""
+        return {"aliases": len(self._alias_voices), "resolved": len(self._resolved)}
+
+    def _resolve(
+        self, voice: str, fallback_voice: typing.Optional[str] = None
+    ) -> typing.Optional[str]:
+        original_voice = voice
+        if "#" in voice:
+            # Remove speaker id
+            # tts:voice#speaker_id
+            voice, _speaker_id = voice.split("#", maxsplit=1)
+
+        # Resolve voices in order:
+        # 1. Aliases in order of preference
+        # 2. fallback voice provided
+        # 3. Original voice
+        # 4. espeak voice
+        alias_key = voice.lower()
+        if alias_key not in self._alias_voices:
+            # en-US -> en
+            alias_key = re.split(r"[-_]", alias_key, maxsplit=1)[0]
+
+        alias_voice = self._alias_voices.get(alias_key)
+        if alias_voice is not None:
+            return alias_voice
+
+        fallback_voices = []
+        if fallback_voice is not None:
+            fallback_voices.append(fallback_voice)
+
+        fallback_voices.append(original_voice)
+
+        if ":" not in voice:
+            fallback_voices.append(f"espeak:{voice}")
+
+        for preferred_voice in fallback_voices:
+            if get_tts_name(preferred_voice) in self._loaded_tts:
+                # If TTS system is loaded, assume voice will be present
+                return preferred_voice
+
+        return None
+
+
+def get_tts_name(voice: str) -> typing.Optional[str]:
+    """Get TTS system from tts:voice (None if missing)"""
+    if ":" not in voice:
+        return None
+
+    return voice.split(":", maxsplit=1)[0]
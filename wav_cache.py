@@ -0,0 +1,435 @@
+"""Bounded disk cache for synthesized audio"""
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import typing
+from collections import OrderedDict
+from pathlib import Path
+
+_LOGGER = logging.getLogger("opentts")
+
+# Number of entries removed per eviction query
+_EVICT_BATCH_SIZE = 32
+
+# Prefix of temporary files before they're atomically renamed
+_TEMP_PREFIX = ".tmp-"
+
+# -----------------------------------------------------------------------------
+
+
+class WavCache:
+    """Disk cache of audio files with a persistent SQLite index.
+
+    Each entry's size, last access time, and hit count are kept in the index,
+    so lookups and evictions never need to walk or stat the cache directory.
+    The request parameters that produced an entry may also be kept, so
+    popular entries can be synthesized again (see most_used).
+    Files are written to a temporary file and renamed into place, so readers
+    never see a partially written file.
+    """
+
+    EVICTION_POLICIES = {
+        # Least recently used
+        "lru": "last_access ASC",
+        # Least frequently used (ties broken by least recently used)
+        "lfu": "hits ASC, last_access ASC",
+    }
+
+    def __init__(
+        self,
+        cache_dir: typing.Union[str, Path],
+        max_bytes: typing.Optional[int] = None,
+        max_entries: typing.Optional[int] = None,
+        eviction: str = "lru",
+    ):
+        assert (
+            eviction in WavCache.EVICTION_POLICIES
+        ), f"Unknown eviction policy: {eviction}"
+
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.eviction = eviction
+
+        self.total_bytes = 0
+        self.total_entries = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(
+            str(self.cache_dir / "index.db"),
+            check_same_thread=False,
+            isolation_level=None,  # autocommit
+        )
+
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+
+            index_exists = (
+                self._db.execute(
+                    "SELECT name FROM sqlite_master WHERE type='table' AND name='entries'"
+                ).fetchone()
+                is not None
+            )
+
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, "
+                "file_name TEXT NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "created REAL NOT NULL, "
+                "last_access REAL NOT NULL, "
+                "hits INTEGER NOT NULL DEFAULT 0, "
+                "params TEXT)"
+            )
+
+            entry_columns = {
+                row[1] for row in self._db.execute("PRAGMA table_info(entries)")
+            }
+            if "params" not in entry_columns:
+                # Index from before request parameters were kept
+                self._db.execute("ALTER TABLE entries ADD COLUMN params TEXT")
+
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS entries_hits ON entries (hits, last_access)"
+            )
+
+            self._remove_temp_files()
+
+            if not index_exists:
+                # Index files from a cache directory created before the index
+                self._import_existing_files()
+
+            self.total_entries, total_bytes = self._db.execute(
+                "SELECT COUNT(*), SUM(size) FROM entries"
+            ).fetchone()
+            self.total_bytes = total_bytes or 0
+
+            _LOGGER.debug(
+                "Cache has %s entries (%s byte(s)) in %s",
+                self.total_entries,
+                self.total_bytes,
+                self.cache_dir,
+            )
+
+            self.evict()
+
+    def get(self, key: str) -> typing.Optional[bytes]:
+        """Get cached bytes or None if missing"""
+        cache_path = self.lookup(key)
+        if cache_path is None:
+            return None
+
+        try:
+            return cache_path.read_bytes()
+        except FileNotFoundError:
+            # File was removed externally
+            _LOGGER.warning("Missing cache file: %s", cache_path)
+            self.remove(key)
+
+        return None
+
+    def lookup(self, key: str) -> typing.Optional[Path]:
+        """Get path to cached file and record access, or None if missing"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT file_name FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._db.execute(
+                "UPDATE entries SET last_access = ?, hits = hits + 1 WHERE key = ?",
+                (time.time(), key),
+            )
+
+        return self.cache_dir / row[0]
+
+    def put(
+        self,
+        key: str,
+        data: bytes,
+        suffix: str = ".wav",
+        params: typing.Optional[typing.Dict[str, typing.Any]] = None,
+    ):
+        """Atomically write bytes to the cache, evicting entries if needed.
+
+        params are the JSON-serializable request parameters for the entry.
+        """
+        file_name = f"{key}{suffix}"
+        cache_path = self.cache_dir / file_name
+
+        # Write to temporary file first, then rename into place
+        temp_fd, temp_name = tempfile.mkstemp(dir=self.cache_dir, prefix=_TEMP_PREFIX)
+        try:
+            with os.fdopen(temp_fd, "wb") as temp_file:
+                temp_file.write(data)
+
+            os.replace(temp_name, cache_path)
+        except Exception:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+
+        now = time.time()
+        with self._lock:
+            old_row = self._db.execute(
+                "SELECT size FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+
+            if old_row is not None:
+                self.total_bytes -= old_row[0]
+                self.total_entries -= 1
+
+            start_hits = 0
+            if self.eviction == "lfu":
+                # Start at the least used entry's count, so new entries aren't
+                # always the first to be evicted from a cache of popular ones.
+                start_hits = self._db.execute(
+                    "SELECT COALESCE(MIN(hits), 0) FROM entries WHERE key != ?",
+                    (key,),
+                ).fetchone()[0]
+
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(key, file_name, size, created, last_access, hits, params) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    file_name,
+                    len(data),
+                    now,
+                    now,
+                    start_hits,
+                    json.dumps(params) if params is not None else None,
+                ),
+            )
+
+            self.total_bytes += len(data)
+            self.total_entries += 1
+
+            # Don't evict what was just written
+            self.evict(keep_key=key)
+
+    def contains(self, key: str) -> bool:
+        """True if key is cached (doesn't count as an access)"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+
+        return row is not None
+
+    def most_used(self, limit: int) -> typing.List[typing.Dict[str, typing.Any]]:
+        """Get request parameters of the most frequently hit entries"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT params FROM entries WHERE params IS NOT NULL "
+                "ORDER BY hits DESC, last_access DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+
+        return [json.loads(row[0]) for row in rows]
+
+    def remove(self, key: str):
+        """Remove an entry and its file"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT file_name, size FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                return
+
+            self._remove_rows([(key, row[0], row[1])])
+
+    def evict(self, keep_key: typing.Optional[str] = None):
+        """Remove entries until the cache is within its limits.
+
+        keep_key is only removed if it's over the limits by itself.
+        """
+        with self._lock:
+            order_by = WavCache.EVICTION_POLICIES[self.eviction]
+
+            while self._over_limit(self.total_bytes, self.total_entries):
+                rows = self._db.execute(
+                    "SELECT key, file_name, size FROM entries WHERE key != ? "
+                    f"ORDER BY {order_by} LIMIT ?",
+                    (keep_key or "", _EVICT_BATCH_SIZE),
+                ).fetchall()
+
+                if not rows:
+                    if keep_key is None:
+                        break
+
+                    # Entry doesn't fit in the cache on its own
+                    keep_key = None
+                    continue
+
+                # Only remove as many entries as needed
+                to_remove = []
+                bytes_left, entries_left = self.total_bytes, self.total_entries
+                for row in rows:
+                    if not self._over_limit(bytes_left, entries_left):
+                        break
+
+                    to_remove.append(row)
+                    bytes_left -= row[2]
+                    entries_left -= 1
+
+                self._remove_rows(to_remove)
+                self.evictions += len(to_remove)
+                _LOGGER.debug("Evicted %s cache entries", len(to_remove))
+
+    def stats(self) -> typing.Dict[str, typing.Any]:
+        """Get cache statistics"""
+        with self._lock:
+            return {
+                "entries": self.total_entries,
+                "bytes": self.total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "eviction": self.eviction,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def close(self):
+        """Close index database"""
+        with self._lock:
+            self._db.close()
+
+    # -------------------------------------------------------------------------
+
+    def _over_limit(self, total_bytes: int, total_entries: int) -> bool:
+        return ((self.max_bytes is not None) and (total_bytes > self.max_bytes)) or (
+            (self.max_entries is not None) and (total_entries > self.max_entries)
+        )
+
+    def _remove_rows(self, rows: typing.Sequence[typing.Tuple[str, str, int]]):
+        for key, file_name, size in rows:
+            try:
+                (self.cache_dir / file_name).unlink(missing_ok=True)
+            except Exception:
+                _LOGGER.exception("cache remove")
+
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.total_bytes -= size
+            self.total_entries -= 1
+
+    def _remove_temp_files(self):
+        """Remove temporary files left over from an interrupted write"""
+        for temp_path in self.cache_dir.glob(f"{_TEMP_PREFIX}*"):
+            try:
+                temp_path.unlink()
+            except Exception:
+                _LOGGER.exception("cache remove temp")
+
+    def _import_existing_files(self):
+        """Add existing WAV files to the index"""
+        for cache_path in self.cache_dir.glob("*.wav"):
+            try:
+                file_stat = cache_path.stat()
+                self._db.execute(
+                    "INSERT OR IGNORE INTO entries "
+                    "(key, file_name, size, created, last_access, hits) "
+                    "VALUES (?, ?, ?, ?, ?, 0)",
+                    (
+                        cache_path.stem,
+                        cache_path.name,
+                        file_stat.st_size,
+                        file_stat.st_mtime,
+                        file_stat.st_atime,
+                    ),
+                )
+            except Exception:
+                _LOGGER.exception("cache import")
+
+
+# -----------------------------------------------------------------------------
+
+
+class MemoryCache:
+    """Memory-bounded LRU cache of recently used audio.
+
+    Values are bytes unless get_size is given to measure them.
+    """
+
+    def __init__(
+        self, max_bytes: int, get_size: typing.Callable[[typing.Any], int] = len
+    ):
+        self.max_bytes = max_bytes
+        self.get_size = get_size
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries: "OrderedDict[str, typing.Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> typing.Any:
+        """Get cached value or None if missing"""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+
+            # Mark as most recently used
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            return data
+
+    def contains(self, key: str) -> bool:
+        """True if key is cached (doesn't count as a hit)"""
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key: str, data: typing.Any):
+        """Cache value, evicting least recently used entries if needed"""
+        data_size = self.get_size(data)
+        if data_size > self.max_bytes:
+            # Would evict everything else
+            return
+
+        with self._lock:
+            old_data = self._entries.pop(key, None)
+            if old_data is not None:
+                self.total_bytes -= self.get_size(old_data)
+
+            self._entries[key] = data
+            self.total_bytes += data_size
+
+            while self.total_bytes > self.max_bytes:
+                _old_key, old_data = self._entries.popitem(last=False)
+                self.total_bytes -= self.get_size(old_data)
+                self.evictions += 1
+
+    def stats(self) -> typing.Dict[str, typing.Any]:
+        """Get cache statistics"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""Worker processes that run TTS systems outside of the web server process.
+
+Each worker is a separate Python process (python3 workers.py) with its own
+TTS instances and loaded models. Requests are sent as JSON lines on the
+worker's stdin. Each response is a JSON line followed by raw 16-bit PCM frames
+on a private copy of the worker's stdout, so audio is never pickled.
+
+Response headers also carry the worker's model cache statistics and any model
+load timings since the last response, which are merged into the web server's
+metrics.
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import logging
+import os
+import sys
+import typing
+from pathlib import Path
+
+import numpy as np
+
+import tts as tts_module
+from audio import AudioChunk
+from metrics import MODEL_LOAD_SECONDS
+from model_cache import ModelCache
+from tts import TTSBase, VoicesIterable
+
+_LOGGER = logging.getLogger("opentts")
+
+_DIR = Path(__file__).parent
+
+# Maximum size of a request line (text to speak is included)
+_MAX_REQUEST_SIZE = 64 * 1024 * 1024
+
+# -----------------------------------------------------------------------------
+
+
+class WorkerError(Exception):
+    """Raised when a worker process fails or returns an error"""
+
+
+class SynthesisWorker:
+    """Handle to a single worker process"""
+
+    def __init__(self, index: int, config: typing.Dict[str, typing.Any]):
+        self.index = index
+        self.config = config
+
+        # Syntheses sent to worker that haven't returned yet
+        self.in_flight = 0
+
+        # Number of voices routed to this worker
+        self.num_voices = 0
+
+        self.restarts = 0
+
+        # Model cache statistics from the last response
+        self.model_stats: typing.Optional[typing.Dict[str, typing.Any]] = None
+
+        self._proc: typing.Optional[asyncio.subprocess.Process] = None
+        self._reader_task: typing.Optional["asyncio.Future"] = None
+        self._pending: typing.Dict[int, "asyncio.Future[AudioChunk]"] = {}
+        self._next_id = 0
+        self._start_lock = asyncio.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        """True if worker process hasn't exited"""
+        return (self._proc is not None) and (self._proc.returncode is None)
+
+    async def start(self):
+        """Start worker process if it's not already running"""
+        async with self._start_lock:
+            if self.is_running:
+                return
+
+            if self._proc is not None:
+                self.restarts += 1
+
+            worker_cmd = [
+                sys.executable,
+                str(_DIR / "workers.py"),
+                "--config",
+                json.dumps(self.config),
+            ]
+            _LOGGER.debug("Starting worker %s: %s", self.index, worker_cmd)
+
+            # Worker logs go to stderr
+            self._proc = await asyncio.create_subprocess_exec(
+                *worker_cmd,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+            )
+            self._reader_task = asyncio.ensure_future(self._read_responses(self._proc))
+
+    async def say(
+        self, tts_name: str, text: str, voice_id: str, **kwargs
+    ) -> AudioChunk:
+        """Synthesize text in worker process"""
+        # Counted before any await, so concurrent callers see this worker as busy
+        self.in_flight += 1
+
+        request_id = self._next_id
+        self._next_id += 1
+
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[AudioChunk]" = loop.create_future()
+
+        try:
+            await self.start()
+            assert self._proc is not None
+            assert self._proc.stdin is not None
+
+            self._pending[request_id] = future
+            self._write(
+                {
+                    "id": request_id,
+                    "tts": tts_name,
+                    "text": text,
+                    "voice_id": voice_id,
+                    "args": kwargs,
+                }
+            )
+            await self._proc.stdin.drain()
+
+            return await future
+        except asyncio.CancelledError:
+            if self.is_running:
+                # Stop synthesis in worker too
+                self._write({"id": request_id, "cancel": True})
+
+            raise
+        finally:
+            self.in_flight -= 1
+            self._pending.pop(request_id, None)
+
+    async def stop(self):
+        """Stop worker process"""
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+
+        if self.is_running:
+            assert self._proc is not None
+            self._proc.terminate()
+            await self._proc.wait()
+
+    def stats(self) -> typing.Dict[str, typing.Any]:
+        """Get worker statistics"""
+        return {
+            "pid": self._proc.pid if self.is_running and self._proc else None,
+            "in_flight": self.in_flight,
+            "voices": self.num_voices,
+            "restarts": self.restarts,
+            "models": self.model_stats,
+        }
+
+    def _write(self, message: typing.Dict[str, typing.Any]):
+        assert self._proc is not None
+        assert self._proc.stdin is not None
+        self._proc.stdin.write(json.dumps(message).encode() + b"\n")
+
+    async def _read_responses(self, proc: asyncio.subprocess.Process):
+        assert proc.stdout is not None
+
+        try:
+            while True:
+                header_line = await proc.stdout.readline()
+                if not header_line:
+                    break
+
+                header = json.loads(header_line)
+                frames = await proc.stdout.readexactly(header.get("size", 0))
+
+                # Metrics are kept even if the synthesis was cancelled
+                if "models" in header:
+                    self.model_stats = header["models"]
+
+                for load_labels, *load_values in header.get("model_loads", []):
+                    MODEL_LOAD_SECONDS.merge(load_labels, *load_values)
+
+                future = self._pending.get(header["id"])
+                if (future is None) or future.done():
+                    # Cancelled
+                    continue
+
+                if header.get("error"):
+                    future.set_exception(WorkerError(header["error"]))
+                else:
+                    future.set_result(
+                        AudioChunk(
+                            np.frombuffer(frames, dtype="<i2"),
+                            header["sample_rate"],
+                            header["channels"],
+                        )
+                    )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            _LOGGER.exception("worker %s", self.index)
+
+        # Worker exited, fail syntheses still waiting on it
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(
+                    WorkerError(f"Worker {self.index} exited ({proc.returncode})")
+                )
+
+        if proc.returncode is None:
+            proc.kill()
+
+
+class WorkerPool:
+    """Routes syntheses to worker processes with voice affinity.
+
+    A voice is sent to the same worker each time, so its models are only
+    loaded in that worker. If all of a voice's workers are busy and another
+    worker is idle, the idle worker is added to the voice as well.
+    """
+
+    def __init__(
+        self,
+        num_workers: int,
+        engines: typing.Dict[str, typing.Dict[str, typing.Any]],
+        model_cache_size: typing.Optional[int] = None,
+        debug: bool = False,
+    ):
+        self.num_workers = max(1, num_workers)
+        self.engines = engines
+        self.model_cache_size = model_cache_size
+        self.debug = debug
+
+        self.workers = [
+            SynthesisWorker(worker_index, self._worker_config())
+            for worker_index in range(self.num_workers)
+        ]
+
+        # tts:voice -> workers
+        self._voice_workers: typing.Dict[str, typing.List[SynthesisWorker]] = {}
+
+    async def start(self, pinned: typing.Iterable[str] = ()):
+        """Start all worker processes"""
+        for worker in self.workers:
+            worker.config = self._worker_config(pinned)
+
+        await asyncio.gather(*(worker.start() for worker in self.workers))
+
+    async def stop(self):
+        """Stop all worker processes"""
+        await asyncio.gather(*(worker.stop() for worker in self.workers))
+
+    async def say(
+        self, tts_name: str, text: str, voice_id: str, **kwargs
+    ) -> AudioChunk:
+        """Synthesize text in a worker process"""
+        worker = self.get_worker(f"{tts_name}:{voice_id}")
+        return await worker.say(tts_name, text, voice_id, **kwargs)
+
+    def get_worker(self, voice_key: str) -> SynthesisWorker:
+        """Get worker for a voice"""
+        voice_workers = self._voice_workers.get(voice_key)
+        if not voice_workers:
+            # New voice goes to the least busy worker
+            worker = min(self.workers, key=lambda w: (w.in_flight, w.num_voices))
+            self._voice_workers[voice_key] = [worker]
+            worker.num_voices += 1
+
+            return worker
+
+        worker = min(voice_workers, key=lambda w: w.in_flight)
+        if worker.in_flight > 0:
+            idle_workers = [
+                w
+                for w in self.workers
+                if (w.in_flight == 0) and (w not in voice_workers)
+            ]
+
+            if idle_workers:
+                # Spread a busy voice to another worker
+                worker = min(idle_workers, key=lambda w: w.num_voices)
+                voice_workers.append(worker)
+                worker.num_voices += 1
+
+        return worker
+
+    def stats(self) -> typing.Dict[str, typing.Any]:
+        """Get pool statistics"""
+        return {
+            "workers": [worker.stats() for worker in self.workers],
+            "voices": {
+                voice_key: [worker.index for worker in voice_workers]
+                for voice_key, voice_workers in self._voice_workers.items()
+            },
+        }
+
+    def model_stats(self) -> typing.Dict[str, int]:
+        """Get model cache totals across workers"""
+        totals = {"bytes": 0, "loads": 0, "evictions": 0}
+        for worker in self.workers:
+            if worker.model_stats:
+                for key in totals:
+                    totals[key] += worker.model_stats.get(key, 0)
+
+        return totals
+
+    def _worker_config(
+        self, pinned: typing.Iterable[str] = ()
+    ) -> typing.Dict[str, typing.Any]:
+        # Memory budget is split between workers
+        model_cache_size: typing.Optional[int] = None
+        if self.model_cache_size is not None:
+            model_cache_size = self.model_cache_size // self.num_workers
+
+        return {
+            "engines": self.engines,
+            "model_cache_size": model_cache_size,
+            "pinned": list(pinned),
+            "debug": self.debug,
+        }
+
+
+class WorkerTTS(TTSBase):
+    """Runs syntheses for a TTS system in worker processes.
+
+    Voices are still listed by the TTS system in this process, since that
+    doesn't load any models.
+    """
+
+    def __init__(self, tts_name: str, tts: TTSBase, pool: WorkerPool):
+        self.tts_name = tts_name
+        self.tts = tts
+        self.pool = pool
+        self.max_concurrency = tts.max_concurrency
+        self.audio_settings = tts.audio_settings
+
+    async def voices(self) -> VoicesIterable:
+        """Get list of available voices."""
+        async for voice in self.tts.voices():
+            yield voice
+
+    async def say(self, text: str, voice_id: str, **kwargs) -> bytes:
+        """Speak text as WAV."""
+        audio = await self.say_pcm(text, voice_id, **kwargs)
+        return audio.to_wav()
+
+    async def say_pcm(self, text: str, voice_id: str, **kwargs) -> AudioChunk:
+        """Speak text as 16-bit PCM audio."""
+        return await self.pool.say(self.tts_name, text, voice_id, **kwargs)
+
+
+# -----------------------------------------------------------------------------
+# Worker process
+# -----------------------------------------------------------------------------
+
+
+def main():
+    """Run worker process"""
+    parser = argparse.ArgumentParser(prog="opentts-worker")
+    parser.add_argument("--config", required=True, help="JSON worker config")
+    args = parser.parse_args()
+
+    config = json.loads(args.config)
+
+    if config.get("debug"):
+        logging.basicConfig(level=logging.DEBUG)
+    else:
+        logging.basicConfig(level=logging.INFO)
+
+    # Responses use a private copy of stdout, and anything else printed to
+    # stdout (e.g., by a library) goes to stderr instead.
+    response_file = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    model_cache = ModelCache(max_bytes=config.get("model_cache_size"))
+    for pinned_key in config.get("pinned", []):
+        model_cache.pin(pinned_key)
+
+    engines: typing.Dict[str, TTSBase] = {}
+    for tts_name, engine_config in config["engines"].items():
+        tts_class = getattr(tts_module, engine_config["class"])
+        tts_kwargs = dict(engine_config.get("kwargs", {}))
+
+        if "model_cache" in inspect.signature(tts_class).parameters:
+            # Models in this worker share its part of the memory budget
+            tts_kwargs["model_cache"] = model_cache
+
+        engines[tts_name] = tts_class(**tts_kwargs)
+
+    _LOGGER.debug("Worker started (pid=%s): %s", os.getpid(), list(engines.keys()))
+
+    try:
+        asyncio.run(serve(engines, response_file, model_cache))
+    except KeyboardInterrupt:
+        pass
+
+
+async def serve(
+    engines: typing.Dict[str, TTSBase],
+    response_file: typing.BinaryIO,
+    model_cache: ModelCache,
+):
+    """Handle requests from stdin until it's closed"""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=_MAX_REQUEST_SIZE)
+    await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+    )
+
+    tasks: typing.Dict[int, "asyncio.Future"] = {}
+
+    def respond(
+        request_id: int, audio: typing.Optional[AudioChunk] = None, error: str = ""
+    ):
+        header: typing.Dict[str, typing.Any] = {
+            "id": request_id,
+            "error": error,
+            "models": model_cache.stats(),
+            "model_loads": MODEL_LOAD_SECONDS.take(),
+        }
+        frames = bytes()
+
+        if audio is not None:
+            frames = audio.to_frames()
+            header["sample_rate"] = audio.sample_rate
+            header["channels"] = audio.channels
+
+        header["size"] = len(frames)
+        response_file.write(json.dumps(header).encode() + b"\n")
+        response_file.write(frames)
+        response_file.flush()
+
+    async def handle(request: typing.Dict[str, typing.Any]):
+        request_id = request["id"]
+        try:
+            tts = engines.get(request["tts"])
+            assert tts is not None, f"No TTS named {request['tts']}"
+
+            audio = await tts.say_pcm(
+                request["text"], request["voice_id"], **request.get("args", {})
+            )
+            respond(request_id, audio)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            _LOGGER.exception("worker request %s", request_id)
+            respond(request_id, error=f"{e.__class__.__name__}: {e}")
+        finally:
+            tasks.pop(request_id, None)
+
+    while True:
+        request_line = await reader.readline()
+        if not request_line:
+            break
+
+        request = json.loads(request_line)
+        if request.get("cancel"):
+            task = tasks.get(request["id"])
+            if task is not None:
+                task.cancel()
+
+            continue
+
+        tasks[request["id"]] = asyncio.ensure_future(handle(request))
+
+    for task in list(tasks.values()):
+        task.cancel()
+
+
+if __name__ == "__main__":
+    main()